@@ -1,12 +1,17 @@
 """Anymouse text anonymization utilities."""
 
-from .anonymize import anonymize_payload, anonymize_text
-from .deanonymize import deanonymize_payload, deanonymize_text
+from . import startup
+
+startup.install_if_enabled()  # Ahead of the imports below, so they are profiled
+
+from .anonymize import anonymize_payload, anonymize_text, anonymize_texts  # noqa: E402
+from .deanonymize import deanonymize_payload, deanonymize_text  # noqa: E402
 
 __all__ = [
     "anonymize_payload",
     "deanonymize_payload",
     "anonymize_text",
+    "anonymize_texts",
     "deanonymize_text",
 ]
 
@@ -0,0 +1,5 @@
+"""Allow ``python -m anymouse``."""
+from .cli import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
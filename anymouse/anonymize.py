@@ -2,61 +2,187 @@
 import re
 import copy
 import json
+import os
+import threading
+import time
+from collections import deque
+from itertools import chain
+from typing import Iterable, Iterator, Optional
+
+from .config import resolve_fields
+from .gazetteer import get_gazetteer, merge_spans
+from .metrics import count_entities, stage
+from .pii import PII_PREFIXES, PII_TYPES, find_pii, mask_spans, pii_enabled
+from .segment_cache import get_segment_cache
 
 # Global variables for lazy loading
 _NLP = None
 _SPACY_AVAILABLE = None
+_LOAD_LOCK = threading.Lock()  # One model load, even with a background load running
+_BACKGROUND_LOAD = None  # Thread started by the first budgeted request, if any
+
+SPACY_MODEL_NAME = "en_core_web_sm"
+# Components excluded (never loaded) per pipeline profile. Only entities are
+# read; the EntityRuler title patterns need POS, so tok2vec, the tagger and
+# attribute_ruler (or a morphologizer) stay in the "ner" profile.
+PIPELINE_PROFILES = {
+    "ner": (
+        "parser",
+        "lemmatizer",
+        "trainable_lemmatizer",
+        "senter",
+        "textcat",
+        "textcat_multilabel",
+        "spancat",
+        "entity_linker",
+    ),
+    "full": (),
+}
+DEFAULT_PIPELINE_PROFILE = "ner"
+
+
+# Wall time of the model load in this process, in ms; set by whichever call loads it
+_MODEL_INIT_MS = None
+_WARMUP_TEXT = "Dr. Jane Smith visited Sunnybrook Hospital in Toronto on March 1, 2024."
+
+# Shapes of the anonymize_payload message: a JSON string, or the object itself
+MESSAGE_FORMATS = ("string", "object")
+
+
+def _pipeline_profile() -> str:
+    profile = os.environ.get("ANYMOUSE_SPACY_PROFILE", DEFAULT_PIPELINE_PROFILE)
+    return profile if profile in PIPELINE_PROFILES else DEFAULT_PIPELINE_PROFILE
+
 
 def _get_nlp_model():
-    """Lazy load spaCy model to improve cold start performance."""
-    global _NLP, _SPACY_AVAILABLE
+    """Lazy load spaCy model to improve cold start performance.
+
+    The model is read from ``SPACY_MODEL_PATH`` when set (as the optimized
+    image does), otherwise the installed ``en_core_web_sm`` package. The
+    ``ANYMOUSE_SPACY_PROFILE`` env var picks which components are excluded.
+    Safe to call from several threads; the model is loaded once.
+    """
+    global _NLP, _SPACY_AVAILABLE, _MODEL_INIT_MS
     
     if _SPACY_AVAILABLE is None:
-        try:
-            import spacy
-            from spacy.language import Language
-            from spacy.pipeline import EntityRuler
+        # A request arriving during a background load waits for it here
+        with stage("model_load"), _LOAD_LOCK:
+            if _SPACY_AVAILABLE is not None:
+                return _NLP if _SPACY_AVAILABLE else None
+            start = time.perf_counter()
+            try:
+                import spacy
+                from spacy.language import Language
+                from spacy.pipeline import EntityRuler
             
-            _NLP = spacy.load("en_core_web_sm")
-            # Add EntityRuler before NER to override default detections
-            if "entity_ruler" not in _NLP.pipe_names:
-                ruler = _NLP.add_pipe("entity_ruler", before="ner")
-                patterns = [
-                    {"label": "PERSON", "pattern": [{"TEXT": {"REGEX": r"^(Dr\.|Mr\.|Ms\.|Mrs\.)"}}, {"POS": "PROPN"}]},
-                    {"label": "PERSON", "pattern": [{"TEXT": {"REGEX": r"^(Dr\.|Mr\.|Ms\.|Mrs\.)"}}, {"POS": "PROPN"}, {"POS": "PROPN"}]},
-                    {"label": "ORG", "pattern": [{"TEXT": "Sunnybrook"}, {"TEXT": "Hospital"}]}
-                ]
-                ruler.add_patterns(patterns)
-            _SPACY_AVAILABLE = True
-        except Exception:
-            _SPACY_AVAILABLE = False
-            _NLP = None
+                model = os.environ.get("SPACY_MODEL_PATH") or SPACY_MODEL_NAME
+                _NLP = spacy.load(model, exclude=list(PIPELINE_PROFILES[_pipeline_profile()]))
+                # Add EntityRuler before NER to override default detections
+                if "entity_ruler" not in _NLP.pipe_names:
+                    placement = {"before": "ner"} if "ner" in _NLP.pipe_names else {}
+                    ruler = _NLP.add_pipe("entity_ruler", **placement)
+                    patterns = [
+                        {"label": "PERSON", "pattern": [{"TEXT": {"REGEX": r"^(Dr\.|Mr\.|Ms\.|Mrs\.)"}}, {"POS": "PROPN"}]},
+                        {"label": "PERSON", "pattern": [{"TEXT": {"REGEX": r"^(Dr\.|Mr\.|Ms\.|Mrs\.)"}}, {"POS": "PROPN"}, {"POS": "PROPN"}]},
+                        {"label": "ORG", "pattern": [{"TEXT": "Sunnybrook"}, {"TEXT": "Hospital"}]}
+                    ]
+                    ruler.add_patterns(patterns)
+                _MODEL_INIT_MS = (time.perf_counter() - start) * 1000
+                _SPACY_AVAILABLE = True
+            except Exception:
+                _MODEL_INIT_MS = (time.perf_counter() - start) * 1000
+                _SPACY_AVAILABLE = False
+                _NLP = None
     
     return _NLP if _SPACY_AVAILABLE else None
 
 
-def anonymize_payload(payload: dict, config: dict) -> dict:
-    """Replace target fields with unique tokens in a nested payload."""
-    fields = config.get("fields", [])
-    result = copy.deepcopy(payload)  # Deep copy to avoid modifying original
+def anonymize_payload(payload: dict, config, message_format: str = "string") -> dict:
+    """Replace target fields with unique tokens in a nested payload.
+
+    Fields are dotted paths that may step into lists: ``items[*].name``,
+    ``items[0].name`` or ``entry.*.resource`` (see ``anymouse.paths``).
+    ``config`` is a config dict or a ``ConfigPlan`` from
+    ``anymouse.config.compile_config``, whose compiled paths are reused.
+
+    ``message`` is the anonymized payload as a JSON string; with
+    ``message_format="object"`` it is the object itself, so a caller that
+    serializes the whole result does not encode the payload twice.
+
+    The input is never modified and never deep-copied: only the dicts and
+    lists on a path to a replaced field are shallow-copied, and every
+    untouched subtree is shared with ``payload`` until the result is
+    serialized.
+    """
+    if message_format not in MESSAGE_FORMATS:
+        raise ValueError(f"Unknown message_format '{message_format}', expected one of {', '.join(MESSAGE_FORMATS)}")
+    fields, plan = resolve_fields(config)  # Trie of field paths, cached per fields list
     tokens = {}
-    field_index = 1
-    fields_set = set(fields)  # For quick lookup
+    field_index = 1  # Also counts replacements, for the early exit
 
-    def recurse(current: dict, path: str = ""):
+    def rewrite_fields(current, pairs):
+        """Apply the plan to ``(key or index, value, node)`` pairs of one container."""
         nonlocal field_index
-        for key in list(current.keys()):  # Avoid runtime errors during iteration
-            full_path = f"{path}.{key}" if path else key
-            if full_path in fields_set:
+        updated = None  # Shallow copy of ``current``, made on first change
+        for key, value, child in pairs:
+            if plan.targets is not None and field_index > plan.targets:
+                break
+            if child.terminal:
                 placeholder = f"[name{field_index}]"
-                tokens[placeholder] = current[key]
-                current[key] = placeholder
+                # Tokens must not alias the caller's containers
+                tokens[placeholder] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+                new_value = placeholder
                 field_index += 1
-            elif isinstance(current[key], dict):
-                recurse(current[key], full_path if path else key)
+            elif isinstance(value, dict) and (child.lookup or child.any_key):
+                new_value = rewrite(value, child)
+                if new_value is value:
+                    continue
+            elif isinstance(value, list) and (child.items or child.indices):
+                new_value = rewrite_list(value, child)
+                if new_value is value:
+                    continue
+            else:
+                continue
+            if updated is None:
+                updated = current.copy()  # Keeps key order, so output bytes are unchanged
+            updated[key] = new_value
+        return current if updated is None else updated
 
-    recurse(result)
-    message = json.dumps(result)  # Stringify as per edge case format
+    def rewrite(current: dict, node) -> dict:
+        lookup, any_key = node.lookup, node.any_key
+        if any_key is None:
+            # Only keys that continue some configured path; no path strings are built
+            return rewrite_fields(current, [(k, current[k], lookup[k]) for k in current if k in lookup])
+        return rewrite_fields(current, [(k, v, lookup.get(k, any_key)) for k, v in current.items()])
+
+    def position(indices: dict, i: int, size: int):
+        """The node for element ``i``; a positive and a negative index may both name it."""
+        forward, backward = indices.get(i), indices.get(i - size)
+        if forward is None or backward is None:
+            return forward or backward
+        return plan.merged(forward, backward)
+
+    def rewrite_list(current: list, node) -> list:
+        indices, items = node.indices, node.items
+        size = len(current)
+        if items is None:
+            # Explicit positions only: visit just those, in list order
+            positions = sorted({i if i >= 0 else i + size for i in indices if -size <= i < size})
+            return rewrite_fields(current, [(i, current[i], position(indices, i, size)) for i in positions])
+        if indices:
+            return rewrite_fields(current, (
+                (i, value, position(indices, i, size) or items) for i, value in enumerate(current)
+            ))
+        return rewrite_fields(current, ((i, value, items) for i, value in enumerate(current)))
+
+    with stage("substitute"):
+        result = rewrite(payload, plan.root) if plan else payload
+    if tokens:
+        count_entities({"FIELD": len(tokens)})
+    if message_format == "object":
+        return {"message": result, "tokens": tokens, "fields": fields}
+    with stage("serialize"):
+        message = json.dumps(result)  # Stringify as per edge case format
     return {"message": message, "tokens": tokens, "fields": fields}
 
 
@@ -94,13 +220,406 @@ def _regex_name_pattern() -> re.Pattern:
     return re.compile(r"\b([A-Z][a-z]+(?:\s+(?:Dr\.|Mr\.|Ms\.|Mrs\.)?\s*[A-Z][a-z]+)*)\b")
 
 
-def anonymize_text(text: str) -> dict:
+def warmup() -> dict:
+    """Load the NER model and run a tiny document through it.
+
+    Meant for the Lambda init phase and for scheduled warmup events, so the
+    first real request does not pay for the spaCy import, model load and
+    first inference.
+
+    Returns
+    -------
+    dict with keys:
+        - cold: True if the model was not loaded before this call
+        - init_ms: time the model load took in this process, whichever call
+          loaded it (None if that was not timed here)
+        - duration_ms: time this call took, including the load when cold
+        - engine: "spacy", or "regex" when spaCy is unavailable
+    """
+    cold = _SPACY_AVAILABLE is None
+    start = time.perf_counter()
+    nlp_model = _get_nlp_model()
+    if nlp_model:
+        nlp_model(_WARMUP_TEXT)
+    else:
+        _regex_entities(_WARMUP_TEXT)
+    duration_ms = (time.perf_counter() - start) * 1000
+    return {
+        "cold": cold,
+        "init_ms": None if _MODEL_INIT_MS is None else round(_MODEL_INIT_MS, 1),
+        "duration_ms": round(duration_ms, 1),
+        "engine": "spacy" if nlp_model else "regex",
+    }
+
+
+ENTITY_TYPES = ["PERSON", "ORG", "GPE", "DATE"]  # Supported types
+TYPE_PREFIXES = {"PERSON": "name", "ORG": "org", "GPE": "loc", "DATE": "date", **PII_PREFIXES}
+DEFAULT_BATCH_SIZE = 64
+# Fewer texts than this run in-process even when n_process > 1: starting a
+# pool and loading the model in each worker costs about as much as running
+# a few hundred texts through spaCy directly
+PARALLEL_MIN_TEXTS = 1000
+
+
+def _doc_entities(doc) -> list:
+    """Extract supported (start, end, text, label) spans from a spaCy Doc."""
+    return [(ent.start_char, ent.end_char, ent.text, ent.label_) for ent in doc.ents if ent.label_ in ENTITY_TYPES]
+
+
+def _regex_entities(text: str) -> list:
+    """Fallback detector: roughly match capitalized names as PERSON."""
+    pattern = _regex_name_pattern()
+    entities = []
+    for match in pattern.finditer(text):
+        name = match.group(0)
+        if name in _STOPWORDS:
+            continue
+        entities.append((match.start(), match.end(), name, "PERSON"))
+    return entities
+
+
+def _entity_types() -> list:
+    """Types reported in ``fields``; the PII types only when the pre-pass is on."""
+    return ENTITY_TYPES + PII_TYPES if pii_enabled() else list(ENTITY_TYPES)
+
+
+def _combine_spans(text: str, entities: list, pii_spans: list = ()) -> list:
+    """Merge detector spans: structured PII beats dictionary terms, which beat NER."""
+    gazetteer = get_gazetteer()
+    if gazetteer is not None:
+        entities = merge_spans(gazetteer.find(text), entities)
+    if pii_spans:
+        entities = merge_spans(pii_spans, entities)
+    return entities
+
+
+def _build_result(text: str, entities: list) -> dict:
+    """Replace detected entities with placeholders and build the response dict."""
+    with stage("substitute"):
+        entity_types = _entity_types()
+        if not entities:
+            return {"message": text, "tokens": {}, "fields": entity_types}
+
+        # Replace from left to right, assigning unique placeholders by type
+        entities = sorted(entities, key=lambda x: x[0])  # Sort by start position
+        type_counters = {t: 1 for t in TYPE_PREFIXES}  # e.g., {"PERSON": 1, "ORG": 1, ...}
+        mapping = {}  # entity_text -> placeholder
+        result_parts = []
+        last = 0
+        for start, end, entity_text, entity_type in entities:
+            result_parts.append(text[last:start])
+            if entity_text not in mapping:
+                prefix = TYPE_PREFIXES[entity_type]
+                placeholder = f"[{prefix}{type_counters[entity_type]}]"
+                mapping[entity_text] = placeholder
+                type_counters[entity_type] += 1
+            else:
+                placeholder = mapping[entity_text]
+            result_parts.append(placeholder)
+            last = end
+        result_parts.append(text[last:])
+
+        tokens = {placeholder: entity_text for entity_text, placeholder in mapping.items()}
+        count_entities({t: n - 1 for t, n in type_counters.items() if n > 1})
+        return {"message": "".join(result_parts), "tokens": tokens, "fields": entity_types}
+
+
+# Lowercase words that can start or make up a PERSON/ORG/GPE/DATE entity in
+# otherwise uncased text: title prefixes and temporal vocabulary. Uppercase
+# letters and digits are checked separately.
+_ENTITY_HINT_WORDS = (
+    "dr", "mr", "mrs", "ms", "mx", "prof", "sir", "st",
+    "jan", "january", "feb", "february", "mar", "march", "apr", "april", "may", "jun", "june",
+    "jul", "july", "aug", "august", "sep", "sept", "september", "oct", "october",
+    "nov", "november", "dec", "december",
+    "mon", "monday", "tue", "tues", "tuesday", "wed", "wednesday", "thu", "thur", "thurs",
+    "thursday", "fri", "friday", "sat", "saturday", "sun", "sunday",
+    "yesterday", "today", "tomorrow", "tonight", "ago", "weekend", "weekends",
+    "day", "days", "week", "weeks", "month", "months", "year", "years", "decade", "decades",
+    "century", "centuries", "quarter", "quarters", "season", "seasons",
+    "spring", "summer", "fall", "autumn", "winter",
+    "daily", "weekly", "monthly", "yearly", "annual", "annually", "quarterly", "biweekly",
+    "christmas", "easter", "thanksgiving",
+)
+_ENTITY_HINTS = re.compile(r"[A-Z0-9]|\b(?:" + "|".join(_ENTITY_HINT_WORDS) + r")\b")
+_PREFILTER_STATS = {"checked": 0, "skipped": 0}
+
+
+def _prefilter_enabled() -> bool:
+    return os.environ.get("ANYMOUSE_PREFILTER", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _may_contain_entities(text: str) -> bool:
+    """Cheap gate in front of NER: False only if no entity can be present.
+
+    Text qualifies when it has an uppercase letter (any script), a digit, a
+    title prefix or a date word; everything else skips the model entirely.
+    """
+    if _ENTITY_HINTS.search(text):
+        return True
+    return not text.isascii() and (text != text.lower() or any(char.isdigit() for char in text))
+
+
+def _passes_prefilter(text: str) -> bool:
+    """Apply the gate (unless disabled) and count how often it fires."""
+    if not _prefilter_enabled():
+        return True
+    _PREFILTER_STATS["checked"] += 1
+    if _may_contain_entities(text):
+        return True
+    _PREFILTER_STATS["skipped"] += 1
+    return False
+
+
+def prefilter_stats() -> dict:
+    """How many texts the pre-filter checked and how many skipped NER."""
+    return dict(_PREFILTER_STATS)
+
+
+DEFAULT_CHUNK_SIZE = 100_000  # Characters per chunk when chunking kicks in
+DEFAULT_CHUNK_OVERLAP = 200  # Characters shared by neighbouring chunks
+_BOUNDARIES = ("\n\n", "\n", ". ", "? ", "! ", " ")  # Preferred split points, best first
+
+
+def _iter_chunks(text: str, chunk_size: int, overlap: int) -> Iterator[tuple]:
+    """Yield (start, end, own_start, own_end) windows covering ``text``.
+
+    Windows end on a paragraph, line, sentence or word boundary when one falls
+    in their second half, and neighbours overlap by ``overlap`` characters so
+    an entity cut by one window is seen whole by the next. Each window *owns*
+    [own_start, own_end): entities are kept only by the window that owns
+    their start, so none is counted twice.
+    """
+    overlap = max(0, min(overlap, chunk_size // 4))
+    start = 0
+    own_start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            floor = start + chunk_size // 2
+            for boundary in _BOUNDARIES:
+                cut = text.rfind(boundary, floor, end)
+                if cut != -1:
+                    end = cut + len(boundary)
+                    break
+        if end >= length:
+            yield start, length, own_start, length
+            return
+        own_end = end - overlap // 2
+        yield start, end, own_start, own_end
+        own_start = own_end
+        start = end - overlap
+
+
+def _chunked_entities(text: str, nlp_model, chunk_size: int, overlap: int) -> list:
+    """Run NER chunk by chunk, mapping spans back to offsets in ``text``.
+
+    Only one chunk's Doc is alive at a time, so peak memory depends on
+    ``chunk_size`` rather than on the length of ``text``.
+    """
+    entities = []
+    last_end = 0
+    for start, end, own_start, own_end in _iter_chunks(text, chunk_size, overlap):
+        doc = nlp_model(text[start:end])
+        for ent_start, ent_end, entity_text, label in _doc_entities(doc):
+            ent_start += start
+            ent_end += start
+            if own_start <= ent_start < own_end and ent_start >= last_end:
+                entities.append((ent_start, ent_end, entity_text, label))
+                last_end = ent_end
+        del doc
+    return entities
+
+
+def _iter_segments(text: str) -> Iterator[tuple]:
+    """Yield (offset, segment) for every non-blank line, whitespace stripped."""
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        segment = line.strip()
+        if segment:
+            yield offset + len(line) - len(line.lstrip()), segment
+        offset += len(line)
+
+
+def _segmented_entities(text: str, nlp_model, cache=None, segments: Optional[list] = None) -> list:
+    """Detect entities line by line, running NER only on unseen lines.
+
+    With a ``cache``, spans for each line are looked up by a keyed hash of
+    the line; misses are batched through ``nlp.pipe`` and stored as offsets.
+    Without one, repeated lines are still only run once per call.
+    ``segments`` restricts detection to the given ``(offset, line)`` pairs.
+    """
+    if segments is None:
+        segments = list(_iter_segments(text))
+    keys = [cache.key(segment) if cache is not None else segment for _, segment in segments]
+    spans_by_key = {}
+    missing = {}  # key -> segment, first occurrence only
+    for key, (_, segment) in zip(keys, segments):
+        if key in spans_by_key or key in missing:
+            continue
+        spans = cache.get(key) if cache is not None else None
+        if spans is None:
+            missing[key] = segment
+        else:
+            spans_by_key[key] = spans
+
+    start = time.perf_counter()
+    short = {key: segment for key, segment in missing.items() if len(segment) <= nlp_model.max_length}
+    found = zip(short, (_doc_entities(doc) for doc in nlp_model.pipe(short.values())))
+    long_found = (
+        (key, _chunked_entities(segment, nlp_model, min(DEFAULT_CHUNK_SIZE, nlp_model.max_length), DEFAULT_CHUNK_OVERLAP))
+        for key, segment in missing.items() if key not in short
+    )
+    for found_items in (found, long_found):
+        for key, segment_entities in found_items:
+            spans = tuple((start, end, label) for start, end, _, label in segment_entities)
+            if cache is not None:
+                cache.put(key, spans)
+            spans_by_key[key] = spans
+    # Cache hits cost nothing, so only the lines that went through the model are timed
+    _record_ner_cost(sum(map(len, missing.values())), (time.perf_counter() - start) * 1000)
+
+    entities = []
+    for key, (offset, segment) in zip(keys, segments):
+        for start, end, label in spans_by_key[key]:
+            entities.append((offset + start, offset + end, segment[start:end], label))
+    return entities
+
+
+ENGINES = ("spacy", "regex", "cascade")
+# Seed for the NER cost estimate until real timings arrive (en_core_web_sm on one vCPU)
+DEFAULT_NER_MS_PER_CHAR = 0.02
+_NER_COST_ALPHA = 0.2  # Weight of the newest sample in the moving average
+_NER_COST = {"ms_per_char": DEFAULT_NER_MS_PER_CHAR, "samples": 0}
+
+
+def _record_ner_cost(chars: int, elapsed_ms: float) -> None:
+    """Fold one NER timing into the exponentially weighted per-char cost."""
+    if chars <= 0:
+        return
+    _NER_COST["ms_per_char"] += _NER_COST_ALPHA * (elapsed_ms / chars - _NER_COST["ms_per_char"])
+    _NER_COST["samples"] += 1
+
+
+def estimate_ner_ms(chars: int) -> float:
+    """Predicted spaCy time for ``chars`` characters, from recent timings."""
+    return chars * _NER_COST["ms_per_char"]
+
+
+def _load_in_background() -> None:
+    """Start loading the model on a daemon thread, once per process.
+
+    Budgeted requests never wait for the load; they get the regex engine
+    until the thread has finished. In Lambda the thread only runs while an
+    invocation is in progress, so the load may span a few requests.
+    """
+    global _BACKGROUND_LOAD
+    if _BACKGROUND_LOAD is None:
+        _BACKGROUND_LOAD = threading.Thread(target=_get_nlp_model, name="anymouse-model-load", daemon=True)
+        _BACKGROUND_LOAD.start()
+
+
+def _within_budget(chars: int, latency_budget_ms: Optional[float]) -> bool:
+    if latency_budget_ms is None:
+        return True
+    # An unloaded model costs seconds to load, far beyond any useful budget
+    return _SPACY_AVAILABLE is True and estimate_ner_ms(chars) <= latency_budget_ms
+
+
+def _spacy_entities(text: str, nlp_model, chunk_size: Optional[int], chunk_overlap: int) -> list:
+    segment_cache = get_segment_cache()
+    if segment_cache is not None and chunk_size is None:
+        return _segmented_entities(text, nlp_model, segment_cache)
+    if chunk_size is None and len(text) > nlp_model.max_length:
+        chunk_size = min(DEFAULT_CHUNK_SIZE, nlp_model.max_length)
+    start = time.perf_counter()
+    if chunk_size is not None and len(text) > chunk_size:
+        entities = _chunked_entities(text, nlp_model, chunk_size, chunk_overlap)
+    else:
+        entities = _doc_entities(nlp_model(text))
+    _record_ner_cost(len(text), (time.perf_counter() - start) * 1000)
+    return entities
+
+
+def _detect(text: str, engine: str, chunk_size: Optional[int], chunk_overlap: int, latency_budget_ms: Optional[float]) -> tuple:
+    """Return ``(engine actually used, entities, structured PII spans)`` for ``text``.
+
+    With the PII pre-pass on, its spans are blanked out of the text the
+    other detectors see, so the model has fewer tokens to tag.
+    """
+    pii_spans = find_pii(text) if pii_enabled() else []
+    text = mask_spans(text, pii_spans)
+    if not _passes_prefilter(text):
+        return engine, [], pii_spans
+    if engine == "regex":
+        return "regex", _regex_entities(text), pii_spans
+    if latency_budget_ms is not None and _SPACY_AVAILABLE is not True:
+        if _SPACY_AVAILABLE is None:
+            _load_in_background()
+        return "regex", _regex_entities(text), pii_spans
+    nlp_model = _get_nlp_model()
+    if not nlp_model:
+        return "regex", _regex_entities(text), pii_spans
+
+    if engine == "cascade":
+        # Lines the pre-filter clears never reach the model
+        segments = [(offset, segment) for offset, segment in _iter_segments(text) if _may_contain_entities(segment)]
+        chars = sum(len(segment) for _, segment in segments)
+    else:
+        chars = len(text)
+    if not _within_budget(chars, latency_budget_ms):
+        return "regex", _regex_entities(text), pii_spans
+
+    # NER timings are recorded where the model runs, for the characters it actually saw
+    if engine == "cascade":
+        entities = _segmented_entities(text, nlp_model, get_segment_cache(), segments)
+    else:
+        entities = _spacy_entities(text, nlp_model, chunk_size, chunk_overlap)
+    return engine, entities, pii_spans
+
+
+def anonymize_text(
+    text: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    engine: Optional[str] = None,
+    latency_budget_ms: Optional[float] = None,
+) -> dict:
     """Anonymize PERSON, ORG, GPE, and DATE entities in free-form text.
 
     Parameters
     ----------
     text: str
         Input text possibly containing entities.
+    chunk_size: int, optional
+        Run NER over windows of at most this many characters. Texts longer
+        than the model's ``max_length`` are chunked with ``DEFAULT_CHUNK_SIZE``
+        even when this is not set. Placeholder numbering is the same across
+        all chunks.
+    chunk_overlap: int
+        Characters shared by neighbouring chunks, so entities on a boundary
+        are still found. Must be smaller than ``chunk_size``.
+    engine: str, optional
+        ``"spacy"`` (the default; regex when spaCy is unavailable),
+        ``"regex"`` for the fast capitalized-name matcher only, or
+        ``"cascade"``, which runs spaCy only on lines the pre-filter cannot
+        clear.
+    latency_budget_ms: float, optional
+        If spaCy is predicted to take longer than this (from a moving average
+        of recent per-character timings), or the model is not loaded yet,
+        the request falls back to the regex engine. An unloaded model is
+        then loaded on a background thread for later requests.
+
+    When the segment cache is enabled (``ANYMOUSE_SEGMENT_CACHE_SIZE``) and
+    ``chunk_size`` is not given, NER runs per line and only on lines whose
+    spans are not cached yet.
+
+    Terms from the configured gazetteer (``ANYMOUSE_GAZETTEER``) are matched
+    as well and take precedence over overlapping NER spans. With
+    ``ANYMOUSE_PII_PATTERNS`` on, emails, phone numbers, dates, addresses and
+    IDs are found by a compiled pre-pass first and get their own
+    placeholders (``[email1]``, ``[phone1]``, ``[addr1]``, ``[id1]``).
 
     Returns
     -------
@@ -108,44 +627,160 @@ def anonymize_text(text: str) -> dict:
         - message: text with entities replaced by placeholders
         - tokens: mapping from placeholder to original entity
         - fields: list of entity types anonymized
+        - engine: engine actually used, only when ``engine`` or
+          ``latency_budget_ms`` was given
     """
-    entity_types = ["PERSON", "ORG", "GPE", "DATE"]  # Supported types
-    type_prefixes = {"PERSON": "name", "ORG": "org", "GPE": "loc", "DATE": "date"}
-    nlp_model = _get_nlp_model()
-    if nlp_model:
-        doc = nlp_model(text)
-        entities = [(ent.start_char, ent.end_char, ent.text, ent.label_) for ent in doc.ents if ent.label_ in entity_types]
+    if engine is not None and engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+    if latency_budget_ms is not None and latency_budget_ms <= 0:
+        raise ValueError("latency_budget_ms must be positive")
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    if chunk_overlap < 0:
+        raise ValueError("chunk_overlap must not be negative")
+    if chunk_size is not None and chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
+    with stage("ner"):
+        used, entities, pii_spans = _detect(text, engine or "spacy", chunk_size, chunk_overlap, latency_budget_ms)
+        entities = _combine_spans(text, entities, pii_spans)
+    result = _build_result(text, entities)
+    if engine is not None or latency_budget_ms is not None:
+        result["engine"] = used
+    return result
+
+
+def anonymize_texts(
+    texts: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    n_process: int = 1,
+) -> Iterator[dict]:
+    """Anonymize many free-form texts, batching NER through ``nlp.pipe``.
+
+    Parameters
+    ----------
+    texts: Iterable[str]
+        Input texts. Consumed lazily, ``batch_size`` items at a time.
+    batch_size: int
+        Number of texts collected per batch and passed to ``nlp.pipe``.
+    n_process: int
+        Worker processes to fan batches out to; ``-1`` uses every CPU. Each
+        worker loads the model once. At most ``2 * n_process`` batches are in
+        flight, so memory stays bounded for arbitrarily long inputs. Inputs
+        under ``PARALLEL_MIN_TEXTS`` texts, or runs where spaCy is known to
+        be unavailable, stay in-process, where they are faster.
+
+    Yields
+    ------
+    dict
+        One result per input, in input order, identical to ``anonymize_text``.
+        Duplicate texts within a batch are only run through the model once.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
+    if n_process == -1:
+        n_process = os.cpu_count() or 1
+    if n_process < 1:
+        raise ValueError("n_process must be a positive integer or -1")
+
+    batches = _batched(texts, batch_size)
+    if n_process > 1:
+        batches, n_process = _plan_parallel(batches, n_process)
+    if n_process == 1:
+        for batch in batches:
+            with stage("ner"):
+                results = _anonymize_batch(batch, batch_size)
+            yield from results
     else:
-        # Fallback to regex for PERSON only
-        pattern = _regex_name_pattern()
-        entities = []
-        for match in pattern.finditer(text):
-            name = match.group(0)
-            if name in _STOPWORDS:
-                continue
-            entities.append((match.start(), match.end(), name, "PERSON"))
-
-    if not entities:
-        return {"message": text, "tokens": {}, "fields": entity_types}
-
-    # Replace from left to right, assigning unique placeholders by type
-    entities.sort(key=lambda x: x[0])  # Sort by start position
-    type_counters = {t: 1 for t in entity_types}  # e.g., {"PERSON": 1, "ORG": 1, ...}
-    mapping = {}  # entity_text -> placeholder
-    result_parts = []
-    last = 0
-    for start, end, entity_text, entity_type in entities:
-        result_parts.append(text[last:start])
-        if entity_text not in mapping:
-            prefix = type_prefixes[entity_type]
-            placeholder = f"[{prefix}{type_counters[entity_type]}]"
-            mapping[entity_text] = placeholder
-            type_counters[entity_type] += 1
-        else:
-            placeholder = mapping[entity_text]
-        result_parts.append(placeholder)
-        last = end
-    result_parts.append(text[last:])
+        yield from _anonymize_parallel(batches, batch_size, n_process)
+
+
+def _batched(texts: Iterable[str], batch_size: int) -> Iterator[list]:
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _plan_parallel(batches: Iterator[list], n_process: int) -> tuple:
+    """Return ``(batches, n_process)``, falling back to one process when a pool cannot pay off.
+
+    Up to ``PARALLEL_MIN_TEXTS`` texts are read ahead to tell; they are
+    yielded first either way. Without spaCy every worker would run the regex
+    engine, which is cheaper than shipping the texts to it.
+    """
+    if _SPACY_AVAILABLE is False:
+        return batches, 1
+    peeked = []
+    size = 0
+    for batch in batches:
+        peeked.append(batch)
+        size += len(batch)
+        if size >= PARALLEL_MIN_TEXTS:
+            return chain(peeked, batches), n_process
+    return iter(peeked), 1
+
 
-    tokens = {placeholder: entity_text for entity_text, placeholder in mapping.items()}
-    return {"message": "".join(result_parts), "tokens": tokens, "fields": entity_types}
+def _init_worker() -> None:
+    """Process-pool initializer: load the model and gazetteer once per worker."""
+    _get_nlp_model()
+    get_gazetteer()
+
+
+def _anonymize_parallel(batches: Iterator[list], batch_size: int, n_process: int) -> Iterator[dict]:
+    """Fan batches out to worker processes and yield results in input order."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_pending = 2 * n_process
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=n_process, initializer=_init_worker) as pool:
+        for batch in batches:
+            pending.append(pool.submit(_anonymize_batch, batch, batch_size))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _anonymize_batch(batch: list, batch_size: int) -> list:
+    """Run one batch of texts through the detector, deduplicating inputs."""
+    results = {}
+    pending = {}  # text -> (PII spans, masked text) for texts the pre-filter lets through
+    scan_pii = pii_enabled()
+    for text in dict.fromkeys(batch):  # Preserves first-seen order
+        pii_spans = find_pii(text) if scan_pii else []
+        masked = mask_spans(text, pii_spans)
+        if _passes_prefilter(masked):
+            pending[text] = (pii_spans, masked)
+        else:
+            results[text] = _build_result(text, _combine_spans(text, [], pii_spans))
+    nlp_model = _get_nlp_model() if pending else None
+    if nlp_model and get_segment_cache() is not None:
+        # Cached segments make per-text calls cheaper than piping whole texts.
+        # The texts have already been gated and masked, so this goes straight to NER.
+        for text, (pii_spans, masked) in pending.items():
+            entities = _spacy_entities(masked, nlp_model, None, DEFAULT_CHUNK_OVERLAP)
+            results[text] = _build_result(text, _combine_spans(text, entities, pii_spans))
+    elif nlp_model:
+        # Over-long texts take the chunked path, exactly as anonymize_text does
+        short = [text for text in pending if len(text) <= nlp_model.max_length]
+        docs = nlp_model.pipe([pending[text][1] for text in short], batch_size=batch_size)
+        start = time.perf_counter()
+        for text, doc in zip(short, docs):
+            results[text] = _build_result(text, _combine_spans(text, _doc_entities(doc), pending[text][0]))
+        _record_ner_cost(sum(map(len, short)), (time.perf_counter() - start) * 1000)
+        for text, (pii_spans, masked) in pending.items():
+            if text not in results:
+                entities = _spacy_entities(masked, nlp_model, None, DEFAULT_CHUNK_OVERLAP)
+                results[text] = _build_result(text, _combine_spans(text, entities, pii_spans))
+    else:
+        for text, (pii_spans, masked) in pending.items():
+            results[text] = _build_result(text, _combine_spans(text, _regex_entities(masked), pii_spans))
+    # Duplicates get their own containers so callers can mutate results independently
+    return [
+        {"message": results[text]["message"], "tokens": dict(results[text]["tokens"]), "fields": list(results[text]["fields"])}
+        for text in batch
+    ]
@@ -0,0 +1,39 @@
+"""Shared boto3 clients reused across warm Lambda invocations.
+
+boto3 is imported by the first ``get_client`` call, not with this module:
+it costs a few hundred milliseconds of cold start that requests which never
+reach AWS should not pay.
+"""
+import threading
+
+# Module-level pool: clients survive between invocations of a warm container
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(service: str):
+    """
+    Return a pooled boto3 client for ``service``, creating it on first use.
+
+    Args:
+        service: AWS service name, e.g. 's3' or 'ssm'.
+
+    Returns:
+        A boto3 client shared by every caller in this process.
+    """
+    client = _CLIENTS.get(service)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(service)
+            if client is None:
+                import boto3
+
+                client = boto3.client(service)
+                _CLIENTS[service] = client
+    return client
+
+
+def reset_clients() -> None:
+    """Drop all pooled clients (e.g. after credentials change, or in tests)."""
+    with _CLIENTS_LOCK:
+        _CLIENTS.clear()
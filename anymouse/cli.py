@@ -0,0 +1,211 @@
+"""
+Command-line entry point for offline anonymize/deanonymize jobs.
+
+Reads JSONL records, one per line, and writes JSONL results. Input records
+look like API request bodies::
+
+    {"id": "note-1", "payload": "Hello Dr. Smith"}
+    {"id": "rec-2", "payload": {"patient_name": "Jane Doe"}}
+
+String payloads are anonymized as free text; object payloads use the fields
+in ``--config``. Anonymized records go to ``--output`` and their tokens, one
+line per record in the same order, to the ``--tokens`` sidecar. Running
+``deanonymize`` with the same two files restores the original records.
+
+Records are streamed, so memory use does not grow with the file size.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from .anonymize import DEFAULT_BATCH_SIZE, anonymize_payload, anonymize_texts
+from .deanonymize import deanonymize_payload, deanonymize_text
+
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+
+class _Progress:
+    """Periodic records/s and MB/s report on stderr."""
+
+    def __init__(self, action: str, enabled: bool):
+        self.action = action
+        self.enabled = enabled
+        self.records = 0
+        self.errors = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    def update(self, size: int, error: bool = False) -> None:
+        self.records += 1
+        self.bytes += size
+        self.errors += int(error)
+        now = time.monotonic()
+        if self.enabled and now - self.last_report >= PROGRESS_INTERVAL_SECONDS:
+            self.last_report = now
+            self._report(now, "progress")
+
+    def finish(self) -> None:
+        if self.enabled:
+            self._report(time.monotonic(), "done")
+
+    def _report(self, now: float, status: str) -> None:
+        elapsed = max(now - self.started, 1e-9)
+        print(
+            f"action={self.action} status={status} records={self.records} errors={self.errors} "
+            f"elapsed_s={elapsed:.1f} records_per_s={self.records / elapsed:.1f} "
+            f"mb_per_s={self.bytes / elapsed / 1024 / 1024:.2f}",
+            file=sys.stderr,
+        )
+
+
+def _open(stack: ExitStack, path: str, mode: str):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return stack.enter_context(open(path, mode, encoding="utf-8"))
+
+
+def _write(stream, record: dict) -> None:
+    stream.write(json.dumps(record))
+    stream.write("\n")
+
+
+def _with_id(record, result: dict) -> dict:
+    if isinstance(record, dict) and "id" in record:
+        return {"id": record["id"], **result}
+    return result
+
+
+def _read_records(stream):
+    """Yield (line_number, record or None, error or None, size) for non-blank lines."""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None, len(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Invalid JSON: {e.msg}", len(line)
+
+
+def run_anonymize(args) -> int:
+    config = None
+    if args.config:
+        from .config import validate_config
+
+        with open(args.config, encoding="utf-8") as config_file:
+            config = validate_config(json.load(config_file))
+
+    progress = _Progress("anonymize", not args.quiet)
+    with ExitStack() as stack:
+        source = _open(stack, args.input, "r")
+        output = _open(stack, args.output, "w")
+        sidecar = _open(stack, args.tokens, "w")
+
+        # Every record sends one text through the batched NER stream (non-text
+        # records send ""), so results line up with records and only the
+        # stream's bounded look-ahead is ever buffered.
+        pending = deque()
+
+        def texts():
+            for item in _read_records(source):
+                pending.append(item)
+                record = item[1]
+                payload = record.get("payload") if isinstance(record, dict) else None
+                yield payload if isinstance(payload, str) else ""
+
+        results = anonymize_texts(texts(), batch_size=args.batch_size, n_process=args.n_process)
+        for text_result in results:
+            line_number, record, error, size = pending.popleft()
+            payload = record.get("payload") if isinstance(record, dict) else None
+            tokens = {}
+            if error is None and isinstance(payload, str):
+                tokens = text_result.pop("tokens")
+                result = text_result
+            elif error is None and isinstance(payload, dict):
+                if config is None:
+                    error = "Structured payload requires --config"
+                else:
+                    anonymized = anonymize_payload(payload, config)
+                    tokens = anonymized.pop("tokens")
+                    result = {**anonymized, "structured": True}
+            elif error is None:
+                error = "Missing 'payload' field or unsupported payload type"
+
+            if error is not None:
+                result = {"line": line_number, "error": error}
+            _write(output, _with_id(record, result))
+            _write(sidecar, _with_id(record, {"tokens": tokens}))
+            progress.update(size, error is not None)
+    progress.finish()
+    return 1 if progress.errors else 0
+
+
+def run_deanonymize(args) -> int:
+    progress = _Progress("deanonymize", not args.quiet)
+    with ExitStack() as stack:
+        source = _open(stack, args.input, "r")
+        sidecar = _open(stack, args.tokens, "r")
+        output = _open(stack, args.output, "w")
+
+        sidecar_records = _read_records(sidecar)
+        for line_number, record, error, size in _read_records(source):
+            token_item = next(sidecar_records, None)
+            tokens = {}
+            if token_item is None:
+                error = error or "No matching line in tokens file"
+            elif token_item[2] is not None:
+                error = error or f"Tokens file line {token_item[0]}: {token_item[2]}"
+            elif isinstance(token_item[1], dict):
+                tokens = token_item[1].get("tokens") or {}
+
+            if error is None and not (isinstance(record, dict) and isinstance(record.get("message"), str)):
+                error = record.get("error") if isinstance(record, dict) and "error" in record else "Missing 'message' field"
+            if error is None:
+                if record.get("structured"):
+                    message = deanonymize_payload({"message": record["message"], "tokens": tokens}, {})["message"]
+                else:
+                    message = deanonymize_text(record["message"], tokens)
+                result = {"message": message}
+            else:
+                result = {"line": line_number, "error": error}
+            _write(output, _with_id(record, result))
+            progress.update(size, error is not None)
+    progress.finish()
+    return 1 if progress.errors else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m anymouse",
+        description="Anonymize or deanonymize JSONL records offline.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    anonymize = subparsers.add_parser("anonymize", help="Anonymize JSONL records")
+    anonymize.add_argument("-i", "--input", default="-", help="Input JSONL file ('-' for stdin)")
+    anonymize.add_argument("-o", "--output", default="-", help="Anonymized JSONL output ('-' for stdout)")
+    anonymize.add_argument("-t", "--tokens", required=True, help="Token sidecar JSONL output")
+    anonymize.add_argument("-c", "--config", help="Config JSON file for structured payloads")
+    anonymize.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Texts per NER batch")
+    anonymize.add_argument("--n-process", type=int, default=1, help="Worker processes (-1 for all CPUs)")
+    anonymize.add_argument("-q", "--quiet", action="store_true", help="Do not report progress on stderr")
+    anonymize.set_defaults(run=run_anonymize)
+
+    deanonymize = subparsers.add_parser("deanonymize", help="Restore anonymized JSONL records")
+    deanonymize.add_argument("-i", "--input", default="-", help="Anonymized JSONL file ('-' for stdin)")
+    deanonymize.add_argument("-o", "--output", default="-", help="Restored JSONL output ('-' for stdout)")
+    deanonymize.add_argument("-t", "--tokens", required=True, help="Token sidecar JSONL written by anonymize")
+    deanonymize.add_argument("-q", "--quiet", action="store_true", help="Do not report progress on stderr")
+    deanonymize.set_defaults(run=run_deanonymize)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "anonymize" and (args.batch_size < 1 or args.n_process == 0 or args.n_process < -1):
+        print("error: --batch-size must be positive and --n-process positive or -1", file=sys.stderr)
+        return 2
+    return args.run(args)
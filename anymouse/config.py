@@ -1,19 +1,60 @@
-"""Config loading and validation helpers."""
+"""Config loading and validation helpers.
+
+pydantic and botocore are imported on first use rather than with this
+module, so requests that neither validate a config nor read one from S3
+(free-text anonymization, deanonymization) never load them.
+"""
+import copy
 import json
-import boto3
-import botocore.exceptions
-from pydantic import BaseModel, ValidationError, field_validator
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from typing import List
 
-class Config(BaseModel):
-    fields: List[str] = []
+from .aws import get_client
+from .paths import compile_fields
+
+logger = logging.getLogger(__name__)
+
+# Validated S3 configs, most recently used last: (bucket, key) -> entry
+CONFIG_CACHE_SIZE = int(os.environ.get("ANYMOUSE_CONFIG_CACHE_SIZE", "64"))
+# Seconds a cached config is served before it is revalidated against its ETag
+CONFIG_CACHE_TTL_SECONDS = float(os.environ.get("ANYMOUSE_CONFIG_CACHE_TTL_SECONDS", "60"))
+_S3_CONFIG_CACHE = OrderedDict()
+_S3_CONFIG_LOCK = threading.Lock()
+# Compiled plans of validated configs, most recently used last: content key -> ConfigPlan
+CONFIG_PLAN_CACHE_SIZE = int(os.environ.get("ANYMOUSE_CONFIG_PLAN_CACHE_SIZE", "256"))
+_CONFIG_PLANS = OrderedDict()
+_CONFIG_PLAN_LOCK = threading.Lock()
+_CONFIG_PLAN_STATS = {"hits": 0, "misses": 0}
+_CONFIG_MODEL = None
+
+def _config_model():
+    """Build the pydantic ``Config`` model on first use."""
+    global _CONFIG_MODEL
+    if _CONFIG_MODEL is None:
+        from pydantic import BaseModel, field_validator
+
+        class Config(BaseModel):
+            fields: List[str] = []
+
+            @field_validator("fields", mode="before")
+            @classmethod
+            def check_fields(cls, value):
+                if not isinstance(value, list) or not all(isinstance(f, str) for f in value):
+                    raise ValueError("Fields must be a list of strings")
+                return value
 
-    @field_validator("fields", mode="before")
-    @classmethod
-    def check_fields(cls, value):
-        if not isinstance(value, list) or not all(isinstance(f, str) for f in value):
-            raise ValueError("Fields must be a list of strings")
-        return value
+        _CONFIG_MODEL = Config
+    return _CONFIG_MODEL
+
+def __getattr__(name):
+    # ``Config`` stays importable from here without importing pydantic up front
+    if name == "Config":
+        return _config_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def validate_config(config: dict) -> dict:
     """
@@ -28,15 +69,140 @@ def validate_config(config: dict) -> dict:
     Raises:
         ValueError: If config is invalid (e.g., fields not a list of strings).
     """
+    from pydantic import ValidationError
+
     try:
-        return Config(**config).model_dump()
+        return _config_model()(**config).model_dump()
     except ValidationError as e:
         raise ValueError(str(e))
 
+class ConfigPlan:
+    """A validated config, compiled once and shared by every request that sends it.
+
+    Holds the field paths, their compiled trie (``anymouse.paths.FieldPlan``)
+    and whether the paths can be applied while streaming. Plans are shared
+    between requests and must not be modified.
+    """
+
+    __slots__ = ("fields", "field_plan", "streamable")
+
+    def __init__(self, config: dict):
+        from .stream import supports_fields
+
+        self.fields = tuple(config["fields"])
+        self.field_plan = compile_fields(self.fields)
+        self.streamable = supports_fields(self.fields)
+
+    def to_dict(self) -> dict:
+        """The validated config, as ``validate_config`` returns it."""
+        return {"fields": list(self.fields)}
+
+def _content_key(value):
+    """Hashable copy of JSON-like data: equal content gives equal keys, whatever the key order.
+
+    Cheaper than hashing canonical JSON, which costs more than validating a
+    config does. Each value is tagged with its type so that ``1``, ``1.0``
+    and ``True`` stay distinct.
+    """
+    if isinstance(value, dict):
+        return dict, tuple(sorted((key, _content_key(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        if all(type(item) is str for item in value):  # Field lists, the common case
+            return list, tuple(value)
+        return list, tuple(map(_content_key, value))
+    return type(value), value
+
+def compile_config(config: dict) -> ConfigPlan:
+    """
+    Validate and compile a config, reusing the plan of an identical earlier config.
+    
+    Plans are kept in a bounded LRU keyed by the config's content (a frozen,
+    key-order independent copy), so a config that arrives again skips
+    pydantic validation and path compilation. Invalid configs are not cached.
+    
+    Args:
+        config: Config dict, as accepted by ``validate_config``.
+    
+    Returns:
+        The shared ConfigPlan for ``config``.
+    
+    Raises:
+        ValueError: If config is invalid.
+    """
+    key = None
+    if isinstance(config, dict):
+        try:
+            key = _content_key(config)
+            hash(key)
+        except TypeError:  # Unhashable or unsortable content is validated every time
+            key = None
+    if key is not None:
+        with _CONFIG_PLAN_LOCK:
+            plan = _CONFIG_PLANS.get(key)
+            if plan is not None:
+                _CONFIG_PLANS.move_to_end(key)
+                _CONFIG_PLAN_STATS["hits"] += 1
+                return plan
+            _CONFIG_PLAN_STATS["misses"] += 1
+    plan = ConfigPlan(validate_config(config))
+    if key is not None:
+        with _CONFIG_PLAN_LOCK:
+            _CONFIG_PLANS[key] = plan
+            _CONFIG_PLANS.move_to_end(key)
+            while len(_CONFIG_PLANS) > max(CONFIG_PLAN_CACHE_SIZE, 0):
+                _CONFIG_PLANS.popitem(last=False)
+    return plan
+
+def config_plan_stats() -> dict:
+    """Hits, misses and current size of the config plan cache."""
+    with _CONFIG_PLAN_LOCK:
+        return {**_CONFIG_PLAN_STATS, "size": len(_CONFIG_PLANS)}
+
+def clear_config_plans() -> None:
+    """Drop every cached config plan and reset the counters."""
+    with _CONFIG_PLAN_LOCK:
+        _CONFIG_PLANS.clear()
+        _CONFIG_PLAN_STATS.update(hits=0, misses=0)
+
+def resolve_fields(config) -> tuple:
+    """``(fields, compiled FieldPlan)`` of a config dict or a ConfigPlan."""
+    if isinstance(config, ConfigPlan):
+        return list(config.fields), config.field_plan
+    fields = config.get("fields", [])
+    return fields, compile_fields(fields)
+
+def _cache_get(cache_key):
+    with _S3_CONFIG_LOCK:
+        entry = _S3_CONFIG_CACHE.get(cache_key)
+        if entry is not None:
+            _S3_CONFIG_CACHE.move_to_end(cache_key)
+        return entry
+
+def _cache_put(cache_key, config, etag, now):
+    with _S3_CONFIG_LOCK:
+        _S3_CONFIG_CACHE[cache_key] = {"config": config, "etag": etag, "checked_at": now}
+        _S3_CONFIG_CACHE.move_to_end(cache_key)
+        while len(_S3_CONFIG_CACHE) > max(CONFIG_CACHE_SIZE, 0):
+            _S3_CONFIG_CACHE.popitem(last=False)
+
+def clear_config_cache() -> None:
+    """Drop every cached S3 config."""
+    with _S3_CONFIG_LOCK:
+        _S3_CONFIG_CACHE.clear()
+
+def _is_not_modified(error) -> bool:
+    code = str(error.response.get("Error", {}).get("Code", ""))
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code in ("304", "NotModified") or status == 304
+
 def load_config_from_s3(bucket: str, key: str) -> dict:
     """
     Load and validate a configuration from an S3 bucket.
     
+    Validated configs are kept in a bounded LRU keyed by (bucket, key). After
+    CONFIG_CACHE_TTL_SECONDS the object is revalidated with a conditional
+    If-None-Match GET, so unchanged configs are not downloaded or re-validated.
+    
     Args:
         bucket: S3 bucket name.
         key: S3 object key (e.g., 'config.json').
@@ -47,10 +213,60 @@ def load_config_from_s3(bucket: str, key: str) -> dict:
     Raises:
         ValueError: If config is invalid or S3 access fails.
     """
+    cache_key = (bucket, key)
+    now = time.monotonic()
+    entry = _cache_get(cache_key)
+    if entry is not None and now - entry["checked_at"] < CONFIG_CACHE_TTL_SECONDS:
+        return copy.deepcopy(entry["config"])
+
+    from botocore.exceptions import ClientError
+
+    request = {"Bucket": bucket, "Key": key}
+    if entry is not None and entry["etag"]:
+        request["IfNoneMatch"] = entry["etag"]
     try:
-        s3_client = boto3.client("s3")
-        response = s3_client.get_object(Bucket=bucket, Key=key)
+        s3_client = get_client("s3")
+        try:
+            response = s3_client.get_object(**request)
+        except ClientError as e:
+            if entry is not None and _is_not_modified(e):
+                _cache_put(cache_key, entry["config"], entry["etag"], now)
+                return copy.deepcopy(entry["config"])
+            raise
         config_data = json.loads(response["Body"].read().decode("utf-8"))
-        return validate_config(config_data)
-    except (botocore.exceptions.ClientError, json.JSONDecodeError) as e:
+        config = validate_config(config_data)
+    except (ClientError, json.JSONDecodeError) as e:
         raise ValueError(f"Failed to load config from S3: {str(e)}")
+    _cache_put(cache_key, config, response.get("ETag"), now)
+    return copy.deepcopy(config)
+
+def prefetch_configs(spec: str = None) -> int:
+    """
+    Warm the S3 config cache during container init.
+    
+    Args:
+        spec: Comma-separated 'bucket/key' (or 's3://bucket/key') entries.
+            Defaults to the ANYMOUSE_PREFETCH_CONFIGS environment variable.
+    
+    Returns:
+        Number of configs loaded. Failures are logged and skipped so a bad
+        entry never prevents the container from starting.
+    """
+    if spec is None:
+        spec = os.environ.get("ANYMOUSE_PREFETCH_CONFIGS", "")
+    loaded = 0
+    for item in spec.split(","):
+        item = item.strip()
+        if item.startswith("s3://"):
+            item = item[len("s3://"):]
+        bucket, _, key = item.partition("/")
+        if not bucket or not key:
+            if item:
+                logger.warning("action=prefetch_config status=skipped reason=invalid_entry")
+            continue
+        try:
+            load_config_from_s3(bucket, key)
+            loaded += 1
+        except ValueError:
+            logger.warning("action=prefetch_config status=error bucket=%s key=%s", bucket, key)
+    return loaded
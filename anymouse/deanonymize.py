@@ -1,40 +1,203 @@
 """Core deanonymization logic."""
-import copy
 import json
 import re
+from collections import OrderedDict
+from functools import lru_cache
 
+from .metrics import stage
 
-def deanonymize_payload(payload: dict, config: dict) -> dict:
-    """Replace tokens with original values in a nested payload via provided mapping."""
-    message = payload.get("message", "")
-    tokens = payload.get("tokens", {})
-    if not message or not tokens:
-        return {"message": message}  # Early return if no work needed
-    
+
+_PAYLOAD_PLACEHOLDER = re.compile(r"\[name\d+\]")  # Matches placeholders like [name1]
+_PAYLOAD_SPLIT = re.compile(r"(\[name\d+\])")
+# A placeholder followed by the rest of its string literal and a colon sits in a key
+_KEY_PLACEHOLDER = re.compile(r'\[name\d+\](?=(?:[^"\\]|\\.)*"\s*:)')
+_OBJECT_START = re.compile(r"\s*\{")
+
+
+def _can_substitute_raw(message: str, tokens: dict) -> bool:
+    """Whether substituting in the raw JSON text matches the tree walk.
+
+    The walk only touches string values, so the raw text is only used when
+    the message is a JSON object with no placeholders in keys, and every
+    replacement is itself a string.
+    """
+    if not _OBJECT_START.match(message) or message.rstrip()[-1:] != "}":
+        return False
+    if not all(isinstance(value, str) for value in tokens.values()):
+        return False
+    return not _KEY_PLACEHOLDER.search(message)
+
+
+def _substitute_raw(message: str, tokens: dict) -> str:
+    """Replace placeholders inside the JSON string literals of ``message``."""
+    # Encode as JSON string contents: quotes, backslashes, control chars
+    escaped = {placeholder: json.dumps(value)[1:-1] for placeholder, value in tokens.items()}
+    return _substitute(_PAYLOAD_SPLIT, message, escaped)
+
+
+def _deanonymize_tree(message: str, tokens: dict) -> dict:
+    """Parse, walk every nested dict and list and re-serialize the message.
+
+    A string that is exactly one placeholder is restored to the original
+    value whatever its type, so whole objects and lists come back intact.
+    """
     try:
         result = json.loads(message)  # Parse stringified message to dict
     except json.JSONDecodeError:
         return {"message": message}  # Fallback if not valid JSON
-    
-    pattern = re.compile(r"\[name\d+\]")  # Matches placeholders like [name1]
-    
-    def recurse(current: dict):
-        for key in list(current.keys()):
-            value = current[key]
-            if isinstance(value, str):
+
+    restored_message = json.dumps(deanonymize_value(result, tokens))
+    return {"message": restored_message}
+
+
+def deanonymize_value(value, tokens: dict):
+    """Restore placeholders in an already-parsed message (``message_format="object"``).
+
+    Dicts and lists are updated in place and returned; a string that is
+    exactly one placeholder becomes the original value whatever its type.
+    """
+    def restore(text):
+        if text in tokens and _PAYLOAD_PLACEHOLDER.fullmatch(text):
+            return tokens[text]
+        return _PAYLOAD_PLACEHOLDER.sub(lambda m: _string_token(tokens, m.group(0)), text)
+
+    def recurse(current):
+        positions = current.keys() if isinstance(current, dict) else range(len(current))
+        for key in list(positions):
+            item = current[key]
+            if isinstance(item, str):
                 # Replace all placeholders in the string
-                current[key] = pattern.sub(lambda m: tokens.get(m.group(0), m.group(0)), value)
-            elif isinstance(current[key], dict):
-                recurse(current[key])
+                current[key] = restore(item)
+            elif isinstance(item, (dict, list)):
+                recurse(item)
+
+    with stage("substitute"):
+        if isinstance(value, str):
+            return restore(value)
+        if isinstance(value, (dict, list)):
+            recurse(value)
+    return value
+
+
+def _string_token(tokens: dict, placeholder: str) -> str:
+    """Replacement for a placeholder inside a longer string; non-strings stay as placeholders."""
+    value = tokens.get(placeholder, placeholder)
+    return value if isinstance(value, str) else placeholder
+
+
+def deanonymize_payload(payload: dict, config: dict) -> dict:
+    """Replace tokens with original values in a nested payload via provided mapping.
+
+    Placeholders only occur inside JSON string literals, so when that is safe
+    they are replaced in a single pass over the raw message text with
+    JSON-escaped values, skipping the parse and re-serialization. The result
+    is semantically equal to the tree walk, which is still used for messages
+    with placeholders in keys or non-string token values. Both handle
+    placeholders inside lists. The raw pass does not validate the JSON.
+    """
+    message = payload.get("message", "")
+    tokens = payload.get("tokens", {})
+    if not message or not tokens:
+        return {"message": message}  # Early return if no work needed
     
-    recurse(result)
-    restored_message = json.dumps(result)
-    return {"message": restored_message}
+    with stage("substitute"):
+        if _can_substitute_raw(message, tokens):
+            return {"message": _substitute_raw(message, tokens)}
+        return _deanonymize_tree(message, tokens)
+
+
+def _substitute(pattern: re.Pattern, text: str, mapping: dict) -> str:
+    """Replace every match of ``pattern`` found in ``mapping`` in one scan.
+
+    ``pattern`` must have a single capturing group around the whole match, so
+    ``split`` alternates literal text and candidates. The candidates are looked
+    up in bulk instead of through a per-match Python callback.
+    """
+    parts = pattern.split(text)
+    if len(parts) > 1:
+        candidates = parts[1::2]
+        parts[1::2] = [mapping.get(candidate, candidate) for candidate in candidates]
+    return "".join(parts)
+
+
+# Matchers for token maps whose keys are not all simple delimited placeholders
+_MATCHER_CACHE = OrderedDict()
+_MATCHER_CACHE_SIZE = 32
+
+
+@lru_cache(maxsize=64)
+def _delimited_patterns(open_char: str, close_char: str) -> tuple:
+    """Patterns for placeholders like ``[name1]``: one delimiter pair, no nesting."""
+    inner = "[^" + re.escape(open_char + close_char) + "]*"
+    token = re.escape(open_char) + inner + re.escape(close_char)
+    return re.compile("(" + token + ")"), re.compile("(?:" + token + ")*")
+
+
+def _trie_regex(keys) -> str:
+    """Build a regex alternation from a character trie of ``keys``.
+
+    Shared prefixes are matched once, so large maps compile to a compact
+    pattern, and longer keys are preferred over their prefixes.
+    """
+    trie = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = True  # End-of-key marker
+
+    def emit(node: dict) -> str:
+        terminal = "" in node
+        branches = []
+        for char, child in sorted(node.items()):
+            if not char:
+                continue
+            # Follow single-child chains iteratively; recursion only at branch points
+            run = [char]
+            while len(child) == 1 and "" not in child:
+                (char, child), = child.items()
+                run.append(char)
+            branches.append(re.escape("".join(run)) + emit(child))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return "(?:" + body + ")?"
+        return body
+
+    return emit(trie)
+
+
+def _token_matcher(tokens: dict) -> re.Pattern:
+    """Return a compiled, cached matcher for the keys of ``tokens``."""
+    keys = [key for key in tokens if key]
+    if keys and len(keys[0]) >= 2 and keys[0][0] != keys[0][-1]:
+        open_char, close_char = keys[0][0], keys[0][-1]
+        matcher, all_keys = _delimited_patterns(open_char, close_char)
+        joined = "".join(keys)
+        # One delimited run per key: a generic pattern plus a dict lookup is exact
+        if joined.count(open_char) == len(keys) and all_keys.fullmatch(joined):
+            return matcher
+
+    cache_key = frozenset(keys)
+    matcher = _MATCHER_CACHE.get(cache_key)
+    if matcher is None:
+        matcher = re.compile("(" + _trie_regex(keys) + ")")
+        _MATCHER_CACHE[cache_key] = matcher
+        while len(_MATCHER_CACHE) > _MATCHER_CACHE_SIZE:
+            _MATCHER_CACHE.popitem(last=False)
+    else:
+        _MATCHER_CACHE.move_to_end(cache_key)
+    return matcher
 
 
 def deanonymize_text(message: str, tokens: dict) -> str:
     """Replace placeholders in message with their mapped values.
 
+    Placeholders are whatever keys ``tokens`` contains, so new placeholder
+    types need no changes here. Text is scanned once; at any position the
+    longest matching placeholder wins, and replaced values are not rescanned.
+
     Parameters
     ----------
     message: str
@@ -47,13 +210,8 @@ def deanonymize_text(message: str, tokens: dict) -> str:
     str
         Message with placeholders replaced by original values.
     """
-    if not tokens:
+    if not tokens or not message:
         return message
 
-    pattern = re.compile(r"\[(name|org|loc|date)\d+\]")  # Matches all placeholder types
-
-    def repl(match: re.Match) -> str:
-        placeholder = match.group(0)
-        return tokens.get(placeholder, placeholder)
-
-    return pattern.sub(repl, message)
+    with stage("substitute"):
+        return _substitute(_token_matcher(tokens), message, tokens)
@@ -0,0 +1,216 @@
+"""Dictionary (gazetteer) entity detector backed by an Aho-Corasick automaton.
+
+Term lists are JSON objects mapping an entity type to its terms::
+
+    {"PERSON": ["Jane Okafor", "Raj Patel"], "ORG": ["Sunnybrook Hospital"]}
+
+An optional ``"ignore_case": true`` entry matches terms case-insensitively.
+All terms are found in a single linear pass over the text, however many
+there are. The ``pyahocorasick`` package is used when installed; otherwise a
+pure-Python automaton with the same interface is built.
+"""
+import json
+import os
+from bisect import bisect_right
+from collections import deque
+from typing import Iterable, Iterator, Mapping, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # Optional speed-up
+    ahocorasick = None
+
+GAZETTEER_LABELS = ("PERSON", "ORG", "GPE", "DATE")
+
+
+class _Automaton:
+    """Pure-Python Aho-Corasick automaton (subset of ``ahocorasick.Automaton``).
+
+    All transitions live in one dict keyed by ``node << 21 | ord(char)``
+    rather than a dict per node, which keeps a 10k-term automaton several
+    times smaller.
+    """
+
+    def __init__(self):
+        self._next = {}
+        self._fail = [0]
+        self._out = [()]
+
+    def add_word(self, word: str, value) -> None:
+        node = 0
+        for char in word:
+            key = node << 21 | ord(char)
+            nxt = self._next.get(key)
+            if nxt is None:
+                nxt = len(self._fail)
+                self._fail.append(0)
+                self._out.append(())
+                self._next[key] = nxt
+            node = nxt
+        self._out[node] = (value,)
+
+    def make_automaton(self) -> None:
+        """Compute failure links breadth-first and fold suffix outputs in."""
+        transitions, fail, out = self._next, self._fail, self._out
+        children = {}
+        for key, child in transitions.items():
+            children.setdefault(key >> 21, []).append((key & 0x1FFFFF, child))
+        queue = deque(child for _, child in children.get(0, ()))
+        while queue:
+            node = queue.popleft()
+            for code, child in children.get(node, ()):
+                queue.append(child)
+                state = fail[node]
+                while state and (state << 21 | code) not in transitions:
+                    state = fail[state]
+                fail[child] = transitions.get(state << 21 | code, 0)
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+
+    def iter(self, text: str) -> Iterator[Tuple[int, object]]:
+        """Yield ``(end_index, value)`` for every term occurrence, inclusive end."""
+        transitions, fail, out = self._next, self._fail, self._out
+        node = 0
+        for index, char in enumerate(text):
+            code = ord(char)
+            nxt = transitions.get(node << 21 | code)
+            while nxt is None and node:
+                node = fail[node]
+                nxt = transitions.get(node << 21 | code)
+            node = nxt or 0
+            if out[node]:
+                for value in out[node]:
+                    yield index, value
+
+
+def _fold(text: str) -> str:
+    """Lowercase ``text`` without changing its length, so offsets still line up."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class Gazetteer:
+    """Known terms, compiled once, matched on whole-word boundaries.
+
+    Overlapping matches resolve leftmost-longest, so ``"Sunnybrook Hospital"``
+    wins over a separate ``"Sunnybrook"`` entry.
+    """
+
+    def __init__(self, terms: Mapping[str, Iterable[str]], ignore_case: bool = False):
+        self.ignore_case = ignore_case
+        self.engine = "pyahocorasick" if ahocorasick is not None else "python"
+        self._automaton = ahocorasick.Automaton() if ahocorasick is not None else _Automaton()
+        self.size = 0
+        for label, label_terms in terms.items():
+            if label not in GAZETTEER_LABELS:
+                raise ValueError(f"Unsupported gazetteer label: {label}")
+            for term in label_terms:
+                term = term.strip()
+                if not term:
+                    continue
+                key = _fold(term) if ignore_case else term
+                self._automaton.add_word(key, (len(key), label))
+                self.size += 1
+        if self.size:
+            self._automaton.make_automaton()
+
+    def find(self, text: str) -> list:
+        """Return non-overlapping ``(start, end, text, label)`` spans in ``text``."""
+        if not self.size or not text:
+            return []
+        haystack = _fold(text) if self.ignore_case else text
+        last = len(text) - 1
+        matches = []
+        for end_index, (length, label) in self._automaton.iter(haystack):
+            start = end_index - length + 1
+            if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                continue
+            if end_index < last and _is_word_char(text[end_index + 1]) and _is_word_char(text[end_index]):
+                continue
+            matches.append((start, end_index + 1, label))
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        spans = []
+        taken_until = 0
+        for start, end, label in matches:
+            if start >= taken_until:
+                spans.append((start, end, text[start:end], label))
+                taken_until = end
+        return spans
+
+
+def merge_spans(preferred: list, others: list) -> list:
+    """Combine two span lists, dropping any of ``others`` that overlaps ``preferred``.
+
+    ``preferred`` must be sorted and non-overlapping, as ``Gazetteer.find``
+    returns it.
+    """
+    if not preferred:
+        return others
+    starts = [span[0] for span in preferred]
+    ends = [span[1] for span in preferred]
+    merged = list(preferred)
+    for span in others:
+        index = bisect_right(ends, span[0])
+        if index < len(starts) and starts[index] < span[1]:
+            continue
+        merged.append(span)
+    merged.sort(key=lambda span: span[0])
+    return merged
+
+
+def _read_source(source: str) -> dict:
+    if source.startswith("s3://"):
+        from .aws import get_client
+
+        bucket, _, key = source[len("s3://"):].partition("/")
+        body = get_client("s3").get_object(Bucket=bucket, Key=key)["Body"].read()
+        return json.loads(body)
+    with open(source, encoding="utf-8") as source_file:
+        return json.load(source_file)
+
+
+def load_gazetteer(source: str) -> Gazetteer:
+    """Build a gazetteer from a local JSON file or an ``s3://bucket/key`` object."""
+    data = _read_source(source)
+    if not isinstance(data, dict):
+        raise ValueError("Gazetteer must be a JSON object of entity type to terms")
+    ignore_case = bool(data.pop("ignore_case", False))
+    return Gazetteer(data, ignore_case=ignore_case)
+
+
+_GAZETTEER = None
+_CONFIGURED = False
+
+
+def configure_gazetteer(source: Optional[str] = None) -> Optional[Gazetteer]:
+    """Load the shared gazetteer (or disable it with an empty source).
+
+    Defaults to the ANYMOUSE_GAZETTEER environment variable, a file path or
+    ``s3://bucket/key``.
+    """
+    global _GAZETTEER, _CONFIGURED
+    if source is None:
+        source = os.environ.get("ANYMOUSE_GAZETTEER", "")
+    _GAZETTEER = load_gazetteer(source) if source else None
+    _CONFIGURED = True
+    return _GAZETTEER
+
+
+def set_gazetteer(gazetteer: Optional[Gazetteer]) -> None:
+    """Install an already built gazetteer as the shared one (None disables it)."""
+    global _GAZETTEER, _CONFIGURED
+    _GAZETTEER = gazetteer
+    _CONFIGURED = True
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """Return the shared gazetteer, loading it on first use; None when not configured."""
+    if not _CONFIGURED:
+        configure_gazetteer()
+    return _GAZETTEER
@@ -2,78 +2,312 @@
 AWS Lambda entrypoint for Anymouse anonymization service.
 Handles REST API endpoints for anonymize, deanonymize, and config testing.
 """
-import json
+import base64
+import binascii
+import hmac
+import io
 import logging
-import boto3
-import botocore.exceptions
-from .anonymize import anonymize_payload, anonymize_text
-from .deanonymize import deanonymize_payload, deanonymize_text
-from .config import validate_config, load_config_from_s3
+import os
+import threading
+import time
+from .aws import get_client
+from .anonymize import DEFAULT_BATCH_SIZE, MESSAGE_FORMATS, anonymize_payload, anonymize_text, anonymize_texts, warmup
+from .deanonymize import deanonymize_payload, deanonymize_text, deanonymize_value
+from .config import compile_config, load_config_from_s3, prefetch_configs
+from .gazetteer import get_gazetteer
+from .metrics import count_entities, finish_request, set_request_bytes, stage, start_request
+from .serialization import (
+    JSON,
+    UnsupportedMediaType,
+    accepts_gzip,
+    binary_response_ok,
+    compress_body,
+    decode_body,
+    decode_content,
+    dumps,
+    encode_body,
+    is_msgpack,
+    negotiate,
+)
+from .startup import finish as finish_startup_profile, phase
+from .stream import anonymize_stream, scan_members
 
 # Configure logging for CloudWatch
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_api_key_from_ssm():
-    """Get API key from SSM Parameter Store."""
+def _env_flag(name):
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+# Runs once per container, during the Lambda init phase
+with phase("prefetch_configs"):
+    prefetch_configs()
+with phase("gazetteer"):
+    get_gazetteer()
+if _env_flag("ANYMOUSE_WARMUP_ON_INIT"):
+    with phase("warmup"):
+        _INIT_WARMUP = warmup()
+    logger.info("action=warmup phase=init engine=%s init_ms=%.1f", _INIT_WARMUP["engine"], _INIT_WARMUP["init_ms"])
+
+API_KEY_PARAMETER = "/anymouse/api-key"
+# How long a fetched key is trusted before SSM is asked again
+API_KEY_TTL_SECONDS = float(os.environ.get("ANYMOUSE_API_KEY_TTL_SECONDS", "300"))
+# Minimum gap between refreshes triggered by failed auth or SSM errors
+API_KEY_RETRY_SECONDS = float(os.environ.get("ANYMOUSE_API_KEY_RETRY_SECONDS", "30"))
+_FALLBACK_API_KEY = "test-api-key-123"
+# /anonymize bodies at least this long are streamed instead of parsed whole; 0 disables
+STREAM_MIN_BYTES = int(os.environ.get("ANYMOUSE_STREAM_MIN_BYTES", str(1024 * 1024)))
+# Responses at least this long are gzipped for clients that accept it (gzip in
+# Accept-Encoding and a binary media type first in Accept); 0 disables
+GZIP_MIN_BYTES = int(os.environ.get("ANYMOUSE_GZIP_MIN_BYTES", "1024"))
+# Largest size a gzip request body may inflate to
+MAX_INFLATED_BYTES = int(os.environ.get("ANYMOUSE_MAX_INFLATED_BYTES", str(64 * 1024 * 1024)))
+
+# Metric dimension values; anything else is reported as "other"
+ROUTES = ("/anonymize", "/anonymize/batch", "/deanonymize", "/config/test")
+
+# Cached key shared across warm invocations
+_API_KEY_CACHE = {"value": None, "expires_at": 0.0, "fetched_at": 0.0}
+_API_KEY_LOCK = threading.Lock()
+
+def _fetch_api_key():
+    """Fetch the API key from SSM, returning None if SSM is unavailable."""
     try:
-        ssm = boto3.client('ssm')
-        response = ssm.get_parameter(Name='/anymouse/api-key', WithDecryption=True)
+        ssm = get_client('ssm')
+        response = ssm.get_parameter(Name=API_KEY_PARAMETER, WithDecryption=True)
         return response['Parameter']['Value']
     except Exception:
-        # Fallback to hardcoded key for testing
-        return "test-api-key-123"
+        return None
+
+def get_api_key_from_ssm():
+    """Get API key from SSM Parameter Store."""
+    value = _fetch_api_key()
+    # Fallback to hardcoded key for testing
+    return value if value is not None else _FALLBACK_API_KEY
+
+def _refresh_api_key(now):
+    """Re-read the key from SSM and update the cache."""
+    value = _fetch_api_key()
+    if value is not None:
+        _API_KEY_CACHE.update(value=value, expires_at=now + API_KEY_TTL_SECONDS, fetched_at=now)
+    else:
+        # Don't pin the fallback for a full TTL; retry SSM soon
+        _API_KEY_CACHE.update(value=_FALLBACK_API_KEY, expires_at=now + API_KEY_RETRY_SECONDS, fetched_at=now)
+    return _API_KEY_CACHE["value"]
+
+def get_api_key(force_refresh=False):
+    """
+    Return the expected API key, served from a TTL cache.
+
+    A forced refresh is rate limited to one SSM call per API_KEY_RETRY_SECONDS,
+    so a stream of bad keys cannot turn into a stream of SSM requests.
+    """
+    now = time.monotonic()
+    with _API_KEY_LOCK:
+        cached = _API_KEY_CACHE["value"]
+        if cached is None or now >= _API_KEY_CACHE["expires_at"]:
+            return _refresh_api_key(now)
+        if force_refresh and now - _API_KEY_CACHE["fetched_at"] >= API_KEY_RETRY_SECONDS:
+            return _refresh_api_key(now)
+        return cached
+
+def clear_api_key_cache():
+    """Forget the cached API key so the next request reads SSM again."""
+    with _API_KEY_LOCK:
+        _API_KEY_CACHE.update(value=None, expires_at=0.0, fetched_at=0.0)
+
+def _keys_match(provided, expected):
+    """Constant-time comparison of the provided and expected keys."""
+    if not isinstance(provided, str) or not expected:
+        return False
+    return hmac.compare_digest(provided.encode("utf-8"), expected.encode("utf-8"))
 
 def authenticate_request(event):
     """Verify API key authentication."""
-    headers = event.get("headers", {})
+    headers = event.get("headers") or {}
     api_key = headers.get("X-API-Key") or headers.get("x-api-key")
-    expected_key = get_api_key_from_ssm()
     
-    if api_key != expected_key:
-        logger.info("action=auth_check status=401 source_ip=%s", 
-                   event.get("requestContext", {}).get("identity", {}).get("sourceIp", "unknown"))
-        return False
+    if not _keys_match(api_key, get_api_key()):
+        # The key may have been rotated since it was cached; re-check once
+        if not api_key or not _keys_match(api_key, get_api_key(force_refresh=True)):
+            logger.info("action=auth_check status=401 source_ip=%s", 
+                       event.get("requestContext", {}).get("identity", {}).get("sourceIp", "unknown"))
+            return False
     return True
 
+def is_warmup_event(event):
+    """Recognize scheduled warmup pings (EventBridge schedule or {"warmup": true})."""
+    if not isinstance(event, dict):
+        return False
+    if event.get("warmup") is True:
+        return True
+    return event.get("source") == "aws.events" and event.get("detail-type") == "Scheduled Event"
+
 def get_source_ip(event):
     """Extract source IP from event context."""
     return event.get("requestContext", {}).get("identity", {}).get("sourceIp", "unknown")
 
+def get_header(event, name):
+    """Case-insensitive request header lookup."""
+    headers = event.get("headers") or {}
+    value = headers.get(name)
+    if value is None:
+        lowered = name.lower()
+        value = next((v for k, v in headers.items() if k.lower() == lowered), None)
+    return value
+
+def encode_response(response, content_type=JSON, gzip_ok=False):
+    """Serialize a handler response's body in the negotiated content type.
+
+    String bodies are already-encoded JSON and are passed through. With
+    ``gzip_ok``, bodies of GZIP_MIN_BYTES or more are gzipped.
+    """
+    body = response.get("body")
+    if isinstance(body, str):
+        encoded, base64_encoded, content_type = body, False, JSON
+    else:
+        encoded, base64_encoded, content_type = encode_body(body, content_type)
+    headers = {"Content-Type": content_type}
+    if gzip_ok and 0 < GZIP_MIN_BYTES <= len(encoded):
+        encoded, base64_encoded = compress_body(encoded, base64_encoded), True
+        headers.update({"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    response = {**response, "body": encoded, "headers": headers}
+    if base64_encoded:
+        response["isBase64Encoded"] = True
+    return response
+
 def lambda_handler(event, context):
     """
     AWS Lambda handler for REST API endpoints.
     Expects API Gateway event with httpMethod and path.
     """
+    recording = start_request()
+    response = None
+    try:
+        # Warmup pings never reach auth or routing
+        if is_warmup_event(event):
+            result = warmup()
+            logger.info("action=warmup status=200 cold=%s duration_ms=%.1f", result["cold"], result["duration_ms"])
+            response = encode_response({
+                "statusCode": 200,
+                "body": {"status": "warm", **result}
+            })
+            return response
+        response = route_request(event)
+        with stage("serialize"):
+            response = encode_response(
+                response,
+                negotiate(get_header(event, "Accept")),
+                # Behind API Gateway a gzip body only arrives as bytes for binary Accept types
+                gzip_ok=accepts_gzip(get_header(event, "Accept-Encoding"))
+                and binary_response_ok(get_header(event, "Accept")),
+            )
+        return response
+    finally:
+        emit_metrics(recording, event, context, response)
+        log_startup_profile()
+
+def log_startup_profile():
+    """Log the cold-start import breakdown once, after the container's first request."""
+    report = finish_startup_profile()
+    if report is not None:
+        logger.info("action=startup_profile report=%s", dumps(report))
+
+def emit_metrics(recording, event, context, response):
+    """Log the request's stage timings as one CloudWatch EMF line."""
+    if recording is None:
+        return
+    if is_warmup_event(event):
+        path = "warmup"
+    else:
+        path = event.get("path") if event.get("path") in ROUTES else "other"
+    properties = {"StatusCode": response["statusCode"] if response else 500}
+    request_id = getattr(context, "aws_request_id", None)
+    if request_id:
+        properties["RequestId"] = request_id
+    body = response.get("body") if response else None
+    finish_request(recording, {"Path": path}, len(body) if isinstance(body, str) else None, properties)
+
+def route_request(event):
+    """Authenticate, parse and dispatch an API Gateway event; the body is left unencoded."""
     # Authentication check
-    if not authenticate_request(event):
+    with stage("auth"):
+        authorized = authenticate_request(event)
+    if not authorized:
         return {
             "statusCode": 401,
-            "body": json.dumps({"error": "Missing or invalid API key"})
+            "body": {"error": "Missing or invalid API key"}
         }
     
     # Extract HTTP method and path
     http_method = event.get("httpMethod", "POST")
     path = event.get("path", "")
     source_ip = get_source_ip(event)
-    
+    content_type = get_header(event, "Content-Type")
+
+    raw_body = event.get("body")
+    if raw_body and event.get("isBase64Encoded"):
+        try:
+            with stage("parse"):
+                raw_body = base64.b64decode(raw_body, validate=True)
+        except binascii.Error:
+            logger.info("action=parse_body status=400 source_ip=%s", source_ip)
+            return {
+                "statusCode": 400,
+                "body": {"error": "Invalid base64 request body"}
+            }
+    if raw_body:
+        try:
+            with stage("parse"):
+                raw_body = decode_content(raw_body, get_header(event, "Content-Encoding"), MAX_INFLATED_BYTES)
+        except UnsupportedMediaType as e:
+            logger.info("action=parse_body status=415 source_ip=%s", source_ip)
+            return {
+                "statusCode": 415,
+                "body": {"error": str(e)}
+            }
+        except ValueError as e:
+            logger.info("action=parse_body status=400 source_ip=%s", source_ip)
+            return {
+                "statusCode": 400,
+                "body": {"error": str(e)}
+            }
+
+        set_request_bytes(len(raw_body))
+
+    # Large structured payloads are rewritten straight from the request text
+    if (http_method == "POST" and path == "/anonymize" and raw_body and not is_msgpack(content_type)
+            and 0 < STREAM_MIN_BYTES <= len(raw_body)):
+        try:
+            response = handle_anonymize_stream(raw_body, source_ip)
+        except Exception as e:
+            response = internal_error(source_ip, e)
+        if response is not None:
+            return response
+
     # Parse request body
     try:
-        if event.get("body"):
-            body = json.loads(event.get("body"))
-        else:
-            body = {}
-    except json.JSONDecodeError:
+        with stage("parse"):
+            body = decode_body(raw_body, content_type) if raw_body else {}
+    except UnsupportedMediaType as e:
+        logger.info("action=parse_body status=415 source_ip=%s", source_ip)
+        return {
+            "statusCode": 415,
+            "body": {"error": str(e)}
+        }
+    except ValueError:
         logger.info("action=parse_body status=400 source_ip=%s", source_ip)
         return {
             "statusCode": 400,
-            "body": json.dumps({"error": "Invalid JSON in request body"})
+            "body": {"error": "Invalid MessagePack in request body" if is_msgpack(content_type) else "Invalid JSON in request body"}
         }
     
     # Route to appropriate handler
     try:
         if http_method == "POST" and path == "/anonymize":
             return handle_anonymize(body, source_ip)
+        elif http_method == "POST" and path == "/anonymize/batch":
+            return handle_anonymize_batch(body, source_ip)
         elif http_method == "POST" and path == "/deanonymize":
             return handle_deanonymize(body, source_ip)
         elif http_method == "POST" and path == "/config/test":
@@ -82,22 +316,27 @@ def lambda_handler(event, context):
             logger.info("action=invalid_endpoint status=404 source_ip=%s path=%s", source_ip, path)
             return {
                 "statusCode": 404,
-                "body": json.dumps({"error": "Endpoint not found"})
+                "body": {"error": "Endpoint not found"}
             }
     except Exception as e:
-        logger.error("action=internal_error status=500 source_ip=%s error=%s", source_ip, str(e))
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "Internal server error"})
-        }
+        return internal_error(source_ip, e)
+
+def internal_error(source_ip, error):
+    """Log an unexpected error and build the generic 500 response."""
+    logger.error("action=internal_error status=500 source_ip=%s error=%s", source_ip, str(error))
+    return {
+        "statusCode": 500,
+        "body": {"error": "Internal server error"}
+    }
 
 def load_config(body):
-    """Load configuration from request body or S3."""
+    """Load configuration from request body or S3 as a (cached) ConfigPlan."""
     config_source = body.get("config_source", {})
-    if "s3" in config_source:
-        return load_config_from_s3(config_source["s3"]["bucket"], config_source["s3"]["key"])
-    else:
-        return validate_config(body.get("config", {}))
+    with stage("config"):
+        if "s3" in config_source:
+            return compile_config(load_config_from_s3(config_source["s3"]["bucket"], config_source["s3"]["key"]))
+        else:
+            return compile_config(body.get("config", {}))
 
 def handle_anonymize(body, source_ip):
     """Handle POST /anonymize endpoint."""
@@ -106,28 +345,154 @@ def handle_anonymize(body, source_ip):
         if payload is None:
             return {
                 "statusCode": 400,
-                "body": json.dumps({"error": "Missing 'payload' field"})
+                "body": {"error": "Missing 'payload' field"}
             }
         
         # Check if payload is a string (free-form text) or dict (structured data)
         if isinstance(payload, str):
-            # Free-form text anonymization
-            result = anonymize_text(payload)
+            # Free-form text anonymization, optionally with an engine choice and latency budget
+            budget = body.get("latency_budget_ms")
+            if budget is not None and (isinstance(budget, bool) or not isinstance(budget, (int, float))):
+                raise ValueError("'latency_budget_ms' must be a number")
+            result = anonymize_text(payload, engine=body.get("engine"), latency_budget_ms=budget)
         else:
             # Structured payload anonymization
             config = load_config(body)
-            result = anonymize_payload(payload, config)
+            result = anonymize_payload(payload, config, message_format=body.get("message_format", "string"))
         
         logger.info("action=anonymize status=200 source_ip=%s", source_ip)
         return {
             "statusCode": 200,
-            "body": json.dumps(result)
+            "body": result
+        }
+    except ValueError as e:
+        logger.info("action=anonymize status=400 source_ip=%s", source_ip)
+        return {
+            "statusCode": 400,
+            "body": {"error": f"Invalid request: {str(e)}"}
+        }
+
+def handle_anonymize_stream(raw_body, source_ip):
+    """
+    Handle POST /anonymize for a large structured payload without parsing it whole.
+
+    The body is read once for everything except 'payload', then 'payload' is
+    rewritten token by token. The response carries the same message, tokens
+    and fields as handle_anonymize's. Returns None when the request needs the regular path
+    (text payloads, missing or repeated 'payload', negative list indices).
+    """
+    try:
+        with stage("parse"):
+            body, skipped = scan_members(raw_body, skip=("payload",))
+    except ValueError:
+        logger.info("action=parse_body status=400 source_ip=%s", source_ip)
+        return {
+            "statusCode": 400,
+            "body": {"error": "Invalid JSON in request body"}
         }
+    if body is None or skipped.get("payload") != "object":
+        return None
+    try:
+        message_format = body.get("message_format", "string")
+        if message_format not in MESSAGE_FORMATS:
+            raise ValueError(f"Unknown message_format '{message_format}', expected one of {', '.join(MESSAGE_FORMATS)}")
+        config = load_config(body)
+        if not config.streamable:
+            return None
     except ValueError as e:
         logger.info("action=anonymize status=400 source_ip=%s", source_ip)
         return {
             "statusCode": 400,
-            "body": json.dumps({"error": f"Invalid request: {str(e)}"})
+            "body": {"error": f"Invalid request: {str(e)}"}
+        }
+    sink = io.StringIO()
+    try:
+        # Parsing and rewriting are one pass here, so both count as substitution
+        with stage("substitute"):
+            result = anonymize_stream(raw_body, sink, config, member="payload")
+    except ValueError:
+        logger.info("action=parse_body status=400 source_ip=%s", source_ip)
+        return {
+            "statusCode": 400,
+            "body": {"error": "Invalid JSON in request body"}
+        }
+    if result["tokens"]:
+        count_entities({"FIELD": len(result["tokens"])})
+    logger.info("action=anonymize status=200 source_ip=%s streamed=true", source_ip)
+    if message_format == "object":
+        # The streamed JSON is the message itself, spliced in without re-parsing
+        with stage("serialize"):
+            body = ('{"message": ' + sink.getvalue() + ', "tokens": ' + dumps(result["tokens"])
+                    + ', "fields": ' + dumps(result["fields"]) + "}")
+        return {
+            "statusCode": 200,
+            "body": body
+        }
+    return {
+        "statusCode": 200,
+        "body": {"message": sink.getvalue(), **result}
+    }
+
+def handle_anonymize_batch(body, source_ip):
+    """Handle POST /anonymize/batch endpoint.
+
+    Free-text items are run through the NER model together; structured items
+    share the request's config. Each item carries its own status code, but an
+    invalid config fails the whole request, before any item is processed.
+    """
+    try:
+        payloads = body.get("payloads")
+        if not isinstance(payloads, list):
+            return {
+                "statusCode": 400,
+                "body": {"error": "Missing or invalid 'payloads' field"}
+            }
+        batch_size = body.get("batch_size", DEFAULT_BATCH_SIZE)
+        if not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1:
+            return {
+                "statusCode": 400,
+                "body": {"error": "Invalid 'batch_size': must be a positive integer"}
+            }
+
+        message_format = body.get("message_format", "string")
+        if message_format not in MESSAGE_FORMATS:
+            return {
+                "statusCode": 400,
+                "body": {"error": f"Invalid 'message_format': must be one of {', '.join(MESSAGE_FORMATS)}"}
+            }
+
+        # Validated up front, so a bad config never discards finished NER work
+        config = None
+        if "config" in body or "config_source" in body or any(isinstance(item, dict) for item in payloads):
+            config = load_config(body)
+
+        results = [None] * len(payloads)
+        text_indexes = [i for i, item in enumerate(payloads) if isinstance(item, str)]
+        texts = (payloads[i] for i in text_indexes)
+        for index, result in zip(text_indexes, anonymize_texts(texts, batch_size=batch_size)):
+            results[index] = {"status": 200, **result}
+
+        for index, item in enumerate(payloads):
+            if results[index] is not None:
+                continue
+            if not isinstance(item, dict):
+                results[index] = {"status": 400, "error": "Invalid item: payload must be a string or object"}
+                continue
+            try:
+                results[index] = {"status": 200, **anonymize_payload(item, config, message_format=message_format)}
+            except Exception as e:
+                results[index] = {"status": 400, "error": f"Invalid item: {str(e)}"}
+
+        logger.info("action=anonymize_batch status=200 source_ip=%s items=%d", source_ip, len(payloads))
+        return {
+            "statusCode": 200,
+            "body": {"results": results}
+        }
+    except ValueError as e:
+        logger.info("action=anonymize_batch status=400 source_ip=%s", source_ip)
+        return {
+            "statusCode": 400,
+            "body": {"error": f"Invalid request: {str(e)}"}
         }
 
 def handle_deanonymize(body, source_ip):
@@ -139,22 +504,25 @@ def handle_deanonymize(body, source_ip):
         if message is None or tokens is None:
             return {
                 "statusCode": 400,
-                "body": json.dumps({"error": "Missing 'message' or 'tokens' field"})
+                "body": {"error": "Missing 'message' or 'tokens' field"}
             }
         
-        # Use text deanonymization for the direct API format
-        result = {"message": deanonymize_text(message, tokens)}
+        # Use text deanonymization for the direct API format; objects come from message_format "object"
+        if isinstance(message, (dict, list)):
+            result = {"message": deanonymize_value(message, tokens)}
+        else:
+            result = {"message": deanonymize_text(message, tokens)}
         
         logger.info("action=deanonymize status=200 source_ip=%s", source_ip)
         return {
             "statusCode": 200,
-            "body": json.dumps(result)
+            "body": result
         }
     except Exception as e:
         logger.info("action=deanonymize status=400 source_ip=%s", source_ip)
         return {
             "statusCode": 400,
-            "body": json.dumps({"error": f"Invalid request: {str(e)}"})
+            "body": {"error": f"Invalid request: {str(e)}"}
         }
 
 def handle_config_test(body, source_ip):
@@ -164,11 +532,11 @@ def handle_config_test(body, source_ip):
         logger.info("action=config_test status=200 source_ip=%s", source_ip)
         return {
             "statusCode": 200,
-            "body": json.dumps({"status": "success", "config": config})
+            "body": {"status": "success", "config": config.to_dict()}
         }
     except ValueError as e:
         logger.info("action=config_test status=400 source_ip=%s", source_ip)
         return {
             "statusCode": 400,
-            "body": json.dumps({"error": f"Invalid config: {str(e)}"})
+            "body": {"error": f"Invalid config: {str(e)}"}
         }
@@ -0,0 +1,173 @@
+"""Per-request stage timings, logged as CloudWatch Embedded Metric Format.
+
+``lambda_handler`` opens a recording per request; the handler and the
+anonymize/deanonymize functions time their stages into it with ``stage`` and
+report what they replaced with ``count_entities``. ``finish_request`` then
+prints one EMF JSON line, which CloudWatch Logs turns into metrics without
+any API calls.
+
+Stage times are exclusive: time spent in a nested stage (loading the model
+while detecting entities, say) is only counted once, in the inner stage, so
+the stages of a request add up to at most its total. Outside a request (the
+library or the CLI) nothing is recorded, and ``ANYMOUSE_METRICS=0`` turns
+recording off altogether.
+"""
+import contextvars
+import os
+import sys
+import time
+from typing import Optional
+
+from .serialization import dumps
+
+NAMESPACE = os.environ.get("ANYMOUSE_METRICS_NAMESPACE", "Anymouse")
+# Recorded stages, in request order
+STAGES = ("auth", "parse", "config", "model_load", "ner", "substitute", "serialize")
+
+_CURRENT = contextvars.ContextVar("anymouse_metrics", default=None)
+_COLD = True  # Until the first request of this container has been reported
+
+
+def metrics_enabled() -> bool:
+    return os.environ.get("ANYMOUSE_METRICS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+class RequestMetrics:
+    """Stage times (nanoseconds) and entity counts of one request."""
+
+    __slots__ = ("start_ns", "stages", "entities", "request_bytes", "_open")
+
+    def __init__(self):
+        self.start_ns = time.perf_counter_ns()
+        self.stages = {}
+        self.entities = {}
+        self.request_bytes = None
+        self._open = []  # [name, start, nested ns] of the stages being timed
+
+
+class _Stage:
+    __slots__ = ("metrics", "name")
+
+    def __init__(self, metrics: RequestMetrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.metrics._open.append([self.name, time.perf_counter_ns(), 0])
+
+    def __exit__(self, *exc_info):
+        open_stages = self.metrics._open
+        name, start, nested = open_stages.pop()
+        elapsed = time.perf_counter_ns() - start
+        stages = self.metrics.stages
+        stages[name] = stages.get(name, 0) + elapsed - nested
+        if open_stages:
+            open_stages[-1][2] += elapsed
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    """Context manager timing ``name`` in the current request, if one is recorded."""
+    metrics = _CURRENT.get()
+    return _NO_STAGE if metrics is None else _Stage(metrics, name)
+
+
+def count_entities(counts: dict) -> None:
+    """Add ``{entity type: replaced entities}`` to the current request."""
+    metrics = _CURRENT.get()
+    if metrics is None:
+        return
+    entities = metrics.entities
+    for label, n in counts.items():
+        entities[label] = entities.get(label, 0) + n
+
+
+def set_request_bytes(size: int) -> None:
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.request_bytes = size
+
+
+def start_request() -> Optional[contextvars.Token]:
+    """Begin recording a request; returns None when metrics are turned off."""
+    if not metrics_enabled():
+        return None
+    return _CURRENT.set(RequestMetrics())
+
+
+# EMF metric name and definition per stage, e.g. "model_load" -> "ModelLoadMs"
+_STAGE_METRICS = {
+    name: "".join(part.capitalize() for part in name.split("_")) + "Ms" for name in STAGES
+}
+_DEFINITIONS = {
+    **{metric: {"Name": metric, "Unit": "Milliseconds"} for metric in ["TotalMs", *_STAGE_METRICS.values()]},
+    "RequestBytes": {"Name": "RequestBytes", "Unit": "Bytes"},
+    "ResponseBytes": {"Name": "ResponseBytes", "Unit": "Bytes"},
+    "Entities": {"Name": "Entities", "Unit": "Count"},
+    "ColdStart": {"Name": "ColdStart", "Unit": "Count"},
+}
+
+
+def build_record(metrics: RequestMetrics, total_ns: int, cold: bool, dimensions: dict,
+                 response_bytes: Optional[int] = None, properties: Optional[dict] = None) -> dict:
+    """The EMF document for one request."""
+    values = {"TotalMs": total_ns / 1e6}
+    stages = metrics.stages
+    for name, metric in _STAGE_METRICS.items():
+        if name in stages:
+            values[metric] = stages[name] / 1e6
+    if metrics.request_bytes is not None:
+        values["RequestBytes"] = metrics.request_bytes
+    if response_bytes is not None:
+        values["ResponseBytes"] = response_bytes
+    values["Entities"] = sum(metrics.entities.values())
+    values["ColdStart"] = int(cold)
+    return {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [list(dimensions)],
+                "Metrics": [_DEFINITIONS[metric] for metric in values],
+            }],
+        },
+        **dimensions,
+        **(properties or {}),
+        "Cold": cold,
+        "EntityTypes": metrics.entities,
+        **values,
+    }
+
+
+def finish_request(token: Optional[contextvars.Token], dimensions: dict,
+                   response_bytes: Optional[int] = None, properties: Optional[dict] = None) -> Optional[dict]:
+    """Stop recording and print the request's EMF line to stdout.
+
+    ``dimensions`` become the metric dimensions (keep them low-cardinality);
+    ``properties`` are logged alongside for Logs Insights queries only.
+    Returns the record, or None if the request was not recorded.
+    """
+    global _COLD
+    if token is None:
+        return None
+    metrics = _CURRENT.get()
+    _CURRENT.reset(token)
+    total_ns = time.perf_counter_ns() - metrics.start_ns
+    record = build_record(metrics, total_ns, _COLD, dimensions, response_bytes, properties)
+    _COLD = False
+    # Straight to stdout: the Lambda logging prefix would stop CloudWatch reading it as EMF
+    sys.stdout.write(dumps(record) + "\n")
+    sys.stdout.flush()
+    return record
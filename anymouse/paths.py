@@ -0,0 +1,182 @@
+"""Compiled field-path plans for walking structured payloads.
+
+Paths are dotted keys with optional list steps::
+
+    patient.name          key "name" inside key "patient"
+    patients[*].name      "name" in every element of the "patients" list
+    matrix[0][-1]         last element of the first element of "matrix"
+    entry.*.resource      "resource" under any key or list element of "entry"
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+_LIST_STEPS = re.compile(r"((?:\[(?:\*|-?\d+)\])+)$")
+_LIST_STEP = re.compile(r"\[(\*|-?\d+)\]")
+
+
+class PathNode:
+    """One position in the field-path trie.
+
+    ``lookup`` maps a payload key to the node reached by consuming it. Keys
+    that themselves contain dots (``{"a.b": ...}``) are registered too, so a
+    single dict lookup reproduces the ``f"{path}.{key}"`` matching the
+    walker used to do with strings. ``any_key`` is the node for keys not in
+    ``lookup`` (from ``*``); ``indices`` and ``items`` do the same for list
+    positions and for every other list element. Wildcard branches are merged
+    into the concrete ones at compile time, so a walk follows exactly one
+    node per payload position.
+    """
+
+    __slots__ = ("lookup", "terminal", "children", "any_key", "indices", "items")
+
+    def __init__(self):
+        self.lookup = {}
+        self.terminal = False
+        self.children = {}
+        self.any_key: Optional["PathNode"] = None
+        self.indices = {}
+        self.items: Optional["PathNode"] = None
+
+
+class _Draft:
+    """Trie node before wildcard branches are merged in."""
+
+    __slots__ = ("terminal", "keys", "wildcard", "indices", "items")
+
+    def __init__(self):
+        self.terminal = False
+        self.keys = {}
+        self.wildcard = None
+        self.indices = {}
+        self.items = None
+
+
+def _parse(field: str) -> list:
+    """Split a field path into ("key", name), ("any",), ("index", n) and ("items",) steps."""
+    steps = []
+    for segment in field.split("."):
+        match = _LIST_STEPS.search(segment)
+        name = segment[:match.start()] if match else segment
+        if name == "*":
+            steps.append(("any",))
+        elif name or not match:
+            steps.append(("key", name))
+        if match:
+            for step in _LIST_STEP.findall(match.group(1)):
+                steps.append(("items",) if step == "*" else ("index", int(step)))
+    return steps
+
+
+class FieldPlan:
+    """A ``fields`` list compiled into a trie of path steps.
+
+    ``targets`` is the most payload values a walk can replace, used to stop
+    walking early; it is None when wildcards make the number of matches
+    open-ended. Every spelling of a path counts: ``a.b`` may match both
+    ``{"a": {"b": ...}}`` and a literal ``{"a.b": ...}`` key in one payload.
+    """
+
+    __slots__ = ("fields", "root", "targets", "_memo", "_sources", "_indexed", "_pairs")
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = tuple(fields)
+        draft_root = _Draft()
+        wildcards = False
+        for field in dict.fromkeys(self.fields):
+            draft = draft_root
+            for step in _parse(field):
+                if step[0] == "key":
+                    draft = draft.keys.setdefault(step[1], _Draft())
+                elif step[0] == "index":
+                    draft = draft.indices.setdefault(step[1], _Draft())
+                elif step[0] == "items":
+                    draft.items = draft.items or _Draft()
+                    draft = draft.items
+                    wildcards = True
+                else:
+                    draft.wildcard = draft.wildcard or _Draft()
+                    draft = draft.wildcard
+                    wildcards = True
+            draft.terminal = True
+        self._memo = {}  # Draft ids -> node, shared by later merged() calls
+        self._sources = {}  # id(node) -> the drafts it was built from
+        self._indexed = set()
+        self._pairs = {}  # (id(node), id(node)) -> merged node
+        self.root = self._merge([draft_root], self._memo)
+        self._index(self.root, self._indexed)
+        self.targets = None if wildcards else self._count_targets(self.root, {})
+
+    def _merge(self, drafts: list, memo: dict) -> PathNode:
+        """Build the node for a set of draft positions reached by the same payload position."""
+        drafts = list({id(draft): draft for draft in drafts}.values())
+        memo_key = tuple(sorted(id(draft) for draft in drafts))
+        if memo_key in memo:
+            return memo[memo_key]
+        node = memo[memo_key] = PathNode()
+        self._sources[id(node)] = drafts
+        node.terminal = any(draft.terminal for draft in drafts)
+        wildcard = [draft.wildcard for draft in drafts if draft.wildcard is not None]
+        items = [draft.items for draft in drafts if draft.items is not None] + wildcard
+        for key in dict.fromkeys(key for draft in drafts for key in draft.keys):
+            node.children[key] = self._merge([draft.keys[key] for draft in drafts if key in draft.keys] + wildcard, memo)
+        for index in dict.fromkeys(index for draft in drafts for index in draft.indices):
+            node.indices[index] = self._merge([draft.indices[index] for draft in drafts if index in draft.indices] + items, memo)
+        if wildcard:
+            node.any_key = self._merge(wildcard, memo)
+        if items:
+            node.items = self._merge(items, memo)
+        return node
+
+    def merged(self, first: PathNode, second: PathNode) -> PathNode:
+        """The node for a list element reached by two indices at once, ``[0]`` and ``[-1]`` say.
+
+        Which indices coincide depends on the list's length, so these nodes
+        are built on first use and cached on the plan.
+        """
+        pair = (id(first), id(second))
+        node = self._pairs.get(pair)
+        if node is None:
+            node = self._merge(self._sources[id(first)] + self._sources[id(second)], self._memo)
+            self._index(node, self._indexed)
+            self._pairs[pair] = node
+        return node
+
+    def _index(self, node: PathNode, seen: set) -> None:
+        """Fill ``lookup`` with every dotted suffix reachable from ``node``."""
+        if id(node) in seen:
+            return
+        seen.add(id(node))
+        stack = [(node, child_key, child) for child_key, child in node.children.items()]
+        while stack:
+            start, joined, reached = stack.pop()
+            start.lookup.setdefault(joined, reached)
+            for key, child in reached.children.items():
+                stack.append((start, f"{joined}.{key}", child))
+        for child in self._successors(node):
+            self._index(child, seen)
+
+    @staticmethod
+    def _successors(node: PathNode) -> list:
+        successors = list(node.children.values()) + list(node.indices.values())
+        return successors + [child for child in (node.any_key, node.items) if child is not None]
+
+    def _count_targets(self, node: PathNode, memo: dict) -> int:
+        """Payload positions below ``node`` that can be replaced, one per lookup key or index."""
+        if id(node) not in memo:
+            reached = list(node.lookup.values()) + list(node.indices.values())
+            memo[id(node)] = sum(1 if child.terminal else self._count_targets(child, memo) for child in reached)
+        return memo[id(node)]
+
+    def __bool__(self) -> bool:
+        return bool(self.root.lookup) or self.root.any_key is not None
+
+
+@lru_cache(maxsize=256)
+def _compile(fields: Tuple[str, ...]) -> FieldPlan:
+    return FieldPlan(fields)
+
+
+def compile_fields(fields: Iterable[str]) -> FieldPlan:
+    """Return the (cached) compiled plan for a list of field paths."""
+    return _compile(tuple(fields))
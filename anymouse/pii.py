@@ -0,0 +1,78 @@
+"""Compiled scanner for structured PII: emails, phone numbers, dates, addresses and IDs.
+
+All patterns are alternatives of one compiled regex, so the text is scanned
+once. Found spans are masked with spaces (offsets stay valid) before the
+text reaches spaCy, which then has fewer tokens to tag.
+"""
+import os
+import re
+
+PII_TYPES = ["EMAIL", "PHONE", "ADDRESS", "ID"]  # DATE is shared with the NER types
+PII_PREFIXES = {"EMAIL": "email", "PHONE": "phone", "ADDRESS": "addr", "ID": "id"}
+
+_MONTH = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+_STREET = r"(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Court|Ct|Way|Place|Pl|Terrace|Crescent|Cres|Parkway|Pkwy)\.?"
+_CAP_WORD = r"[A-Z][A-Za-z'-]+"
+
+# Order matters where alternatives could start at the same position
+_PATTERNS = [
+    ("EMAIL", r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b"),
+    (
+        "ADDRESS",
+        rf"\b\d{{1,6}}\s+(?:{_CAP_WORD}\s+){{1,4}}{_STREET}"
+        rf"(?:,\s*{_CAP_WORD}(?:\s{_CAP_WORD})*){{0,2}}(?:\s+\d{{5}}(?:-\d{{4}})?)?(?!\w)",
+    ),
+    ("ADDRESS", r"\b[ABCEGHJ-NPRSTVXY]\d[ABCEGHJ-NPRSTV-Z] ?\d[ABCEGHJ-NPRSTV-Z]\d\b"),  # Canadian postal code
+    ("DATE", r"\b\d{4}-\d{1,2}-\d{1,2}\b|\b\d{1,2}[/.]\d{1,2}[/.](?:\d{4}|\d{2})\b"),
+    ("DATE", rf"(?i:\b{_MONTH}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}\b|\b\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTH}\s+\d{{4}}\b)"),
+    ("ID", r"\b\d{3}-\d{2}-\d{4}\b"),  # SSN
+    (
+        "ID",
+        r"(?i:\b(?:MRN|medical record(?: number| no\.?)?|patient id|chart(?: number| no\.?)?|health card(?: number| no\.?)?)"
+        r"\s*(?:[:#]|no\.?)?\s*)(?P<ID_VALUE>[A-Z0-9][A-Z0-9-]{3,})\b",
+    ),
+    ("PHONE", r"(?<![\w+])(?:\+?1[\s.-]?)?(?:\(\d{3}\)\s?|\d{3}[\s.-])\d{3}[\s.-]\d{4}\b"),
+    ("PHONE", r"(?<![\w+])\+\d{1,3}(?:[\s.-]?\d{2,4}){2,5}\b"),
+]
+
+# The shared lead only lets matches start at the beginning of a token, so the
+# alternatives are tried at a fraction of positions (about 4x faster)
+_SCANNER = re.compile(
+    r"(?=[\w(+])(?<![\w.%+@-])(?:"
+    + "|".join(f"(?P<{label}_{index}>{pattern})" for index, (label, pattern) in enumerate(_PATTERNS))
+    + ")"
+)
+_GROUP_LABELS = {f"{label}_{index}": label for index, (label, _) in enumerate(_PATTERNS)}
+# Every pattern needs a digit or an "@"; text without one is not scanned at all
+_TRIGGER = re.compile(r"[\d@]")
+
+
+def pii_enabled() -> bool:
+    """Whether the ANYMOUSE_PII_PATTERNS environment variable turns the pre-pass on."""
+    return os.environ.get("ANYMOUSE_PII_PATTERNS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def find_pii(text: str) -> list:
+    """Return sorted, non-overlapping ``(start, end, text, label)`` PII spans."""
+    if not _TRIGGER.search(text):
+        return []
+    spans = []
+    for match in _SCANNER.finditer(text):
+        label = _GROUP_LABELS[match.lastgroup]
+        start, end = match.span("ID_VALUE") if match.group("ID_VALUE") else match.span()
+        spans.append((start, end, text[start:end], label))
+    return spans
+
+
+def mask_spans(text: str, spans: list) -> str:
+    """Blank out ``spans`` with spaces, keeping every other offset unchanged."""
+    if not spans:
+        return text
+    parts = []
+    last = 0
+    for start, end, _, _ in spans:
+        parts.append(text[last:start])
+        parts.append(" " * (end - start))
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
@@ -0,0 +1,106 @@
+"""In-process LRU cache of detected entity spans per text segment."""
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Per-process key: digests cannot be matched against precomputed hashes of known text
+_HASH_KEY = os.urandom(16)
+_DIGEST_SIZE = 16
+
+
+class SegmentCache:
+    """Bounded LRU from a keyed hash of a text segment to its entity spans.
+
+    Only ``(start, end, label)`` offsets relative to the segment are stored;
+    neither the segment nor the entity text is kept, and nothing is written
+    outside process memory.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_used = 0
+
+    @staticmethod
+    def key(segment: str) -> bytes:
+        return hashlib.blake2b(segment.encode("utf-8"), digest_size=_DIGEST_SIZE, key=_HASH_KEY).digest()
+
+    @staticmethod
+    def _size(key: bytes, spans: tuple) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(spans) + sum(sys.getsizeof(span) for span in spans)
+
+    def get(self, key: bytes) -> Optional[Tuple[tuple, ...]]:
+        with self._lock:
+            spans = self._entries.get(key)
+            if spans is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return spans
+
+    def put(self, key: bytes, spans: Tuple[tuple, ...]) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes_used -= self._size(key, previous)
+            self._entries[key] = spans
+            self.bytes_used += self._size(key, spans)
+            while len(self._entries) > self.max_entries:
+                old_key, old_spans = self._entries.popitem(last=False)
+                self.bytes_used -= self._size(old_key, old_spans)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": self.bytes_used,
+            }
+
+
+_CACHE = None
+
+
+def configure_segment_cache(max_entries: Optional[int] = None) -> Optional[SegmentCache]:
+    """Enable (max_entries > 0) or disable (0) the shared segment cache.
+
+    Defaults to the ANYMOUSE_SEGMENT_CACHE_SIZE environment variable, which
+    is 0 (disabled) when unset.
+    """
+    global _CACHE
+    if max_entries is None:
+        max_entries = int(os.environ.get("ANYMOUSE_SEGMENT_CACHE_SIZE", "0") or 0)
+    _CACHE = SegmentCache(max_entries) if max_entries > 0 else None
+    return _CACHE
+
+
+def get_segment_cache() -> Optional[SegmentCache]:
+    """Return the shared cache, or None when segment caching is disabled."""
+    return _CACHE
+
+
+def segment_cache_stats() -> dict:
+    """Hit, miss, eviction and memory counters of the shared cache."""
+    if _CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **_CACHE.stats()}
+
+
+configure_segment_cache()
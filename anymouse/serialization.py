@@ -0,0 +1,186 @@
+"""Request and response body encoding for the HTTP API.
+
+Responses are written with ``orjson`` when it is installed, which is several
+times faster than ``json.dumps`` on large results, and with the standard
+library otherwise. Request bodies are always parsed with ``json.loads``:
+orjson is only marginally faster at parsing and reads integers beyond 64
+bits as floats, which would silently change identifiers.
+
+MessagePack request and response bodies (``application/msgpack``) are
+supported when the ``msgpack`` package is installed. API Gateway carries
+them base64-encoded, as it does gzip-compressed bodies in either direction.
+"""
+import base64
+import gzip
+import json
+import zlib
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional content type
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = {MSGPACK, "application/x-msgpack", "application/vnd.msgpack"}
+_JSON_RANGES = {JSON, "application/*", "*/*"}
+_GZIP_CODINGS = {"gzip", "x-gzip"}
+# BinaryMediaTypes of the API in template.yaml: API Gateway only turns a base64
+# response back into bytes when the request's first Accept type is one of these
+BINARY_MEDIA_TYPES = _MSGPACK_TYPES | {"application/gzip"}
+# zlib level for responses: on JSON, level 1 is about twice as fast as the
+# default 6 and saves within two points as much (benchmarks/bench_gzip.py)
+GZIP_LEVEL = 1
+
+
+class UnsupportedMediaType(ValueError):
+    """The request body's content type cannot be decoded here."""
+
+
+def dumps(data) -> str:
+    """Serialize ``data`` as JSON text.
+
+    With orjson the output is compact and NaN or infinite floats are written
+    as ``null``; anything orjson rejects (such as integers beyond 64 bits)
+    falls back to ``json.dumps``.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(data)
+
+
+def media_type(header: Optional[str]) -> str:
+    """The bare, lower-cased media type of a Content-Type header value."""
+    return (header or "").split(";", 1)[0].strip().lower()
+
+
+def is_msgpack(header: Optional[str]) -> bool:
+    return media_type(header) in _MSGPACK_TYPES
+
+
+def _weights(header: str):
+    """Yield ``(value, q)`` for each comma-separated item of an Accept-style header."""
+    for item in header.split(","):
+        value, *params = item.split(";")
+        q = 1.0
+        for param in params:
+            name, _, weight = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(weight)
+                except ValueError:
+                    q = 0.0
+        yield value.strip().lower(), q
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response media type for an Accept header.
+
+    MessagePack is chosen only when msgpack is installed and the client ranks
+    it at least as high as JSON; everything else gets JSON.
+    """
+    if msgpack is None or not accept:
+        return JSON
+    json_q = msgpack_q = 0.0
+    for kind, q in _weights(accept):
+        if kind in _MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif kind in _JSON_RANGES:
+            json_q = max(json_q, q)
+    return MSGPACK if msgpack_q > 0 and msgpack_q >= json_q else JSON
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows a gzip response."""
+    if not accept_encoding:
+        return False
+    weights = dict(_weights(accept_encoding))
+    explicit = [weights[coding] for coding in _GZIP_CODINGS if coding in weights]
+    return max(explicit) > 0 if explicit else weights.get("*", 0) > 0
+
+
+def binary_response_ok(accept: Optional[str]) -> bool:
+    """Whether API Gateway will deliver a binary (gzip) response for this Accept header."""
+    if not accept:
+        return False
+    return media_type(accept.split(",", 1)[0]) in BINARY_MEDIA_TYPES
+
+
+def gunzip(data: bytes, limit: int) -> bytes:
+    """Decompress a gzip request body, refusing to inflate past ``limit`` bytes.
+
+    Raises ValueError for corrupt data or when the limit is exceeded.
+    """
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)  # gzip header and trailer
+    try:
+        inflated = inflater.decompress(data, limit + 1)
+    except zlib.error as e:
+        raise ValueError(f"Invalid gzip body: {e}") from None
+    if len(inflated) > limit:
+        raise ValueError(f"Decompressed body exceeds {limit} bytes")
+    if not inflater.eof:
+        raise ValueError("Invalid gzip body: truncated")
+    return inflated
+
+
+def decode_content(body, content_encoding: Optional[str], limit: int) -> bytes:
+    """Undo a request's Content-Encoding (identity or gzip).
+
+    Raises UnsupportedMediaType for other encodings.
+    """
+    coding = (content_encoding or "identity").strip().lower()
+    if coding == "identity":
+        return body
+    if coding not in _GZIP_CODINGS:
+        raise UnsupportedMediaType(f"Content-Encoding '{coding}' is not supported; use gzip")
+    return gunzip(body if isinstance(body, bytes) else body.encode("latin-1"), limit)
+
+
+def compress_body(body: str, base64_encoded: bool) -> str:
+    """Gzip an encoded response body, returning it as base64 text."""
+    raw = base64.b64decode(body) if base64_encoded else body.encode("utf-8")
+    return base64.b64encode(gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)).decode("ascii")
+
+
+def decode_body(body, content_type: Optional[str] = None, base64_encoded: bool = False):
+    """Parse a request body (str or bytes) according to its Content-Type.
+
+    Raises UnsupportedMediaType for MessagePack without the msgpack package
+    and ValueError for malformed bodies.
+    """
+    if base64_encoded:
+        body = base64.b64decode(body, validate=True)
+    if is_msgpack(content_type):
+        if msgpack is None:
+            raise UnsupportedMediaType(f"{media_type(content_type)} requires the msgpack package")
+        try:
+            return msgpack.unpackb(body if isinstance(body, bytes) else body.encode("utf-8"))
+        except Exception as e:  # msgpack's errors do not share a ValueError base
+            raise ValueError(f"Invalid MessagePack: {e}") from None
+    return json.loads(body)
+
+
+def encode_body(data, content_type: str = JSON) -> tuple:
+    """Serialize a response body.
+
+    Returns ``(body, base64_encoded, content_type)``. MessagePack bodies are
+    base64 text for API Gateway; data msgpack cannot represent (such as
+    integers beyond 64 bits) is sent as JSON instead.
+    """
+    if content_type == MSGPACK and msgpack is not None:
+        try:
+            packed = msgpack.packb(data)
+        except (TypeError, ValueError, OverflowError):
+            pass
+        else:
+            return base64.b64encode(packed).decode("ascii"), True, MSGPACK
+    return dumps(data), False, JSON
@@ -0,0 +1,162 @@
+"""Cold-start profiler: time spent importing each module and in named init steps.
+
+Works like ``python -X importtime`` but keeps the timings in memory so they
+can be logged as one structured record. An entry at the front of
+``sys.meta_path`` lets the regular finders locate each module and times the
+loader's ``exec_module``, which runs the module body and therefore every
+import it triggers. Like ``-X importtime``, each module gets a cumulative
+time and a self time without its nested imports.
+
+The profiler is installed when ``anymouse`` is first imported, inside Lambda
+(``AWS_LAMBDA_FUNCTION_NAME`` is set) or wherever ``ANYMOUSE_STARTUP_PROFILE=1``;
+``ANYMOUSE_STARTUP_PROFILE=0`` never installs it. ``lambda_handler`` logs the
+report after the first request, so imports deferred to that request (spaCy)
+are included, and then removes the hook.
+"""
+import os
+import sys
+import time
+from typing import Optional
+
+DEFAULT_TOP = 25  # Modules and packages listed in a report
+
+
+def profile_enabled() -> bool:
+    setting = os.environ.get("ANYMOUSE_STARTUP_PROFILE", "").strip().lower()
+    if setting in ("0", "false", "no", "off"):
+        return False
+    return setting in ("1", "true", "yes", "on") or "AWS_LAMBDA_FUNCTION_NAME" in os.environ
+
+
+class ImportProfiler:
+    """Meta-path hook recording ``(module, self ns, cumulative ns, depth)`` per import."""
+
+    def __init__(self):
+        self.imports = []  # In completion order, like -X importtime
+        self.phases = {}  # Init step -> ns, including any imports it triggers
+        self._stack = []  # [module, nested ns] of the imports executing now
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                self._wrap(spec)
+                return spec
+        return None
+
+    def _wrap(self, spec) -> None:
+        loader = spec.loader
+        # Built-in and frozen modules are loaded by their (shared) class; they are cheap anyway
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            self._stack.append([spec.name, 0])
+            start = time.perf_counter_ns()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                name, nested = self._stack.pop()
+                self.imports.append((name, elapsed - nested, elapsed, len(self._stack)))
+                if self._stack:
+                    self._stack[-1][1] += elapsed
+                try:
+                    del loader.exec_module  # Back to the class's method for reloads
+                except AttributeError:
+                    pass
+
+        try:
+            loader.exec_module = timed_exec_module
+        except AttributeError:  # Loaders with __slots__ cannot be wrapped per instance
+            pass
+
+    def report(self, top: int = DEFAULT_TOP) -> dict:
+        """Ranked breakdown: top-level imports, slowest modules and packages by self time."""
+        packages = {}
+        for name, self_ns, _, _ in self.imports:
+            package = name.split(".", 1)[0]
+            packages[package] = packages.get(package, 0) + self_ns
+        ranked = sorted(self.imports, key=lambda entry: entry[2], reverse=True)
+        return {
+            "import_ms": round(sum(entry[2] for entry in self.imports if entry[3] == 0) / 1e6, 2),
+            "modules": len(self.imports),
+            "phases_ms": {name: round(ns / 1e6, 2) for name, ns in self.phases.items()},
+            "packages_ms": {
+                package: round(ns / 1e6, 2)
+                for package, ns in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+            },
+            "slowest": [
+                {"module": name, "ms": round(cumulative / 1e6, 2), "self_ms": round(self_ns / 1e6, 2)}
+                for name, self_ns, cumulative, _ in ranked[:top]
+            ],
+        }
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: ImportProfiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter_ns() - self.start
+        phases = self.profiler.phases
+        phases[self.name] = phases.get(self.name, 0) + elapsed
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_PROFILER = None
+
+
+def install() -> ImportProfiler:
+    """Put the profiler at the front of ``sys.meta_path`` (once)."""
+    global _PROFILER
+    if _PROFILER is None:
+        _PROFILER = ImportProfiler()
+        sys.meta_path.insert(0, _PROFILER)
+    return _PROFILER
+
+
+def install_if_enabled() -> Optional[ImportProfiler]:
+    return install() if profile_enabled() else None
+
+
+def uninstall() -> None:
+    global _PROFILER
+    if _PROFILER is not None and _PROFILER in sys.meta_path:
+        sys.meta_path.remove(_PROFILER)
+    _PROFILER = None
+
+
+def phase(name: str):
+    """Context manager timing an init step (config prefetch, warmup) in the report."""
+    return _NoPhase() if _PROFILER is None else _Phase(_PROFILER, name)
+
+
+def finish(top: int = DEFAULT_TOP) -> Optional[dict]:
+    """Remove the profiler and return its report; None if it was not installed."""
+    profiler = _PROFILER
+    if profiler is None:
+        return None
+    uninstall()
+    return profiler.report(top)
@@ -0,0 +1,474 @@
+"""Streaming anonymization of large JSON documents.
+
+The document is read in chunks and written back out as it goes, with
+configured field values replaced by placeholders. Only the current chunk,
+the nesting stack and the replaced values (which become the tokens map) are
+held in memory, so memory use does not grow with the size of the document.
+
+Containers on a configured path are walked token by token. Any other value
+that fits in the current chunk is decoded and re-encoded in one call by the
+C ``json`` scanner, so untouched parts of the document cost about what
+``json.loads`` would.
+
+The output is byte-for-byte what ``anonymize_payload`` produces with
+``json.dumps`` defaults, and placeholders are numbered in the same order.
+Paths with negative list indices need the length of the list up front and
+are not supported here.
+"""
+import codecs
+import json
+import re
+from typing import Iterator, Optional
+
+from .config import resolve_fields
+from .paths import compile_fields
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_FLUSH_SIZE = 64 * 1024
+
+_TOKEN = re.compile(
+    r'[ \t\n\r]*(?:([{}\[\],:])|("[^"\\]*(?:\\.[^"\\]*)*")'
+    r"|(-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?)|(true|false|null|NaN|-?Infinity))"
+)
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = re.compile(r"[\d.eE+-]*")
+# Strings json.dumps would write back unchanged: printable ASCII, no escapes
+_PLAIN_STRING = re.compile(r'"[\x20\x21\x23-\x5b\x5d-\x7e]*"')
+# json.loads accepts the non-standard constants too, so they are accepted here
+_LITERALS = {
+    "true": True, "false": False, "null": None,
+    "NaN": float("nan"), "Infinity": float("inf"), "-Infinity": float("-inf"),
+}
+_RAW_DECODE = json.JSONDecoder().raw_decode
+_INCOMPLETE = object()
+
+# Token kinds
+PUNCT, STRING, NUMBER, LITERAL = 1, 2, 3, 4
+
+
+def _chunks(source, chunk_size: int) -> Iterator[str]:
+    """Yield text chunks from a str, bytes, binary or text file, or iterable of either."""
+    if isinstance(source, (str, bytes)):
+        text = source.decode("utf-8") if isinstance(source, bytes) else source
+        for start in range(0, len(text), chunk_size):
+            yield text[start:start + chunk_size]
+        return
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    if hasattr(source, "read"):
+        read = source.read
+        source = iter(lambda: read(chunk_size), read(0))
+    for chunk in source:
+        yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class _Lexer:
+    """Buffered JSON tokenizer over a chunked source."""
+
+    def __init__(self, source, chunk_size: int):
+        self.chunks = _chunks(source, chunk_size)
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self) -> None:
+        """Drop consumed text and read at least another chunk (more for long tokens)."""
+        needed = max(self.chunk_size, len(self.buffer) - self.position)
+        collected = [self.buffer[self.position:]]
+        size = 0
+        while size < needed:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.eof = True
+                break
+            collected.append(chunk)
+            size += len(chunk)
+        self.buffer = "".join(collected)
+        self.position = 0
+
+    def next(self) -> Optional[tuple]:
+        """Return the next ``(kind, text)`` token, or None at the end of the document."""
+        while True:
+            buffer = self.buffer
+            match = _TOKEN.match(buffer, self.position)
+            # A number followed only by number characters may continue in the next chunk
+            if not self.eof and (match is None or (
+                match.lastindex == NUMBER and _NUMBER_CHARS.match(buffer, match.end()).end() == len(buffer)
+            )):
+                self.fill()
+                continue
+            if match is None:
+                if _WHITESPACE.match(buffer, self.position).end() == len(buffer):
+                    return None
+                raise ValueError(f"Invalid JSON near: {buffer[self.position:self.position + 40]!r}")
+            self.position = match.end()
+            kind = match.lastindex
+            return kind, match.group(kind)
+
+    def decode(self):
+        """Decode the next value if it is complete within a chunk, else return ``_INCOMPLETE``.
+
+        Nothing is consumed on ``_INCOMPLETE``; the caller falls back to
+        tokens, which also report any syntax error.
+        """
+        while True:
+            buffer = self.buffer
+            position = _WHITESPACE.match(buffer, self.position).end()
+            if position < len(buffer):
+                try:
+                    value, end = _RAW_DECODE(buffer, position)
+                except ValueError:
+                    pass
+                else:
+                    if self.eof or not isinstance(value, (int, float)) or (
+                        _NUMBER_CHARS.match(buffer, end).end() < len(buffer)
+                    ):
+                        self.position = end
+                        return value
+            if self.eof or len(buffer) - position >= self.chunk_size:
+                return _INCOMPLETE
+            self.fill()
+
+    def peek(self) -> str:
+        """Consume whitespace and return the next character ('' at the end)."""
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer) or self.eof:
+                return self.buffer[self.position:self.position + 1]
+            self.fill()
+
+
+def iter_tokens(source, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple]:
+    """Yield ``(kind, text)`` JSON tokens from ``source`` without loading it whole.
+
+    Raises ValueError on malformed input.
+    """
+    lexer = _Lexer(source, chunk_size)
+    while True:
+        token = lexer.next()
+        if token is None:
+            return
+        yield token
+
+
+def _dump_string(raw: str) -> str:
+    return raw if _PLAIN_STRING.fullmatch(raw) else json.dumps(json.loads(raw))
+
+
+def _dump_number(raw: str) -> str:
+    if "." in raw or "e" in raw or "E" in raw:
+        return json.dumps(float(raw))
+    return "0" if raw == "-0" else raw
+
+
+def _load_scalar(kind: int, raw: str):
+    if kind == STRING:
+        return raw[1:-1] if _PLAIN_STRING.fullmatch(raw) else json.loads(raw)
+    if kind == NUMBER:
+        return float(raw) if "." in raw or "e" in raw or "E" in raw else int(raw)
+    return _LITERALS[raw]
+
+
+class _Parser:
+    """Recursive-descent walk over a lexer's tokens."""
+
+    def __init__(self, lexer: _Lexer):
+        self.lexer = lexer
+
+    def token(self) -> tuple:
+        token = self.lexer.next()
+        if token is None:
+            raise ValueError("Invalid JSON: unexpected end of document")
+        return token
+
+    def expect(self, text: str) -> None:
+        kind, raw = self.token()
+        if raw != text or kind != PUNCT:
+            raise ValueError(f"Invalid JSON: expected {text!r}, got {raw!r}")
+
+    def end(self) -> None:
+        """Fail unless the document has no tokens left."""
+        token = self.lexer.next()
+        if token is not None:
+            raise ValueError(f"Invalid JSON: extra data {token[1]!r}")
+
+    def read(self):
+        """Build the next value, decoding it in one call when it fits in the buffer."""
+        value = self.lexer.decode()
+        return self.load(*self.token()) if value is _INCOMPLETE else value
+
+    def load(self, kind: int, raw: str):
+        """Build the Python value starting with token ``(kind, raw)``."""
+        if kind != PUNCT:
+            return _load_scalar(kind, raw)
+        if raw == "{":
+            result = {}
+            kind, raw = self.token()
+            if raw == "}" and kind == PUNCT:
+                return result
+            while True:
+                if kind != STRING:
+                    raise ValueError(f"Invalid JSON: expected a key, got {raw!r}")
+                self.expect(":")
+                result[_load_scalar(STRING, raw)] = self.read()
+                kind, raw = self.token()
+                if raw == "}" and kind == PUNCT:
+                    return result
+                if raw != "," or kind != PUNCT:
+                    raise ValueError(f"Invalid JSON: expected ',' or '}}', got {raw!r}")
+                kind, raw = self.token()
+        if raw == "[":
+            result = []
+            if self.lexer.peek() == "]":
+                self.token()
+                return result
+            while True:
+                result.append(self.read())
+                kind, raw = self.token()
+                if raw == "]" and kind == PUNCT:
+                    return result
+                if raw != "," or kind != PUNCT:
+                    raise ValueError(f"Invalid JSON: expected ',' or ']', got {raw!r}")
+        raise ValueError(f"Invalid JSON: unexpected {raw!r}")
+
+    def skip(self) -> None:
+        """Consume the next value, keeping at most one chunk of it built at a time."""
+        if self.lexer.decode() is not _INCOMPLETE:
+            return
+        kind, raw = self.token()
+        if kind != PUNCT:
+            return
+        if raw == "{":
+            kind, raw = self.token()
+            if raw == "}" and kind == PUNCT:
+                return
+            while True:
+                if kind != STRING:
+                    raise ValueError(f"Invalid JSON: expected a key, got {raw!r}")
+                self.expect(":")
+                self.skip()
+                kind, raw = self.token()
+                if raw == "}" and kind == PUNCT:
+                    return
+                if raw != "," or kind != PUNCT:
+                    raise ValueError(f"Invalid JSON: expected ',' or '}}', got {raw!r}")
+                kind, raw = self.token()
+        if raw == "[":
+            if self.lexer.peek() == "]":
+                self.token()
+                return
+            while True:
+                self.skip()
+                kind, raw = self.token()
+                if raw == "]" and kind == PUNCT:
+                    return
+                if raw != "," or kind != PUNCT:
+                    raise ValueError(f"Invalid JSON: expected ',' or ']', got {raw!r}")
+        raise ValueError(f"Invalid JSON: unexpected {raw!r}")
+
+
+class _Rewriter(_Parser):
+    """Copies a document to ``sink``, replacing values the plan targets."""
+
+    def __init__(self, lexer: _Lexer, sink, plan):
+        super().__init__(lexer)
+        self.sink = sink
+        self.plan = plan
+        self.parts = []
+        self.size = 0
+        self.tokens = {}
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= _FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.parts:
+            self.sink.write("".join(self.parts))
+            self.parts = []
+            self.size = 0
+
+    def value(self, node) -> None:
+        """Write the next value; ``node`` is its plan position (None when untargeted)."""
+        # No early exit as in anonymize_payload: the rest of the document is copied
+        # anyway, and repeated keys in the text would make a replacement count unsafe
+        if node is not None and node.terminal:
+            placeholder = f"[name{len(self.tokens) + 1}]"
+            self.tokens[placeholder] = self.read()
+            self.write(f'"{placeholder}"')
+            return
+        if node is None:
+            value = self.lexer.decode()
+            if value is not _INCOMPLETE:
+                self.write(json.dumps(value))
+                return
+        kind, raw = self.token()
+        if kind == STRING:
+            self.write(_dump_string(raw))
+        elif kind == NUMBER:
+            self.write(_dump_number(raw))
+        elif kind == LITERAL:
+            self.write(raw)
+        elif raw == "{":
+            self.object(node if node is not None and (node.lookup or node.any_key) else None)
+        elif raw == "[":
+            self.array(node if node is not None and (node.items or node.indices) else None)
+        else:
+            raise ValueError(f"Invalid JSON: unexpected {raw!r}")
+
+    def object(self, node) -> None:
+        kind, raw = self.token()
+        if raw == "}" and kind == PUNCT:
+            self.write("{}")
+            return
+        self.write("{")
+        while True:
+            if kind != STRING:
+                raise ValueError(f"Invalid JSON: expected a key, got {raw!r}")
+            self.write(_dump_string(raw))
+            self.write(": ")
+            self.expect(":")
+            self.value(None if node is None else node.lookup.get(_load_scalar(STRING, raw), node.any_key))
+            kind, raw = self.token()
+            if raw == "}" and kind == PUNCT:
+                self.write("}")
+                return
+            if raw != "," or kind != PUNCT:
+                raise ValueError(f"Invalid JSON: expected ',' or '}}', got {raw!r}")
+            self.write(", ")
+            kind, raw = self.token()
+
+    def array(self, node) -> None:
+        if self.lexer.peek() == "]":
+            self.token()
+            self.write("[]")
+            return
+        self.write("[")
+        index = 0
+        while True:
+            self.value(None if node is None else node.indices.get(index, node.items))
+            kind, raw = self.token()
+            if raw == "]" and kind == PUNCT:
+                self.write("]")
+                return
+            if raw != "," or kind != PUNCT:
+                raise ValueError(f"Invalid JSON: expected ',' or ']', got {raw!r}")
+            self.write(", ")
+            index += 1
+
+
+def _has_negative_index(node, seen: Optional[set] = None) -> bool:
+    seen = set() if seen is None else seen
+    if id(node) in seen:
+        return False
+    seen.add(id(node))
+    if any(index < 0 for index in node.indices):
+        return True
+    children = list(node.children.values()) + list(node.indices.values()) + [node.any_key, node.items]
+    return any(_has_negative_index(child, seen) for child in children if child is not None)
+
+
+def supports_fields(fields) -> bool:
+    """Whether ``fields`` can be applied while streaming (no negative list indices)."""
+    return not _has_negative_index(compile_fields(fields).root)
+
+
+def anonymize_stream(source, sink, config, member: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """Anonymize a JSON document from ``source`` into ``sink`` without loading it whole.
+
+    Parameters
+    ----------
+    source:
+        A str, bytes, text or binary file object, or an iterable of chunks.
+    sink:
+        Any object with a ``write(str)`` method; receives the anonymized JSON.
+    config: dict or ConfigPlan
+        Same ``fields`` config as ``anonymize_payload``.
+    member: str, optional
+        Stream only the value of this top-level key (e.g. ``"payload"`` of a
+        request body) instead of the whole document.
+
+    Returns
+    -------
+    dict with keys ``tokens`` and ``fields``, as ``anonymize_payload`` returns
+    them alongside the message.
+    """
+    fields, plan = resolve_fields(config)
+    if _has_negative_index(plan.root):
+        raise ValueError("Negative list indices are not supported when streaming")
+    rewriter = _Rewriter(_Lexer(source, chunk_size), sink, plan)
+    if member is not None and not _seek_member(rewriter, member):
+        raise ValueError(f"Missing '{member}' member")
+    rewriter.value(plan.root if plan else None)
+    if member is None:
+        rewriter.end()
+    rewriter.flush()
+    return {"tokens": rewriter.tokens, "fields": fields}
+
+
+def _seek_member(parser: _Parser, member: str) -> bool:
+    """Advance to the value of top-level key ``member``; False if it is absent."""
+    parser.expect("{")
+    kind, raw = parser.token()
+    if raw == "}" and kind == PUNCT:
+        return False
+    while True:
+        if kind != STRING:
+            raise ValueError(f"Invalid JSON: expected a key, got {raw!r}")
+        parser.expect(":")
+        if _load_scalar(STRING, raw) == member:
+            return True
+        parser.skip()
+        kind, raw = parser.token()
+        if raw == "}" and kind == PUNCT:
+            return False
+        if raw != "," or kind != PUNCT:
+            raise ValueError(f"Invalid JSON: expected ',' or '}}', got {raw!r}")
+        kind, raw = parser.token()
+
+
+_TYPE_NAMES = {"{": "object", "[": "array", '"': "string", "t": "literal", "f": "literal", "n": "literal"}
+
+
+def scan_members(source, skip=(), chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple:
+    """Read a top-level JSON object, building every member except those in ``skip``.
+
+    Returns ``(members, skipped)``: the built members, and for each skipped
+    key the JSON type of its value (``"object"``, ``"array"``, ``"string"``,
+    ``"number"`` or ``"literal"``, None if the key repeats). ``members`` is
+    None when the document is not an object.
+    """
+    parser = _Parser(_Lexer(source, chunk_size))
+    if parser.lexer.peek() != "{":
+        parser.skip()
+        parser.end()
+        return None, {}
+    parser.token()
+    members, skipped = {}, {}
+    kind, raw = parser.token()
+    if raw == "}" and kind == PUNCT:
+        parser.end()
+        return members, skipped
+    while True:
+        if kind != STRING:
+            raise ValueError(f"Invalid JSON: expected a key, got {raw!r}")
+        parser.expect(":")
+        key = _load_scalar(STRING, raw)
+        if key in skip:
+            # A repeated key is reported as None: json.loads would keep the last one
+            skipped[key] = None if key in skipped else _TYPE_NAMES.get(parser.lexer.peek(), "number")
+            parser.skip()
+        else:
+            members[key] = parser.read()
+        kind, raw = parser.token()
+        if raw == "}" and kind == PUNCT:
+            parser.end()
+            return members, skipped
+        if raw != "," or kind != PUNCT:
+            raise ValueError(f"Invalid JSON: expected ',' or '}}', got {raw!r}")
+        kind, raw = parser.token()
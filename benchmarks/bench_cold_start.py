@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Reproduce a Lambda cold start in fresh interpreters and rank where the time goes.
+
+Each run starts a new Python process with the startup profiler on
+(``ANYMOUSE_STARTUP_PROFILE=1``), imports ``anymouse.lambda_handler`` and
+sends it one request, as the first invocation of a container would. The
+profile logged after that request is collected, and the median of every
+figure across runs is printed:
+
+  handler import   importing anymouse.lambda_handler, init steps included
+  first request    the first invocation, including lazy imports (spaCy)
+  all imports      every profiled import in the two
+  phases           init steps timed in lambda_handler (config prefetch, ...)
+  packages         self time of all modules of each top-level package
+  slowest          modules by cumulative import time
+
+``--save`` writes the medians as JSON; ``--baseline`` compares against a
+file saved earlier, to catch startup regressions.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--runs 5] [--event text|structured|deanonymize]
+        [--top 15] [--save startup.json] [--baseline startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+REPORT_MARKER = "action=startup_profile report="
+
+EVENTS = {
+    "text": {"payload": "Dr. Jane Smith visited Sunnybrook Hospital in Toronto on March 1, 2024."},
+    "structured": {"payload": {"name": "Jane Smith", "city": "Toronto"}, "config": {"fields": ["name"]}},
+    "deanonymize": {"message": "[name1] visited [org1].", "tokens": {"[name1]": "Jane", "[org1]": "Sunnybrook"}},
+}
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from anymouse.lambda_handler import lambda_handler
+imported = time.perf_counter()
+lambda_handler(json.loads(sys.argv[1]), None)
+done = time.perf_counter()
+print(json.dumps({"handler_import_ms": (imported - start) * 1000, "first_request_ms": (done - imported) * 1000}))
+"""
+
+
+def cold_start(event: dict) -> dict:
+    env = dict(os.environ, ANYMOUSE_STARTUP_PROFILE="1", ANYMOUSE_METRICS="0", AWS_EC2_METADATA_DISABLED="true")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps(event)], env=env, capture_output=True, text=True, check=True
+    )
+    report = next(
+        json.loads(line.split(REPORT_MARKER, 1)[1]) for line in completed.stderr.splitlines() if REPORT_MARKER in line
+    )
+    return {**json.loads(completed.stdout.splitlines()[-1]), **report}
+
+
+def median_by_key(dicts: list) -> dict:
+    keys = dict.fromkeys(key for d in dicts for key in d)
+    return {key: statistics.median(d.get(key, 0.0) for d in dicts) for key in keys}
+
+
+def summarize(runs: list) -> dict:
+    return {
+        "handler_import_ms": statistics.median(run["handler_import_ms"] for run in runs),
+        "first_request_ms": statistics.median(run["first_request_ms"] for run in runs),
+        "import_ms": statistics.median(run["import_ms"] for run in runs),
+        "modules": statistics.median(run["modules"] for run in runs),
+        "phases_ms": median_by_key([run["phases_ms"] for run in runs]),
+        "packages_ms": median_by_key([run["packages_ms"] for run in runs]),
+        "slowest": median_by_key([{entry["module"]: entry["ms"] for entry in run["slowest"]} for run in runs]),
+    }
+
+
+def print_ranked(title: str, values: dict, baseline: dict, top: int) -> None:
+    print(f"\n{title}")
+    for name, ms in sorted(values.items(), key=lambda item: item[1], reverse=True)[:top]:
+        delta = f"{ms - baseline[name]:>+9.1f}" if name in baseline else ""
+        print(f"  {name:<40} {ms:>9.1f} {delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--event", choices=sorted(EVENTS), default="text")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--save", help="write the medians to this JSON file")
+    parser.add_argument("--baseline", help="JSON file from an earlier --save to compare against")
+    args = parser.parse_args()
+
+    path = "/deanonymize" if args.event == "deanonymize" else "/anonymize"
+    event = {"httpMethod": "POST", "path": path, "headers": {"X-API-Key": "test-api-key-123"},
+             "body": json.dumps(EVENTS[args.event])}
+    summary = summarize([cold_start(event) for _ in range(args.runs)])
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"{args.event} request, median of {args.runs} fresh interpreters (ms; last column vs baseline)")
+    for key, label in (("handler_import_ms", "import anymouse.lambda_handler"), ("first_request_ms", "first request"),
+                       ("import_ms", "all imports (both of the above)")):
+        delta = f"{summary[key] - baseline[key]:>+9.1f}" if key in baseline else ""
+        print(f"  {label:<40} {summary[key]:>9.1f} {delta}")
+    print(f"  {'modules imported':<40} {summary['modules']:>9.0f}")
+    print_ranked("phases", summary["phases_ms"], baseline.get("phases_ms", {}), args.top)
+    print_ranked("packages (self time)", summary["packages_ms"], baseline.get("packages_ms", {}), args.top)
+    print_ranked("slowest modules (cumulative)", summary["slowest"], baseline.get("slowest", {}), args.top)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request config handling: pydantic validation every time against
+the cached ConfigPlan.
+
+  validate          validate_config(config), then compile_fields on its fields
+                    (what every structured request did before plans)
+  compile_config    compile_config(config) for a config seen before (cache hit)
+  request, <mode>   a small structured /anonymize request through
+                    lambda_handler, end to end
+
+Each config is a fresh dict decoded from the request, as in production, so
+nothing is shared by identity.
+
+Usage:
+    python benchmarks/bench_config_plan.py [--fields 3 50] [--repeat 5] [--number 2000]
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("ANYMOUSE_METRICS", "0")
+
+from anymouse import lambda_handler as handler  # noqa: E402
+from anymouse.config import compile_config, validate_config  # noqa: E402
+from anymouse.paths import compile_fields  # noqa: E402
+
+
+def best_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def config_text(fields: int) -> str:
+    return json.dumps({"fields": [f"patients[*].field{i}.value" for i in range(fields)]})
+
+
+def uncached_load_config(body):
+    """The pre-plan load_config: validate the dict and return it."""
+    config = validate_config(body.get("config", {}))
+    compile_fields(config["fields"])
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fields", type=int, nargs="+", default=[3, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    number = args.number
+    logging.getLogger("anymouse").setLevel(logging.WARNING)
+    plan_load_config = handler.load_config
+
+    print(f"{'fields':>6} {'step':<26} {'us/request':>11}")
+    for fields in args.fields:
+        text = config_text(fields)
+        compile_config(json.loads(text))  # Warm the cache, as a repeated config would
+        configs = [json.loads(text) for _ in range(number)]
+        rows = [
+            ("validate", lambda: [compile_fields(validate_config(config)["fields"]) for config in configs]),
+            ("compile_config", lambda: [compile_config(config) for config in configs]),
+        ]
+        event = {
+            "httpMethod": "POST", "path": "/anonymize", "headers": {"X-API-Key": "test-api-key-123"},
+            "body": json.dumps({"payload": {"patients": [{"field0": {"value": "Alice"}}]}, "config": json.loads(text)}),
+        }
+        for mode, load_config in (("validate", uncached_load_config), ("plan", handler.load_config)):
+            def requests(load_config=load_config):
+                handler.load_config = load_config
+                try:
+                    with redirect_stdout(io.StringIO()):
+                        for _ in range(number):
+                            handler.lambda_handler(event, None)
+                finally:
+                    handler.load_config = plan_load_config
+            rows.append((f"request, {mode}", requests))
+        for name, fn in rows:
+            print(f"{fields:>6} {name:<26} {best_ms(fn, args.repeat) / number * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark deanonymize_payload's raw-text substitution against the
+parse/walk/serialize round trip on 1-50 MB anonymized messages.
+
+Usage:
+    python benchmarks/bench_deanonymize_payload.py [--sizes 1 10 50] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse.anonymize import anonymize_payload  # noqa: E402
+from anymouse.deanonymize import _deanonymize_tree, deanonymize_payload  # noqa: E402
+
+
+def anonymized_message(target_mb: float) -> dict:
+    """Build an anonymized payload of roughly ``target_mb`` megabytes."""
+    record = {
+        "notes": "Patient reports persistent headaches and mild fatigue. " * 4,
+        "provider": {"name": "Dr. Smith", "department": "Internal Medicine"},
+        "contact": {"name": "Jane Doe", "phone": "(555) 123-4567"},
+    }
+    record_size = len(json.dumps(record))
+    count = max(1, int(target_mb * 1024 * 1024 / record_size))
+    payload = {f"rec-{i}": record for i in range(count)}
+    fields = [f"rec-{i}.{path}" for i in range(count) for path in ("provider.name", "contact.name")]
+    return anonymize_payload(payload, {"fields": fields})
+
+
+def best_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 50], help="Message sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'message MB':>10} {'tokens':>8} {'tree walk ms':>13} {'raw ms':>8} {'speedup':>8}  equal")
+    for size in args.sizes:
+        anonymized = anonymized_message(size)
+        message, tokens = anonymized["message"], anonymized["tokens"]
+        tree = best_ms(lambda: _deanonymize_tree(message, tokens), args.repeat)
+        raw = best_ms(lambda: deanonymize_payload({"message": message, "tokens": tokens}, {}), args.repeat)
+        equal = (json.loads(deanonymize_payload({"message": message, "tokens": tokens}, {})["message"])
+                 == json.loads(_deanonymize_tree(message, tokens)["message"]))
+        print(f"{len(message) / 1024 / 1024:>10.1f} {len(tokens):>8} {tree:>13.1f} {raw:>8.1f} "
+              f"{tree / raw:>7.1f}x  {equal}")
+
+
+if __name__ == "__main__":
+    main()
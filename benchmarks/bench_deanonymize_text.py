@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark deanonymize_text's token-table engine against the previous
+fixed-regex-plus-callback implementation, for maps of 10, 1k and 100k tokens.
+
+The "custom" rows use placeholders outside the bracket format, which the old
+implementation could not restore at all, so only the new engine is timed.
+
+Usage:
+    python benchmarks/bench_deanonymize_text.py [--sizes 10 1000 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse.deanonymize import deanonymize_text  # noqa: E402
+
+
+def legacy_deanonymize_text(message: str, tokens: dict) -> str:
+    """deanonymize_text as it was before the token-table engine."""
+    if not tokens:
+        return message
+    pattern = re.compile(r"\[(name|org|loc|date)\d+\]")
+
+    def repl(match: re.Match) -> str:
+        placeholder = match.group(0)
+        return tokens.get(placeholder, placeholder)
+
+    return pattern.sub(repl, message)
+
+
+def workload(size: int, custom: bool = False) -> tuple:
+    """A token map of ``size`` entries and a ~1 MB message using every token."""
+    prefixes = ("name", "org", "loc", "date")
+    if custom:
+        keys = [f"<<ent-{i}>>" for i in range(size)]
+    else:
+        keys = [f"[{prefixes[i % 4]}{i // 4 + 1}]" for i in range(size)]
+    tokens = {key: f"Original value {i}" for i, key in enumerate(keys)}
+    sentence_count = max(size, 20_000)
+    message = " ".join(f"Note {i} mentions {keys[i % size]} today." for i in range(sentence_count))
+    return message, tokens
+
+
+def best_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'tokens':>8} {'kind':>8} {'message KB':>11} {'legacy ms':>10} {'engine ms':>10} "
+          f"{'first call ms':>14} {'speedup':>8}")
+    for size in args.sizes:
+        for custom in (False, True):
+            message, tokens = workload(size, custom)
+            start = time.perf_counter()
+            restored = deanonymize_text(message, tokens)  # Includes matcher build
+            first = (time.perf_counter() - start) * 1000
+            engine = best_ms(lambda: deanonymize_text(message, tokens), args.repeat)
+            if custom:
+                assert "<<ent-" not in restored
+                legacy_col, speedup = "n/a", "n/a"
+            else:
+                assert restored == legacy_deanonymize_text(message, tokens)
+                legacy = best_ms(lambda: legacy_deanonymize_text(message, tokens), args.repeat)
+                legacy_col, speedup = f"{legacy:.1f}", f"{legacy / engine:.1f}x"
+            kind = "custom" if custom else "bracket"
+            print(f"{size:>8} {kind:>8} {len(message) / 1024:>11.0f} {legacy_col:>10} {engine:>10.1f} "
+                  f"{first:>14.1f} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled field-path plan used by anonymize_payload against the
+previous walker, which built an f-string path for every key it visited.
+
+Both the end-to-end call and the walk alone (payload already copied, result
+not serialized) are reported, since the copy and json.dumps are shared costs.
+
+Usage:
+    python benchmarks/bench_field_paths.py [--repeat 20]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+import types
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse import anonymize as anonymize_module  # noqa: E402
+from anymouse.anonymize import anonymize_payload  # noqa: E402
+
+
+def legacy_walk(result: dict, fields: list) -> dict:
+    """The walker as it was before field paths were compiled."""
+    tokens = {}
+    field_index = 1
+    fields_set = set(fields)
+
+    def recurse(current: dict, path: str = ""):
+        nonlocal field_index
+        for key in list(current.keys()):
+            full_path = f"{path}.{key}" if path else key
+            if full_path in fields_set:
+                placeholder = f"[name{field_index}]"
+                tokens[placeholder] = current[key]
+                current[key] = placeholder
+                field_index += 1
+            elif isinstance(current[key], dict):
+                recurse(current[key], full_path if path else key)
+
+    recurse(result)
+    return tokens
+
+
+def legacy_anonymize_payload(payload: dict, config: dict) -> dict:
+    fields = config.get("fields", [])
+    result = copy.deepcopy(payload)
+    tokens = legacy_walk(result, fields)
+    return {"message": json.dumps(result), "tokens": tokens, "fields": fields}
+
+
+def plan_walk(result: dict, config: dict) -> dict:
+    """Run anonymize_payload's walk in place, without the copy or dumps."""
+    shims = {
+        "copy": types.SimpleNamespace(deepcopy=lambda value: value),
+        "json": types.SimpleNamespace(dumps=lambda value: ""),
+    }
+    with mock.patch.multiple(anonymize_module, **shims):
+        return anonymize_payload(result, config)["tokens"]
+
+
+def wide_payload(keys: int = 10_000) -> tuple:
+    """One flat object with ``keys`` keys; two of them are targeted."""
+    payload = {f"field_{i}": f"value {i}" for i in range(keys)}
+    payload["patient_name"] = "Jane Doe"
+    payload["doctor"] = "Dr. Smith"
+    return payload, {"fields": ["patient_name", "doctor"]}
+
+
+def deep_payload(branches: int = 100, leaves: int = 100) -> tuple:
+    """``branches`` nested objects of ``leaves`` keys; targets sit in one branch."""
+    payload = {
+        f"section_{b}": {f"entry_{i}": {"text": f"note {b}-{i}", "code": i} for i in range(leaves)}
+        for b in range(branches)
+    }
+    payload["patient"] = {"name": "Jane Doe", "contact": {"email": "jane@example.com"}}
+    return payload, {"fields": ["patient.name", "patient.contact.email"]}
+
+
+def best_ms(fn, payload, repeat: int, fresh_copy: bool = False) -> float:
+    timings = []
+    for _ in range(repeat):
+        arg = copy.deepcopy(payload) if fresh_copy else payload
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    cases = {"wide (10k keys)": wide_payload(), "deep (30k keys)": deep_payload()}
+    print(f"{'payload':<18} {'legacy ms':>10} {'compiled ms':>12} {'legacy walk':>12} "
+          f"{'plan walk':>10} {'walk speedup':>13}")
+    for name, (payload, config) in cases.items():
+        assert anonymize_payload(payload, config) == legacy_anonymize_payload(payload, config)
+        legacy = best_ms(lambda p: legacy_anonymize_payload(p, config), payload, args.repeat)
+        compiled = best_ms(lambda p: anonymize_payload(p, config), payload, args.repeat)
+        walk_legacy = best_ms(lambda p: legacy_walk(p, config["fields"]), payload, args.repeat, fresh_copy=True)
+        walk_plan = best_ms(lambda p: plan_walk(p, config), payload, args.repeat, fresh_copy=True)
+        print(f"{name:<18} {legacy:>10.2f} {compiled:>12.2f} {walk_legacy:>12.3f} "
+              f"{walk_plan:>10.3f} {walk_legacy / walk_plan:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the gazetteer detector: automaton build time, memory per 10k
+terms, and match throughput over ~1 MB of text, for 1k to 50k terms.
+
+Memory is the tracemalloc growth while building the gazetteer. Throughput
+is compared with a single alternation regex over the same terms (up to 10k
+terms), which is what a hand-maintained pattern list amounts to.
+
+Usage:
+    python benchmarks/bench_gazetteer.py [--sizes 1000 10000 50000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse.gazetteer import Gazetteer  # noqa: E402
+
+FIRST = ["Jane", "Raj", "Maria", "Wei", "Fiona", "Omar", "Lena", "Kofi", "Ana", "Tomas"]
+SUFFIXES = ["Clinic", "Hospital", "Health", "Labs", "Pharmacy"]
+
+
+def workload(size: int, seed: int = 3) -> tuple:
+    """``size`` staff/facility terms and a ~1 MB text mentioning some of them."""
+    rng = random.Random(seed)
+    people = [f"{rng.choice(FIRST)} {''.join(rng.choice('abcdefghij') for _ in range(7)).title()}" for _ in range(size // 2)]
+    orgs = [f"{''.join(rng.choice('klmnopqrst') for _ in range(8)).title()} {rng.choice(SUFFIXES)}" for _ in range(size - size // 2)]
+    sentences = []
+    while sum(map(len, sentences)) < 1_000_000:
+        sentences.append(f"Patient seen by {rng.choice(people)} at {rng.choice(orgs)} on follow-up; vitals stable.")
+    return {"PERSON": people, "ORG": orgs}, " ".join(sentences)
+
+
+def best_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'terms':>7} {'engine':>13} {'build ms':>9} {'MB/10k terms':>13} {'match MB/s':>11} "
+          f"{'regex MB/s':>11} {'matches':>8}")
+    for size in args.sizes:
+        terms, text = workload(size)
+        start = time.perf_counter()
+        gazetteer = Gazetteer(terms)
+        build = (time.perf_counter() - start) * 1000
+        del gazetteer
+        tracemalloc.start()
+        gazetteer = Gazetteer(terms)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        spans = gazetteer.find(text)
+        match_ms = best_ms(lambda: gazetteer.find(text), args.repeat)
+        megabytes = len(text) / 1024 / 1024
+        regex_col = "n/a"
+        if size <= 10_000:  # Larger alternations take minutes per MB
+            alternation = re.compile(
+                r"\b(?:" + "|".join(re.escape(term) for term in sorted(terms["PERSON"] + terms["ORG"], key=len, reverse=True)) + r")\b"
+            )
+            regex_col = f"{megabytes / best_ms(lambda: alternation.findall(text), 1) * 1000:.2f}"
+        print(f"{size:>7} {gazetteer.engine:>13} {build:>9.0f} {memory / 1024 / 1024 / size * 10_000:>13.1f} "
+              f"{megabytes / match_ms * 1000:>11.2f} {regex_col:>11} {len(spans):>8}")
+
+
+if __name__ == "__main__":
+    main()
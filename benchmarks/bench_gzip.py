@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark gzip response compression: CPU time against bytes saved.
+
+Response bodies are built from the ``load_test.py`` payload sizes (small,
+medium and large free-text requests, anonymized with the regex engine so no
+model is needed), plus structured record bundles that approach the 6 MB
+Lambda response limit. Each body is compressed at several zlib levels. Sizes
+include base64, which API Gateway needs for binary bodies and which adds a
+third back on top of the compressed size.
+
+Usage:
+    python benchmarks/bench_gzip.py [--levels 1 6 9] [--repeat 5]
+"""
+
+import argparse
+import base64
+import gzip
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse import anonymize_text  # noqa: E402
+from anymouse.anonymize import anonymize_payload  # noqa: E402
+from anymouse.serialization import dumps  # noqa: E402
+from corpus import generate_payloads  # noqa: E402
+
+
+def best_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def bundle(records: int) -> dict:
+    return {"patients": [
+        {"id": f"p{i}", "name": f"Patient {i}", "email": f"patient{i}@example.com",
+         "note": "Follow-up in two weeks; continue current medication.", "address": {"city": "Springfield"}}
+        for i in range(records)
+    ]}
+
+
+def bodies() -> list:
+    rows = []
+    for size in ("small", "medium", "large"):
+        requests = generate_payloads(size)
+        # One response per request, as the load test sees them
+        body = dumps(anonymize_text(requests[0]["payload"], engine="regex"))
+        rows.append((f"{size} text", body))
+    for records in (1_000, 10_000, 40_000):
+        body = dumps(anonymize_payload(bundle(records), {"fields": ["patients[*].name", "patients[*].email"]}))
+        rows.append((f"{records:,} records", body))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'response':<16} {'bytes':>11} {'level':>5} {'gzip+b64':>11} {'saved':>7} {'ms':>8} {'MB/s':>7}")
+    for name, body in bodies():
+        raw = body.encode("utf-8")
+        for level in args.levels:
+            compressed = gzip.compress(raw, compresslevel=level, mtime=0)
+            encoded = len(base64.b64encode(compressed))
+            elapsed = best_ms(lambda: base64.b64encode(gzip.compress(raw, compresslevel=level, mtime=0)), args.repeat)
+            saved = 1 - encoded / len(raw)
+            print(f"{name:<16} {len(raw):>11,} {level:>5} {encoded:>11,} {saved:>7.0%} {elapsed:>8.2f} "
+                  f"{len(raw) / 1024 / 1024 / elapsed * 1000:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Measure anonymize_texts throughput as n_process grows from 1 to N, and check
+the parallel output is identical to serial anonymize_text.
+
+Usage:
+    python benchmarks/bench_parallel.py [--docs 5000] [--processes 1 2 4 8] [--batch-size 64]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse.anonymize import _get_nlp_model, anonymize_text, anonymize_texts  # noqa: E402
+from corpus import corpus_texts  # noqa: E402
+
+
+def documents(count: int) -> list:
+    """``count`` distinct documents built from the load_test.py corpus."""
+    base = corpus_texts()
+    return [f"{base[i % len(base)]} (ref {i})" for i in range(count)]
+
+
+def main():
+    default_processes = sorted({1, 2, 4, os.cpu_count() or 1})
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--processes", type=int, nargs="+", default=default_processes)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    docs = documents(args.docs)
+    engine = "spacy" if _get_nlp_model() else "regex fallback"
+    print(f"engine: {engine}, cpus: {os.cpu_count()}, docs: {len(docs)}")
+    sample = docs[:200]
+    expected = [anonymize_text(text) for text in sample]
+
+    print(f"{'n_process':>9} {'seconds':>8} {'docs/s':>9} {'scaling':>8}  identical")
+    baseline = None
+    for n_process in args.processes:
+        identical = list(anonymize_texts(sample, batch_size=args.batch_size, n_process=n_process)) == expected
+        start = time.perf_counter()
+        for _ in anonymize_texts(iter(docs), batch_size=args.batch_size, n_process=n_process):
+            pass
+        elapsed = time.perf_counter() - start
+        rate = len(docs) / elapsed
+        baseline = baseline or rate
+        print(f"{n_process:>9} {elapsed:>8.2f} {rate:>9.0f} {rate / baseline:>7.2f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare peak memory (tracemalloc) and latency of anonymize_payload's
+copy-on-write rewrite against the previous deepcopy-then-walk version on
+multi-megabyte, EHR-shaped payloads.
+
+Usage:
+    python benchmarks/bench_payload_copy.py [--encounters 2000 8000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse.anonymize import anonymize_payload  # noqa: E402
+from bench_field_paths import legacy_anonymize_payload  # noqa: E402
+
+CONFIG = {"fields": ["patient.name", "patient.contact.email", "patient.contact.phone", "referrer.name"]}
+
+
+def ehr_payload(encounters: int) -> dict:
+    """A patient record with ``encounters`` nested visit entries."""
+    return {
+        "patient": {
+            "name": "Jane Doe",
+            "contact": {"email": "jane@example.com", "phone": "(555) 123-4567"},
+            "dob": "1980-01-01",
+        },
+        "referrer": {"name": "Dr. Fiona McCulloch", "clinic": "Sunnybrook Hospital"},
+        "encounters": {
+            f"enc-{i}": {
+                "date": "2024-03-15",
+                "provider": {"id": f"prov-{i % 50}", "department": "Internal Medicine"},
+                "vitals": {"bp": "120/80", "hr": 72, "temp": 36.8},
+                "notes": "Patient reports persistent headaches in the morning and mild fatigue. " * 4,
+                "codes": {"icd10": "R51", "cpt": "99213"},
+            }
+            for i in range(encounters)
+        },
+    }
+
+
+def measure(fn, payload: dict, repeat: int) -> tuple:
+    """Return (peak MB above baseline, best latency ms, output)."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    output = fn(payload, CONFIG)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payload, CONFIG)
+        timings.append(time.perf_counter() - start)
+    return peak / 1024 / 1024, min(timings) * 1000, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--encounters", type=int, nargs="+", default=[2000, 8000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'payload MB':>10} {'deepcopy peak MB':>17} {'COW peak MB':>12} "
+          f"{'deepcopy ms':>12} {'COW ms':>8}  identical")
+    for count in args.encounters:
+        payload = ehr_payload(count)
+        size_mb = len(json.dumps(payload)) / 1024 / 1024
+        legacy_peak, legacy_ms, legacy_out = measure(legacy_anonymize_payload, payload, args.repeat)
+        cow_peak, cow_ms, cow_out = measure(anonymize_payload, payload, args.repeat)
+        identical = legacy_out["message"] == cow_out["message"] and legacy_out["tokens"] == cow_out["tokens"]
+        print(f"{size_mb:>10.1f} {legacy_peak:>17.1f} {cow_peak:>12.1f} "
+              f"{legacy_ms:>12.1f} {cow_ms:>8.1f}  {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark the structured-PII pre-pass on the mixed small/medium/large corpus.
+
+Reports the scanner's own throughput, how much of the text it removes from
+what the detector sees (characters and whitespace-separated words), and the
+end-to-end anonymize_text throughput with ANYMOUSE_PII_PATTERNS off and on.
+The end-to-end rows use whichever engine is available (spaCy model or the
+regex fallback); the "engine" column says which.
+
+Usage:
+    python benchmarks/bench_pii_prepass.py [--copies 200] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse import anonymize_text  # noqa: E402
+from anymouse.anonymize import _get_nlp_model  # noqa: E402
+from anymouse.pii import find_pii, mask_spans  # noqa: E402
+from corpus import corpus_texts  # noqa: E402
+
+
+def best_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=200, help="Times the corpus is repeated")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Distinct copies so no layer can reuse earlier results
+    texts = [f"{text} (ref {copy})" for copy in range(args.copies) for text in corpus_texts()]
+    megabytes = sum(map(len, texts)) / 1024 / 1024
+
+    scan_ms = best_ms(lambda: [find_pii(text) for text in texts], args.repeat)
+    masked = [mask_spans(text, find_pii(text)) for text in texts]
+    chars = sum(len(text.strip()) for text in texts)
+    chars_left = sum(len(text.replace(" ", "")) for text in masked) / sum(len(text.replace(" ", "")) for text in texts)
+    words_left = sum(len(text.split()) for text in masked) / sum(len(text.split()) for text in texts)
+    print(f"corpus: {len(texts)} texts, {megabytes:.2f} MB, {chars:,} chars")
+    print(f"scanner: {megabytes / scan_ms * 1000:.1f} MB/s, spans: {sum(len(find_pii(text)) for text in texts):,}")
+    print(f"left for the detector: {chars_left:.0%} of non-space chars, {words_left:.0%} of words")
+
+    engine = "spacy" if _get_nlp_model() else "regex"
+    print(f"\n{'pre-pass':>8} {'engine':>7} {'ms':>9} {'MB/s':>7} {'texts/s':>9}")
+    for enabled in ("0", "1"):
+        os.environ["ANYMOUSE_PII_PATTERNS"] = enabled
+        elapsed = best_ms(lambda: [anonymize_text(text) for text in texts], args.repeat)
+        print(f"{'on' if enabled == '1' else 'off':>8} {engine:>7} {elapsed:>9.0f} "
+              f"{megabytes / elapsed * 1000:>7.2f} {len(texts) / elapsed * 1000:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark request parsing and response serialization per payload size.
+
+Parsing compares ``json.loads`` with ``orjson.loads``. The other rows time
+``anonymize_payload`` plus writing the response body:
+
+  string, json      message = json.dumps(payload), then json.dumps(result)
+  string, dumps     same message, result written by anymouse.serialization.dumps
+  object, json      message_format="object", json.dumps(result)
+  object, dumps     message_format="object", serialization.dumps(result)
+  object, msgpack   message_format="object", msgpack.packb(result)
+
+orjson and msgpack rows are skipped when the package is not installed.
+
+Usage:
+    python benchmarks/bench_serialization.py [--records 10 1000 100000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse import serialization  # noqa: E402
+from anymouse.anonymize import anonymize_payload  # noqa: E402
+from anymouse.serialization import dumps  # noqa: E402
+
+CONFIG = {"fields": ["patients[*].name", "patients[*].address.city"]}
+
+
+def bundle(records: int) -> dict:
+    return {"resourceType": "Bundle", "patients": [
+        {
+            "id": f"p{i}", "name": f"Patient {i}", "birthDate": "1980-01-01", "active": True,
+            "address": {"line": ["1 Main Street"], "city": "Springfield", "postalCode": "12345"},
+            "observations": [{"code": "8867-4", "value": 72.5, "unit": "/min"}],
+        }
+        for i in range(records)
+    ]}
+
+
+def best_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, nargs="+", default=[10, 1000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    orjson, msgpack = serialization.orjson, serialization.msgpack
+    print(f"orjson: {'yes' if orjson else 'no'}, msgpack: {'yes' if msgpack else 'no'}")
+    print(f"{'records':>8} {'bytes':>11} {'step':<16} {'ms':>9} {'MB/s':>8}")
+    for records in args.records:
+        payload = bundle(records)
+        request = json.dumps({"payload": payload, "config": CONFIG})
+        megabytes = len(request) / 1024 / 1024
+        as_string = anonymize_payload(payload, CONFIG)
+        as_object = anonymize_payload(payload, CONFIG, message_format="object")
+
+        rows = [("parse, json", lambda: json.loads(request))]
+        if orjson:
+            rows.append(("parse, orjson", lambda: orjson.loads(request)))
+        rows += [
+            ("string, json", lambda: json.dumps(anonymize_payload(payload, CONFIG))),
+            ("string, dumps", lambda: dumps(anonymize_payload(payload, CONFIG))),
+            ("object, json", lambda: json.dumps(anonymize_payload(payload, CONFIG, message_format="object"))),
+            ("object, dumps", lambda: dumps(anonymize_payload(payload, CONFIG, message_format="object"))),
+        ]
+        if msgpack:
+            rows.append(("object, msgpack",
+                         lambda: msgpack.packb(anonymize_payload(payload, CONFIG, message_format="object"))))
+        for name, fn in rows:
+            elapsed = best_ms(fn, args.repeat)
+            print(f"{records:>8} {len(request):>11,} {name:<16} {elapsed:>9.2f} {megabytes / elapsed * 1000:>8.1f}")
+        print(f"{'':>8} response bytes: string {len(dumps(as_string)):,}, object {len(dumps(as_object)):,}")
+
+
+if __name__ == "__main__":
+    main()
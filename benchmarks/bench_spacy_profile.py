@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Report spaCy model load time, per-document latency and resident memory for
+each pipeline profile (ANYMOUSE_SPACY_PROFILE) on the load_test.py corpus.
+
+Each profile runs in a fresh interpreter so load time and memory are not
+shared between measurements. Set SPACY_MODEL_PATH to test a model directory.
+
+Without a model package (no network, say), ``--synthetic DIR`` builds an
+untrained pipeline shaped like en_core_web_sm into DIR and measures that:
+the same components (tok2vec, tagger, attribute_ruler, parser, ner) with
+spaCy's CPU "efficiency" architectures. The weights are random, so entities
+are meaningless, but the time and memory each component costs are close to
+the real ones. The rule lemmatizer is left out; it needs spacy-lookups-data.
+
+Usage:
+    python benchmarks/bench_spacy_profile.py [--profiles full ner] [--rounds 20] [--synthetic DIR]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def build_synthetic_model(path: str) -> None:
+    """Write an untrained, en_core_web_sm-shaped pipeline to ``path``."""
+    import spacy
+    from spacy.cli.init_config import init_config
+    from spacy.training import Example
+
+    config = init_config(lang="en", pipeline=["tagger", "parser", "ner"], optimize="efficiency")
+    nlp = spacy.util.load_model_from_config(config, auto_fill=True)
+    attribute_ruler = nlp.add_pipe("attribute_ruler", after="tagger")
+    doc = nlp.make_doc("Jane Smith visited Toronto")
+    example = Example.from_dict(doc, {
+        "tags": ["NNP", "NNP", "VBD", "NNP"],
+        "heads": [1, 2, 2, 2],
+        "deps": ["compound", "nsubj", "ROOT", "dobj"],
+        "entities": ["B-PERSON", "L-PERSON", "O", "U-GPE"],
+    })
+    nlp.initialize(lambda: [example])
+    # Tag -> POS mappings, as in the real model; the EntityRuler title patterns match on POS.
+    # Added after initialize(), which clears the ruler.
+    for tag, pos in (("NNP", "PROPN"), ("VBD", "VERB")):
+        attribute_ruler.add(patterns=[[{"TAG": tag}]], attrs={"POS": pos})
+    nlp.to_disk(path)
+
+
+def run_worker(rounds: int) -> dict:
+    """Measure the profile selected by the environment, in this process."""
+    from corpus import corpus_texts
+
+    from anymouse import anonymize
+
+    start = time.perf_counter()
+    nlp = anonymize._get_nlp_model()
+    load_ms = (time.perf_counter() - start) * 1000
+    if nlp is None:
+        return {"error": "spaCy model could not be loaded"}
+
+    texts = corpus_texts()
+    anonymize.anonymize_text(texts[0])  # First inference allocates lazily
+    timings = []
+    for _ in range(rounds):
+        for text in texts:
+            start = time.perf_counter()
+            anonymize.anonymize_text(text)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "pipes": nlp.pipe_names,
+        "load_ms": load_ms,
+        "mean_ms": statistics.mean(timings),
+        "p95_ms": timings[int(len(timings) * 0.95) - 1],
+        # ru_maxrss is reported in KB on Linux
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["full", "ner"])
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over the corpus per profile")
+    parser.add_argument("--synthetic", metavar="DIR", help="build (if missing) and measure an untrained model in DIR")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.rounds)))
+        return
+    if args.synthetic:
+        if not os.path.isdir(args.synthetic):
+            build_synthetic_model(args.synthetic)
+        os.environ["SPACY_MODEL_PATH"] = args.synthetic
+
+    print(f"{'profile':<8} {'load ms':>8} {'mean ms/doc':>12} {'p95 ms/doc':>11} {'max RSS MB':>11}  pipes")
+    for profile in args.profiles:
+        env = dict(os.environ, ANYMOUSE_SPACY_PROFILE=profile)
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", "--rounds", str(args.rounds)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        report = json.loads(output.strip().splitlines()[-1])
+        if "error" in report:
+            print(f"{profile:<8} {report['error']}")
+            continue
+        print(f"{profile:<8} {report['load_ms']:>8.0f} {report['mean_ms']:>12.2f} {report['p95_ms']:>11.2f} "
+              f"{report['max_rss_mb']:>11.0f}  {','.join(report['pipes'])}")
+
+
+if __name__ == "__main__":
+    main()
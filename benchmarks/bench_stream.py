@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming anonymization against the parse-everything path on large documents.
+
+The dict path is what the handler did for every body: ``json.loads``, then
+``anonymize_payload`` (which serializes the result). The streaming path
+reads the same document in chunks with ``anonymize_stream``, from a file on
+disk and from the body string. Peak Python memory is measured with
+tracemalloc and excludes the input string itself.
+
+Usage:
+    python benchmarks/bench_stream.py [--megabytes 10 50] [--repeat 3]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from anymouse.anonymize import anonymize_payload  # noqa: E402
+from anymouse.stream import anonymize_stream  # noqa: E402
+
+FIELDS = ["patients[*].name", "patients[*].address.city"]
+
+
+def document(megabytes: int) -> str:
+    record = {
+        "id": "p0", "name": "Patient Name", "birthDate": "1980-01-01", "active": True,
+        "address": {"line": ["1 Main Street"], "city": "Springfield", "postalCode": "12345"},
+        "observations": [{"code": "8867-4", "value": 72.5, "unit": "/min"}] * 3,
+    }
+    size = len(json.dumps(record)) + 2
+    records = megabytes * 1024 * 1024 // size
+    return json.dumps({"resourceType": "Bundle", "patients": [
+        {**record, "id": f"p{i}", "name": f"Patient {i}"} for i in range(records)
+    ]})
+
+
+class NullSink:
+    def write(self, text):
+        pass
+
+
+def measure(fn, repeat: int) -> tuple:
+    """Best wall time in ms and peak traced memory in MB of ``fn``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings) * 1000, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    config = {"fields": FIELDS}
+    print(f"{'size':>6} {'path':<22} {'ms':>9} {'MB/s':>7} {'peak MB':>9}")
+    for megabytes in args.megabytes:
+        text = document(megabytes)
+        actual = len(text) / 1024 / 1024
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as handle:
+            handle.write(text)
+        try:
+            sink = io.StringIO()
+            anonymize_stream(text, sink, config)
+            assert sink.getvalue() == anonymize_payload(json.loads(text), config)["message"]
+
+            def from_file():
+                with open(handle.name, "rb") as source:
+                    anonymize_stream(source, NullSink(), config)
+
+            rows = [
+                ("loads + payload", lambda: anonymize_payload(json.loads(text), config)),
+                ("stream, file -> null", from_file),
+                ("stream, str -> str", lambda: anonymize_stream(text, io.StringIO(), config)),
+            ]
+            for name, fn in rows:
+                elapsed, peak = measure(fn, args.repeat)
+                print(f"{actual:>5.0f}M {name:<22} {elapsed:>9.0f} {actual / elapsed * 1000:>7.1f} {peak:>9.1f}")
+        finally:
+            os.unlink(handle.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ from typing import List, Dict, Any
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from benchmarks.corpus import generate_payloads
+
 
 @dataclass
 class TestResult:
@@ -127,77 +129,7 @@ class LoadTester:
     
     def _generate_payloads(self, payload_type: str) -> List[Dict[str, Any]]:
         """Generate test payloads of different sizes."""
-        if payload_type == "small":
-            return [
-                {"payload": "Hello Dr. Smith"},
-                {"payload": "Message for Jane Doe"},
-                {"payload": "Appointment with Dr. Johnson"},
-                {"payload": "Call from Mary Wilson"},
-                {"payload": "Note about John Davis"}
-            ]
-        elif payload_type == "medium":
-            base_text = "Hello Dr. Smith, I have a question about my prescription. Please call me back at your earliest convenience. Thank you, Jane Doe."
-            return [
-                {"payload": base_text},
-                {"payload": base_text.replace("Dr. Smith", "Dr. Johnson").replace("Jane Doe", "Mary Wilson")},
-                {"payload": base_text.replace("Dr. Smith", "Dr. Brown").replace("Jane Doe", "John Davis")},
-                {"payload": base_text + " Additional notes about the patient's condition and medical history."},
-                {"payload": base_text + " Please review the attached lab results and imaging studies."}
-            ]
-        elif payload_type == "large":
-            # Large email-like payloads
-            email_template = """
-            From: {sender}
-            To: medical-staff@clinic.com
-            Subject: Patient Consultation Request
-            
-            Dear {doctor},
-            
-            I hope this message finds you well. I am writing to request a consultation regarding my recent medical concerns. Over the past few weeks, I have been experiencing some symptoms that I believe warrant professional medical attention.
-            
-            My current symptoms include:
-            - Persistent headaches that occur mainly in the morning
-            - Occasional dizziness when standing up quickly
-            - Mild fatigue throughout the day
-            - Some difficulty concentrating during work hours
-            
-            I have been taking the medications you prescribed during my last visit on {date}, but I'm not sure if they are helping with these new symptoms. I would appreciate the opportunity to discuss these concerns with you at your earliest convenience.
-            
-            Please let me know when you might have an opening in your schedule. I am flexible with timing and can accommodate most weekday appointments.
-            
-            Thank you for your time and continued care.
-            
-            Best regards,
-            {patient}
-            
-            Contact Information:
-            Phone: (555) 123-4567
-            Email: patient@email.com
-            Address: 123 Main Street, Anytown, State 12345
-            """
-            
-            return [
-                {"payload": email_template.format(
-                    sender="jane.doe@email.com",
-                    doctor="Dr. Smith",
-                    date="March 15, 2024",
-                    patient="Jane Doe"
-                )},
-                {"payload": email_template.format(
-                    sender="john.wilson@email.com", 
-                    doctor="Dr. Johnson",
-                    date="March 20, 2024",
-                    patient="John Wilson"
-                )},
-                {"payload": email_template.format(
-                    sender="mary.davis@email.com",
-                    doctor="Dr. Brown", 
-                    date="March 25, 2024",
-                    patient="Mary Davis"
-                )}
-            ]
-        else:
-            raise ValueError(f"Unknown payload type: {payload_type}")
+        return generate_payloads(payload_type)
     
     def analyze_results(self) -> Dict[str, Any]:
         """Analyze test results and return metrics."""
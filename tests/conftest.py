@@ -0,0 +1,17 @@
+import pytest
+
+from anymouse import aws, config, lambda_handler
+
+
+@pytest.fixture(autouse=True)
+def reset_warm_state():
+    """Give every test a cold container: no pooled clients or cached keys/configs/plans."""
+    aws.reset_clients()
+    lambda_handler.clear_api_key_cache()
+    config.clear_config_cache()
+    config.clear_config_plans()
+    yield
+    aws.reset_clients()
+    lambda_handler.clear_api_key_cache()
+    config.clear_config_cache()
+    config.clear_config_plans()
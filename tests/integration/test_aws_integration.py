@@ -89,6 +89,46 @@ class TestSSMIntegration:
         result = get_api_key_from_ssm()
         assert result == 'test-api-key-123'
 
+    @mock_ssm
+    def test_api_key_cached_across_invocations(self, monkeypatch):
+        """Warm invocations reuse the cached key instead of calling SSM."""
+        from anymouse import lambda_handler as handler
+        from anymouse.aws import get_client
+
+        monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+        ssm = get_client('ssm')
+        ssm.put_parameter(Name='/anymouse/api-key', Value='rotating-key-1', Type='SecureString')
+        calls = []
+        ssm.meta.events.register(
+            'before-call.ssm.GetParameter', lambda **kwargs: calls.append(kwargs)
+        )
+
+        def event(key):
+            return {
+                "httpMethod": "POST",
+                "path": "/config/test",
+                "body": json.dumps({"config": {"fields": ["name"]}}),
+                "headers": {"X-API-Key": key}
+            }
+
+        for _ in range(5):
+            assert handler.lambda_handler(event('rotating-key-1'), {})["statusCode"] == 200
+        assert len(calls) == 1
+
+        # Rotated key: the first failed auth triggers one refresh
+        ssm.put_parameter(Name='/anymouse/api-key', Value='rotating-key-2', Type='SecureString', Overwrite=True)
+        monkeypatch.setattr(handler, "API_KEY_RETRY_SECONDS", 0)
+        assert handler.lambda_handler(event('rotating-key-2'), {})["statusCode"] == 200
+        assert len(calls) == 2
+        assert handler.lambda_handler(event('rotating-key-2'), {})["statusCode"] == 200
+        assert len(calls) == 2
+
+        # Bad keys within the retry window do not reach SSM
+        monkeypatch.setattr(handler, "API_KEY_RETRY_SECONDS", 3600)
+        for _ in range(3):
+            assert handler.lambda_handler(event('wrong-key'), {})["statusCode"] == 401
+        assert len(calls) == 2
+
 
 class TestLambdaIntegration:
     """Test Lambda function integration."""
@@ -1,7 +1,7 @@
 import json
 import pytest
 from anymouse.anonymize import anonymize_payload
-from anymouse.deanonymize import deanonymize_payload
+from anymouse.deanonymize import deanonymize_payload, deanonymize_value
 
 def test_recursive_anonymization():
     payload = {
@@ -57,4 +57,156 @@ def test_recursive_deanonymization_round_trip():
     
     assert restored_dict == original_payload
     assert "Dr. Fiona McCulloch" in dean_result["message"]  # Ensure originals are restored
-    assert "[name3]" not in dean_result["message"]  # Placeholders gone
\ No newline at end of file
+    assert "[name3]" not in dean_result["message"]  # Placeholders gone
+
+def test_anonymization_follows_payload_key_order():
+    payload = {"b": {"x": "B"}, "a": "A", "c": {"skip": {"deep": "not targeted"}}}
+    result = anonymize_payload(payload, {"fields": ["a", "b.x", "missing.path"]})
+    assert result["message"] == json.dumps({"b": {"x": "[name1]"}, "a": "[name2]", "c": {"skip": {"deep": "not targeted"}}})
+    assert result["tokens"] == {"[name1]": "B", "[name2]": "A"}
+    assert payload["a"] == "A"  # Input is left untouched
+
+
+@pytest.mark.parametrize("payload", [
+    {"a.b": "dotted", "a": {"b": "nested", "c": {"d": "deep"}}, "e": "not-a-dict"},
+    {"e": "not-a-dict", "a": {"c": {"d": "deep"}, "b": "nested"}, "a.b": "dotted"},
+])
+def test_anonymization_edge_paths(payload):
+    # Keys containing dots match the joined path, like the string comparison did
+    result = anonymize_payload(payload, {"fields": ["a.b", "a.c", "e.f"]})
+    message, tokens = json.loads(result["message"]), result["tokens"]
+    assert len(tokens) == 3 and message["e"] == "not-a-dict"
+    assert tokens[message["a.b"]] == "dotted"
+    assert tokens[message["a"]["b"]] == "nested"
+    assert tokens[message["a"]["c"]] == {"d": "deep"}
+
+    # A configured parent replaces the whole subtree
+    result = anonymize_payload({"a": {"b": "x"}}, {"fields": ["a", "a.b"]})
+    assert result["tokens"] == {"[name1]": {"b": "x"}}
+
+
+@pytest.mark.parametrize("payload", [{"a": {"b": "x"}, "a.b": "y"}, {"a.b": "y", "a": {"b": "x"}}])
+def test_dotted_key_and_nested_path_are_both_replaced(payload):
+    # Both spellings of "a.b" reach the same plan node; neither may be skipped
+    result = anonymize_payload(payload, {"fields": ["a.b"]})
+    message = json.loads(result["message"])
+    assert sorted(result["tokens"].values()) == ["x", "y"]
+    assert result["tokens"][message["a"]["b"]] == "x" and result["tokens"][message["a.b"]] == "y"
+
+
+def test_anonymization_copies_only_changed_paths():
+    untouched = {"history": {"notes": ["a", "b"]}}
+    payload = {"patient": {"name": "Jane Doe", "ids": {"mrn": "123"}}, "record": untouched}
+    snapshot = json.dumps(payload)
+    result = anonymize_payload(payload, {"fields": ["patient.ids"]})
+
+    assert json.dumps(payload) == snapshot  # Input is never modified
+    assert json.loads(result["message"]) == {"patient": {"name": "Jane Doe", "ids": "[name1]"}, "record": untouched}
+    # Token values are independent of the caller's containers
+    result["tokens"]["[name1]"]["mrn"] = "changed"
+    assert payload["patient"]["ids"]["mrn"] == "123"
+
+
+def test_deanonymization_raw_substitution_escapes_values():
+    from anymouse import deanonymize
+    tokens = {"[name1]": 'Jane "JD" Doe', "[name2]": "C:\\path\nline", "[name3]": "Zoë"}
+    message = json.dumps({"a": "[name1] and [name2]", "b": {"c": "[name3]", "d": "[name9]"}})
+    assert deanonymize._can_substitute_raw(message, tokens)
+    result = deanonymize_payload({"message": message, "tokens": tokens}, {})
+    assert json.loads(result["message"]) == {
+        "a": 'Jane "JD" Doe and C:\\path\nline',
+        "b": {"c": "Zoë", "d": "[name9]"}
+    }
+    assert result["message"] == deanonymize._deanonymize_tree(message, tokens)["message"]
+
+
+def test_deanonymization_falls_back_to_tree_walk():
+    from anymouse import deanonymize
+    tokens = {"[name1]": "Jane"}
+    key_message = json.dumps({"[name1]": "[name1]"})
+    list_message = json.dumps({"a": ["[name1]", {"c": "[name1]"}], "b": "[name1]"})
+    object_tokens = {"[name1]": {"x": [1, "[name2]"]}}
+    assert not deanonymize._can_substitute_raw(key_message, tokens)
+    assert deanonymize._can_substitute_raw(list_message, tokens)
+    assert not deanonymize._can_substitute_raw(json.dumps({"a": "[name1]"}), object_tokens)
+
+    # Keys are left alone, exactly as before
+    key_result = deanonymize_payload({"message": key_message, "tokens": tokens}, {})
+    assert json.loads(key_result["message"]) == {"[name1]": "Jane"}
+    # Lists are walked by both paths
+    list_result = deanonymize_payload({"message": list_message, "tokens": tokens}, {})
+    assert json.loads(list_result["message"]) == {"a": ["Jane", {"c": "Jane"}], "b": "Jane"}
+    assert list_result["message"] == deanonymize._deanonymize_tree(list_message, tokens)["message"]
+    # Whole-field placeholders restore non-string values
+    object_message = json.dumps({"a": ["[name1]"], "b": "see [name1]"})
+    object_result = deanonymize_payload({"message": object_message, "tokens": object_tokens}, {})
+    assert json.loads(object_result["message"]) == {"a": [{"x": [1, "[name2]"]}], "b": "see [name1]"}
+
+    not_json = deanonymize_payload({"message": "plain [name1]", "tokens": tokens}, {})
+    assert not_json == {"message": "plain [name1]"}
+
+
+def test_list_and_wildcard_paths_round_trip():
+    payload = {
+        "resourceType": "Bundle",
+        "entry": [
+            {"resource": {"name": "Jane Doe", "birthDate": "1980-01-01"}},
+            {"resource": {"name": "John Roe", "birthDate": "1975-05-05"}},
+        ],
+        "patients": [{"name": "Ann Lee", "mrn": "1"}, {"name": "Bo Chen", "mrn": "2"}],
+        "contacts": {"home": {"phone": "555-1234"}, "work": {"phone": "555-9876"}},
+        "matrix": [["a", "b"], ["c", "d"]],
+    }
+    snapshot = json.dumps(payload)
+    config = {"fields": ["entry[*].resource.name", "patients[-1].name", "contacts.*.phone", "matrix[0][1]", "entry.*.resource.birthDate"]}
+    result = anonymize_payload(payload, config)
+
+    assert json.dumps(payload) == snapshot  # Input is never modified
+    anonymized = json.loads(result["message"])
+    assert anonymized["entry"] == [
+        {"resource": {"name": "[name1]", "birthDate": "[name2]"}},
+        {"resource": {"name": "[name3]", "birthDate": "[name4]"}},
+    ]
+    assert anonymized["patients"] == [{"name": "Ann Lee", "mrn": "1"}, {"name": "[name5]", "mrn": "2"}]
+    assert anonymized["contacts"] == {"home": {"phone": "[name6]"}, "work": {"phone": "[name7]"}}
+    assert anonymized["matrix"] == [["a", "[name8]"], ["c", "d"]]
+    assert anonymized["patients"][0] is not None and result["tokens"]["[name5]"] == "Bo Chen"
+
+    restored = deanonymize_payload({"message": result["message"], "tokens": result["tokens"]}, config)
+    assert json.loads(restored["message"]) == payload
+
+
+def test_list_elements_as_whole_fields():
+    payload = {"visits": [{"date": "2024-01-01"}, {"date": "2024-02-01"}], "tags": ["a", "b"]}
+    result = anonymize_payload(payload, {"fields": ["visits[*]", "tags[1]", "missing[*].x", "tags[5]"]})
+    assert json.loads(result["message"]) == {"visits": ["[name1]", "[name2]"], "tags": ["a", "[name3]"]}
+    assert result["tokens"]["[name1]"] == {"date": "2024-01-01"}
+    restored = deanonymize_payload({"message": result["message"], "tokens": result["tokens"]}, {})
+    assert json.loads(restored["message"]) == payload
+
+
+@pytest.mark.parametrize("fields, payload, expected", [
+    (["a[0].x", "a[-1].y"], {"a": [{"x": 1, "y": 2}]}, {"a": [{"x": "[name1]", "y": "[name2]"}]}),
+    (["a[*].x", "a[0].y", "a[-1].z"], {"a": [{"x": 1, "y": 2, "z": 3}]},
+     {"a": [{"x": "[name1]", "y": "[name2]", "z": "[name3]"}]}),
+    (["a[*].x", "a[0].y", "a[-1].z"], {"a": [{"x": 1, "y": 2, "z": 3}, {"x": 4, "y": 5, "z": 6}]},
+     {"a": [{"x": "[name1]", "y": "[name2]", "z": 3}, {"x": "[name3]", "y": 5, "z": "[name4]"}]}),
+    (["m[0][0]", "m[-1][-1]"], {"m": [[1, 2]]}, {"m": [["[name1]", "[name2]"]]}),
+])
+def test_positive_and_negative_index_on_one_element(fields, payload, expected):
+    # Both indices name the same element, so the fields of both paths apply to it
+    result = anonymize_payload(payload, {"fields": fields})
+    assert json.loads(result["message"]) == expected
+    assert json.loads(anonymize_payload(payload, {"fields": fields})["message"]) == expected  # Cached merged node
+
+
+def test_object_message_format():
+    payload = {"patient": {"name": "Jane Doe", "tags": ["a"]}, "ward": 3}
+    config = {"fields": ["patient.name", "patient.tags"]}
+    result = anonymize_payload(payload, config, message_format="object")
+    assert result["message"] == {"patient": {"name": "[name1]", "tags": "[name2]"}, "ward": 3}
+    assert json.dumps(result["message"]) == anonymize_payload(payload, config)["message"]
+    assert payload["patient"]["name"] == "Jane Doe"
+    assert deanonymize_value(result["message"], result["tokens"]) == payload
+    with pytest.raises(ValueError, match="message_format"):
+        anonymize_payload(payload, config, message_format="xml")
@@ -0,0 +1,62 @@
+import json
+
+from anymouse.cli import main
+
+
+def _write_lines(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+
+def _read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_cli_round_trip(tmp_path):
+    records = [
+        {"id": "a", "payload": "Alice met Bob at the park."},
+        {"id": "b", "payload": {"patient_name": "Jane \"JD\" Doe", "appointment": {"doctor": "Dr. Who"}}},
+        {"id": "c", "payload": "Hello world."},
+    ] * 5
+    _write_lines(tmp_path / "in.jsonl", records)
+    (tmp_path / "config.json").write_text(json.dumps({"fields": ["patient_name", "appointment.doctor"]}))
+
+    status = main([
+        "anonymize", "-i", str(tmp_path / "in.jsonl"), "-o", str(tmp_path / "out.jsonl"),
+        "-t", str(tmp_path / "tokens.jsonl"), "-c", str(tmp_path / "config.json"), "--batch-size", "2", "-q",
+    ])
+    assert status == 0
+    anonymized = _read_lines(tmp_path / "out.jsonl")
+    sidecar = _read_lines(tmp_path / "tokens.jsonl")
+    assert [r["id"] for r in anonymized] == [r["id"] for r in records]
+    assert [r["id"] for r in sidecar] == [r["id"] for r in records]
+    assert "Jane" not in (tmp_path / "out.jsonl").read_text()
+    assert anonymized[1]["structured"] is True
+    assert sidecar[1]["tokens"] == {"[name1]": "Jane \"JD\" Doe", "[name2]": "Dr. Who"}
+
+    status = main([
+        "deanonymize", "-i", str(tmp_path / "out.jsonl"), "-t", str(tmp_path / "tokens.jsonl"),
+        "-o", str(tmp_path / "restored.jsonl"), "-q",
+    ])
+    assert status == 0
+    restored = _read_lines(tmp_path / "restored.jsonl")
+    for original, result in zip(records, restored):
+        payload = original["payload"]
+        if isinstance(payload, dict):
+            assert json.loads(result["message"]) == payload
+        else:
+            assert result["message"] == payload
+
+
+def test_cli_reports_bad_records_and_keeps_alignment(tmp_path, capsys):
+    (tmp_path / "in.jsonl").write_text('not json\n{"payload": {"name": "x"}}\n{"payload": "Alice"}\n')
+    status = main([
+        "anonymize", "-i", str(tmp_path / "in.jsonl"), "-o", str(tmp_path / "out.jsonl"),
+        "-t", str(tmp_path / "tokens.jsonl"),
+    ])
+    assert status == 1
+    anonymized = _read_lines(tmp_path / "out.jsonl")
+    assert anonymized[0]["error"].startswith("Invalid JSON")
+    assert anonymized[1]["error"] == "Structured payload requires --config"
+    assert "message" in anonymized[2]
+    assert len(_read_lines(tmp_path / "tokens.jsonl")) == 3
+    assert "action=anonymize status=done records=3 errors=2" in capsys.readouterr().err
@@ -9,7 +9,7 @@ def test_s3_config_loading():
         "Body": type('obj', (), {'read': lambda self: json.dumps({"fields": ["patient_name", "appointment.doctor"]}).encode('utf-8')})()
     }
     
-    with patch("boto3.client") as mock_boto_client:
+    with patch("anymouse.config.get_client") as mock_boto_client:
         mock_s3 = mock_boto_client.return_value
         mock_s3.get_object.return_value = mock_s3_config
         
@@ -21,7 +21,7 @@ def test_s3_config_loading():
         "Body": type('obj', (), {'read': lambda self: json.dumps({"fields": "not-a-list"}).encode('utf-8')})()
     }
     
-    with patch("boto3.client") as mock_boto_client:
+    with patch("anymouse.config.get_client") as mock_boto_client:
         mock_s3 = mock_boto_client.return_value
         mock_s3.get_object.return_value = mock_invalid_config
         
@@ -43,4 +43,99 @@ def test_validate_config():
 
     empty_config = {}
     result = validate_config(empty_config)
-    assert result == {"fields": []}
\ No newline at end of file
+    assert result == {"fields": []}
+
+def _s3_response(config, etag):
+    body = json.dumps(config).encode('utf-8')
+    return {"Body": type('obj', (), {'read': lambda self: body})(), "ETag": etag}
+
+
+def test_s3_config_cache_revalidates_with_etag(monkeypatch):
+    import botocore.exceptions
+    from anymouse import config as config_module
+
+    not_modified = botocore.exceptions.ClientError(
+        {"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject"
+    )
+    with patch("anymouse.config.get_client") as mock_get_client:
+        mock_s3 = mock_get_client.return_value
+        mock_s3.get_object.return_value = _s3_response({"fields": ["name"]}, '"v1"')
+
+        assert load_config_from_s3("my-bucket", "config.json") == {"fields": ["name"]}
+        assert load_config_from_s3("my-bucket", "config.json") == {"fields": ["name"]}
+        assert mock_s3.get_object.call_count == 1
+
+        # Past the TTL: conditional GET, 304 keeps the cached config
+        monkeypatch.setattr(config_module, "CONFIG_CACHE_TTL_SECONDS", 0)
+        mock_s3.get_object.side_effect = not_modified
+        assert load_config_from_s3("my-bucket", "config.json") == {"fields": ["name"]}
+        assert mock_s3.get_object.call_args.kwargs["IfNoneMatch"] == '"v1"'
+
+        # Changed object: new body replaces the cached entry
+        mock_s3.get_object.side_effect = None
+        mock_s3.get_object.return_value = _s3_response({"fields": ["other"]}, '"v2"')
+        assert load_config_from_s3("my-bucket", "config.json") == {"fields": ["other"]}
+
+
+def test_s3_config_cache_is_bounded(monkeypatch):
+    from anymouse import config as config_module
+
+    monkeypatch.setattr(config_module, "CONFIG_CACHE_SIZE", 2)
+    with patch("anymouse.config.get_client") as mock_get_client:
+        mock_s3 = mock_get_client.return_value
+        mock_s3.get_object.side_effect = lambda **kw: _s3_response({"fields": [kw["Key"]]}, '"etag"')
+        for key in ("a.json", "b.json", "c.json"):
+            load_config_from_s3("my-bucket", key)
+        assert list(config_module._S3_CONFIG_CACHE) == [("my-bucket", "b.json"), ("my-bucket", "c.json")]
+
+        # Returned configs are copies; mutating one does not poison the cache
+        load_config_from_s3("my-bucket", "c.json")["fields"].append("mutated")
+        assert load_config_from_s3("my-bucket", "c.json") == {"fields": ["c.json"]}
+
+
+def test_prefetch_configs():
+    from anymouse.config import prefetch_configs
+
+    with patch("anymouse.config.get_client") as mock_get_client:
+        mock_s3 = mock_get_client.return_value
+        mock_s3.get_object.side_effect = lambda **kw: _s3_response({"fields": ["name"]}, '"etag"')
+        loaded = prefetch_configs("s3://my-bucket/a.json, my-bucket/nested/b.json, not-an-entry")
+        assert loaded == 2
+        load_config_from_s3("my-bucket", "nested/b.json")
+        assert mock_s3.get_object.call_count == 2
+
+def test_compile_config_caches_plans_by_content(monkeypatch):
+    from anymouse import config
+    from anymouse.config import ConfigPlan, compile_config, config_plan_stats
+
+    plan = compile_config({"fields": ["patients[*].name", "id"]})
+    assert isinstance(plan, ConfigPlan)
+    assert plan.fields == ("patients[*].name", "id") and plan.streamable
+    assert plan.to_dict() == {"fields": ["patients[*].name", "id"]}
+
+    # Same content in a new dict: no validation, same plan
+    with patch("anymouse.config.validate_config", side_effect=AssertionError("validated again")):
+        assert compile_config({"fields": ["patients[*].name", "id"]}) is plan
+    assert config_plan_stats() == {"hits": 1, "misses": 1, "size": 1}
+    assert not compile_config({"fields": ["items[-1]"]}).streamable
+
+    with pytest.raises(ValueError, match="Fields must be a list of strings"):
+        compile_config({"fields": "name"})
+    assert config_plan_stats()["size"] == 2  # Invalid configs are not cached
+
+    monkeypatch.setattr(config, "CONFIG_PLAN_CACHE_SIZE", 2)
+    compile_config({"fields": ["c"]})
+    assert config_plan_stats()["size"] == 2
+    assert compile_config({"fields": ["patients[*].name", "id"]}) is not plan  # Least recently used, evicted
+
+
+def test_anonymize_payload_accepts_plan():
+    from anymouse.anonymize import anonymize_payload
+    from anymouse.config import compile_config
+
+    payload = {"name": "Alice", "id": 7}
+    plan = compile_config({"fields": ["name"]})
+    assert anonymize_payload(payload, plan) == anonymize_payload(payload, {"fields": ["name"]})
+    result = anonymize_payload(payload, plan, message_format="object")
+    result["fields"].append("id")  # Results never share the cached plan's state
+    assert plan.fields == ("name",)
@@ -0,0 +1,104 @@
+import json
+import random
+import re
+
+import pytest
+
+from anymouse import anonymize, anonymize_text, deanonymize_text
+from anymouse import gazetteer
+from anymouse.gazetteer import Gazetteer, _Automaton, load_gazetteer, merge_spans, set_gazetteer
+
+
+@pytest.fixture
+def clinic_terms():
+    shared = Gazetteer({"PERSON": ["Raj Patel", "Jane Okafor"], "ORG": ["Sunnybrook", "Sunnybrook Hospital"]})
+    set_gazetteer(shared)
+    yield shared
+    set_gazetteer(None)
+
+
+def test_leftmost_longest_whole_word_matches():
+    terms = Gazetteer({"ORG": ["Sunnybrook", "Sunnybrook Hospital", "Acme"], "PERSON": ["Al"]})
+    text = "Al went to Sunnybrook Hospital, not Acmeco or Sunnybrook. Also Alan."
+    assert terms.find(text) == [
+        (0, 2, "Al", "PERSON"),
+        (11, 30, "Sunnybrook Hospital", "ORG"),
+        (46, 56, "Sunnybrook", "ORG"),
+    ]
+
+
+def test_ignore_case_keeps_original_text():
+    terms = Gazetteer({"ORG": ["Acme Corp"]}, ignore_case=True)
+    assert terms.find("ACME CORP and acme corporation") == [(0, 9, "ACME CORP", "ORG")]
+
+
+def test_unknown_label_rejected():
+    with pytest.raises(ValueError):
+        Gazetteer({"EMAIL": ["a@example.com"]})
+
+
+def test_pure_python_automaton_matches_every_occurrence():
+    rng = random.Random(7)
+    words = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(60)]
+    text = "".join(rng.choice("abc") for _ in range(500))
+    automaton = _Automaton()
+    for word in set(words):
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    found = sorted((end - len(word) + 1, word) for end, word in automaton.iter(text))
+    expected = sorted(
+        (match.start(), word) for word in set(words) for match in re.finditer(f"(?={re.escape(word)})", text)
+    )
+    assert found == expected
+
+
+def test_merge_spans_prefers_dictionary_spans():
+    preferred = [(10, 29, "Sunnybrook Hospital", "ORG")]
+    others = [(0, 5, "Alice", "PERSON"), (10, 20, "Sunnybrook", "GPE"), (35, 40, "Paris", "GPE")]
+    assert merge_spans(preferred, others) == [others[0], preferred[0], others[2]]
+
+
+def test_load_gazetteer_from_file(tmp_path):
+    path = tmp_path / "terms.json"
+    path.write_text(json.dumps({"ignore_case": True, "ORG": ["Northside Clinic"]}))
+    terms = load_gazetteer(str(path))
+    assert terms.ignore_case
+    assert terms.find("seen at northside clinic") == [(8, 24, "northside clinic", "ORG")]
+
+
+def test_load_gazetteer_from_s3(monkeypatch):
+    class Body:
+        def read(self):
+            return b'{"PERSON": ["Raj Patel"]}'
+
+    class Client:
+        def get_object(self, Bucket, Key):
+            assert (Bucket, Key) == ("configs", "gazetteer.json")
+            return {"Body": Body()}
+
+    monkeypatch.setattr("anymouse.aws.get_client", lambda service: Client())
+    assert load_gazetteer("s3://configs/gazetteer.json").size == 1
+
+
+def test_anonymize_text_uses_gazetteer(monkeypatch, clinic_terms):
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: None)
+    text = "raj patel is fine. Raj Patel called Sunnybrook Hospital about Jane Okafor."
+    result = anonymize_text(text)
+    assert result["message"] == "raj patel is fine. [name1] called [org1] about [name2]."
+    assert result["tokens"] == {"[name1]": "Raj Patel", "[org1]": "Sunnybrook Hospital", "[name2]": "Jane Okafor"}
+    assert deanonymize_text(result["message"], result["tokens"]) == text
+    assert list(anonymize.anonymize_texts([text])) == [result]
+
+
+def test_gazetteer_span_wins_over_ner(monkeypatch, clinic_terms):
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "GPE", "pattern": "Sunnybrook"}])
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: nlp)
+    result = anonymize_text("Admitted to Sunnybrook Hospital.")
+    assert result["tokens"] == {"[org1]": "Sunnybrook Hospital"}
+
+
+def test_gazetteer_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("ANYMOUSE_GAZETTEER", raising=False)
+    assert gazetteer.configure_gazetteer() is None
@@ -1,4 +1,8 @@
+import base64
+import gzip
 import json
+import subprocess
+import sys
 from unittest.mock import patch
 import pytest
 from anymouse.lambda_handler import lambda_handler
@@ -126,7 +130,7 @@ def test_config_test_endpoint():
     response_body = json.loads(invalid_response["body"])
     assert response_body["error"].startswith("Invalid config: ")
 
-@patch("anymouse.config.boto3.client")
+@patch("anymouse.config.get_client")
 def test_lambda_handler_s3_config(mock_boto_client):
     mock_s3_config = {
         "Body": type('obj', (), {'read': lambda self: json.dumps({"fields": ["name"]}).encode('utf-8')})()
@@ -223,4 +227,289 @@ def test_missing_deanonymize_fields():
     response = lambda_handler(event, {})
     assert response["statusCode"] == 400
     response_body = json.loads(response["body"])
-    assert response_body["error"] == "Missing 'message' or 'tokens' field"
\ No newline at end of file
+    assert response_body["error"] == "Missing 'message' or 'tokens' field"
+
+def test_anonymize_batch_endpoint():
+    """Test /anonymize/batch with mixed items and per-item status."""
+    event = {
+        "httpMethod": "POST",
+        "path": "/anonymize/batch",
+        "body": json.dumps({
+            "payloads": [
+                "Message for Jane Doe",
+                {"name": "Alice"},
+                42,
+                "Message for Jane Doe"
+            ],
+            "config": {"fields": ["name"]},
+            "batch_size": 2
+        }),
+        "headers": {"X-API-Key": "test-api-key-123"}
+    }
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 200
+    results = json.loads(response["body"])["results"]
+    assert len(results) == 4
+    assert results[0]["status"] == 200
+    assert results[0] == results[3]
+    assert results[1]["status"] == 200
+    assert results[1]["tokens"] == {"[name1]": "Alice"}
+    assert results[2]["status"] == 400
+    assert results[2]["error"].startswith("Invalid item: ")
+
+def test_anonymize_batch_invalid_request():
+    """Test /anonymize/batch rejects a missing list or bad batch size."""
+    for body in ({"payloads": "not-a-list"}, {"payloads": ["a"], "batch_size": 0}):
+        event = {
+            "httpMethod": "POST",
+            "path": "/anonymize/batch",
+            "body": json.dumps(body),
+            "headers": {"X-API-Key": "test-api-key-123"}
+        }
+        response = lambda_handler(event, {})
+        assert response["statusCode"] == 400
+
+@pytest.mark.parametrize("payloads", [["Hi Bob", {"name": "x"}], ["Hi Bob"]])
+def test_anonymize_batch_invalid_config_rejected_before_ner(payloads):
+    """A bad config fails the batch whatever its items, without running NER first."""
+    event = {
+        "httpMethod": "POST",
+        "path": "/anonymize/batch",
+        "body": json.dumps({"payloads": payloads, "config": {"fields": "bad"}}),
+        "headers": {"X-API-Key": "test-api-key-123"}
+    }
+    with patch("anymouse.lambda_handler.anonymize_texts", side_effect=AssertionError("NER ran")):
+        response = lambda_handler(event, {})
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["error"].startswith("Invalid request: ")
+
+def test_anonymize_engine_option():
+    """/anonymize reports the engine used and rejects unknown engines or budgets."""
+    def call(**options):
+        event = {
+            "httpMethod": "POST",
+            "path": "/anonymize",
+            "body": json.dumps({"payload": "note for Jane Smith", **options}),
+            "headers": {"X-API-Key": "test-api-key-123"}
+        }
+        return lambda_handler(event, {})
+
+    response = call(engine="regex")
+    assert response["statusCode"] == 200
+    response_body = json.loads(response["body"])
+    assert response_body["engine"] == "regex"
+    assert response_body["tokens"] == {"[name1]": "Jane Smith"}
+    for options in ({"engine": "bert"}, {"latency_budget_ms": "fast"}, {"latency_budget_ms": -5}):
+        assert call(**options)["statusCode"] == 400
+
+def test_anonymize_streams_large_bodies(monkeypatch):
+    """Bodies over ANYMOUSE_STREAM_MIN_BYTES get the same response without a full parse."""
+    from anymouse import lambda_handler as handler_module
+    payload = {"patients": [{"name": f"Patient {i}", "age": i} for i in range(50)], "note": "caf\u00e9"}
+    options = {"payload": payload, "config": {"fields": ["patients[*].name", "note"]}}
+
+    def call(body):
+        event = {
+            "httpMethod": "POST",
+            "path": "/anonymize",
+            "body": body,
+            "headers": {"X-API-Key": "test-api-key-123"}
+        }
+        return lambda_handler(event, {})
+
+    expected = call(json.dumps(options))
+    monkeypatch.setattr(handler_module, "STREAM_MIN_BYTES", 10)
+    with patch.object(handler_module, "handle_anonymize", side_effect=AssertionError("not streamed")):
+        streamed = call(json.dumps(options))
+    assert streamed == expected
+
+    # Negative indices and text payloads fall back to the regular path
+    fallback = {"payload": payload, "config": {"fields": ["patients[-1].name"]}}
+    assert json.loads(call(json.dumps(fallback))["body"])["tokens"] == {"[name1]": "Patient 49"}
+    assert call(json.dumps({"payload": "plain text"}))["statusCode"] == 200
+    assert call('{"payload": {"a": 1,}}')["statusCode"] == 400
+    assert call(json.dumps({"payload": {}, "config": {"fields": "bad"}}))["statusCode"] == 400
+
+def test_object_message_format_round_trip(monkeypatch):
+    """message_format "object" returns the payload as JSON, streamed or not, and /deanonymize restores it."""
+    from anymouse import lambda_handler as handler_module
+    payload = {"patient": {"name": "Jane Doe", "mrn": 123}, "visits": [{"doctor": "Dr. Lee"}]}
+    request = {"payload": payload, "config": {"fields": ["patient.name", "visits[*].doctor"]}, "message_format": "object"}
+
+    def call(path, body, **event):
+        return lambda_handler({
+            "httpMethod": "POST",
+            "path": path,
+            "body": json.dumps(body),
+            "headers": {"X-API-Key": "test-api-key-123"},
+            **event
+        }, {})
+
+    response = call("/anonymize", request)
+    assert response["headers"]["Content-Type"] == "application/json"
+    result = json.loads(response["body"])
+    assert result["message"] == {"patient": {"name": "[name1]", "mrn": 123}, "visits": [{"doctor": "[name2]"}]}
+    monkeypatch.setattr(handler_module, "STREAM_MIN_BYTES", 10)
+    assert json.loads(call("/anonymize", request)["body"]) == result
+
+    restored = call("/deanonymize", {"message": result["message"], "tokens": result["tokens"]})
+    assert json.loads(restored["body"])["message"] == payload
+    assert call("/anonymize", {**request, "message_format": "xml"})["statusCode"] == 400
+
+def test_request_body_encodings(monkeypatch):
+    """Base64 bodies are decoded; MessagePack without the msgpack package is a 415."""
+    from anymouse import serialization
+    body = json.dumps({"payload": {"name": "Alice"}, "config": {"fields": ["name"]}})
+    event = {
+        "httpMethod": "POST",
+        "path": "/anonymize",
+        "body": base64.b64encode(body.encode()).decode(),
+        "isBase64Encoded": True,
+        "headers": {"X-API-Key": "test-api-key-123"}
+    }
+    assert json.loads(lambda_handler(event, {})["body"])["tokens"] == {"[name1]": "Alice"}
+    assert lambda_handler({**event, "body": "not base64!"}, {})["statusCode"] == 400
+
+    monkeypatch.setattr(serialization, "msgpack", None)
+    msgpack_event = {**event, "headers": {**event["headers"], "content-type": "application/msgpack"}}
+    assert lambda_handler(msgpack_event, {})["statusCode"] == 415
+
+def test_gzip_request_and_response():
+    """Large responses are gzipped when accepted; gzip request bodies are inflated."""
+    payload = {"notes": [{"author": f"Author {i}", "text": "routine follow-up"} for i in range(100)]}
+    body = json.dumps({"payload": payload, "config": {"fields": ["notes[*].author"]}})
+    event = {
+        "httpMethod": "POST",
+        "path": "/anonymize",
+        "body": base64.b64encode(gzip.compress(body.encode())).decode(),
+        "isBase64Encoded": True,
+        "headers": {"X-API-Key": "test-api-key-123", "Content-Encoding": "gzip", "Accept-Encoding": "gzip, br",
+                    "Accept": "application/gzip"}
+    }
+    response = lambda_handler(event, {})
+    assert response["statusCode"] == 200
+    assert response["isBase64Encoded"] is True
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    result = json.loads(gzip.decompress(base64.b64decode(response["body"])))
+    assert len(result["tokens"]) == 100
+
+    # The headers used behind API Gateway, where application/gzip is the binary media type
+    gateway = {**event, "headers": {**event["headers"], "Content-Type": "application/gzip",
+                                    "Accept": "application/gzip, application/json"}}
+    response = lambda_handler(gateway, {})
+    assert response["headers"] == {"Content-Type": "application/json", "Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+    assert json.loads(gzip.decompress(base64.b64decode(response["body"]))) == result
+
+    # Clients whose first Accept type is not binary (requests, aiohttp: */*) get plain JSON,
+    # which API Gateway would otherwise hand them as base64 text
+    for accept in ("*/*", "application/json", None):
+        headers = {"X-API-Key": "test-api-key-123", "Content-Encoding": "gzip", "Accept-Encoding": "gzip, deflate"}
+        if accept:
+            headers["Accept"] = accept
+        response = lambda_handler({**event, "headers": headers}, {})
+        assert "isBase64Encoded" not in response
+        assert "Content-Encoding" not in response["headers"]
+        assert json.loads(response["body"]) == result
+
+    # Small responses and clients without gzip get plain JSON
+    small = {**event, "body": json.dumps({"payload": "no names here"}), "isBase64Encoded": False,
+             "headers": {"X-API-Key": "test-api-key-123", "Accept-Encoding": "gzip", "Accept": "application/gzip"}}
+    assert "Content-Encoding" not in lambda_handler(small, {})["headers"]
+    plain = {**event, "headers": {"X-API-Key": "test-api-key-123", "Content-Encoding": "gzip"}}
+    assert json.loads(lambda_handler(plain, {})["body"]) == result
+
+    bad = {**event, "headers": {"X-API-Key": "test-api-key-123", "Content-Encoding": "br"}}
+    assert lambda_handler(bad, {})["statusCode"] == 415
+    corrupt = {**event, "body": base64.b64encode(b"not gzip").decode()}
+    assert lambda_handler(corrupt, {})["statusCode"] == 400
+
+def test_msgpack_request_and_response():
+    msgpack = pytest.importorskip("msgpack")
+    request = {"payload": {"name": "Alice"}, "config": {"fields": ["name"]}}
+    response = lambda_handler({
+        "httpMethod": "POST",
+        "path": "/anonymize",
+        "body": base64.b64encode(msgpack.packb(request)).decode(),
+        "isBase64Encoded": True,
+        "headers": {"X-API-Key": "test-api-key-123", "Content-Type": "application/msgpack",
+                    "Accept": "application/msgpack"}
+    }, {})
+    assert response["isBase64Encoded"] is True
+    assert response["headers"]["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(base64.b64decode(response["body"]))["tokens"] == {"[name1]": "Alice"}
+
+@pytest.mark.parametrize("event", [
+    {"warmup": True},
+    {"source": "aws.events", "detail-type": "Scheduled Event", "detail": {}},
+])
+def test_warmup_event_skips_auth(event, monkeypatch):
+    """Warmup pings return model state without an API key or a route."""
+    from anymouse import anonymize
+    monkeypatch.setattr(anonymize, "_MODEL_INIT_MS", None)
+    monkeypatch.setattr(anonymize, "_SPACY_AVAILABLE", None)
+    monkeypatch.setattr(anonymize, "_NLP", None)
+    first = json.loads(lambda_handler(event, {})["body"])
+    second_response = lambda_handler(event, {})
+    assert second_response["statusCode"] == 200
+    second = json.loads(second_response["body"])
+    assert first["status"] == "warm"
+    assert first["cold"] is True
+    assert second["cold"] is False
+    assert second["init_ms"] == first["init_ms"]
+    assert second["engine"] in ("spacy", "regex")
+
+def test_warmup_after_request_loaded_model_is_warm(monkeypatch):
+    """A ping after a normal request loaded the model reports that load, not its own run."""
+    from anymouse import anonymize
+    monkeypatch.setattr(anonymize, "_MODEL_INIT_MS", None)
+    monkeypatch.setattr(anonymize, "_SPACY_AVAILABLE", None)
+    monkeypatch.setattr(anonymize, "_NLP", None)
+    anonymize.anonymize_text("Jane Smith called.")
+    load_ms = anonymize._MODEL_INIT_MS
+    assert load_ms is not None
+
+    result = json.loads(lambda_handler({"warmup": True}, {})["body"])
+    assert result["cold"] is False
+    assert result["init_ms"] == round(load_ms, 1)
+
+def test_request_emits_emf_metrics(capsys):
+    event = {
+        "httpMethod": "POST",
+        "path": "/anonymize",
+        "body": json.dumps({"payload": {"name": "Alice"}, "config": {"fields": ["name"]}}),
+        "headers": {"X-API-Key": "test-api-key-123"},
+    }
+    response = lambda_handler(event, type("Context", (), {"aws_request_id": "req-1"})())
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+    assert len(lines) == 1
+    record = lines[0]
+    assert record["Path"] == "/anonymize" and record["StatusCode"] == 200 and record["RequestId"] == "req-1"
+    assert {"AuthMs", "ParseMs", "ConfigMs", "SubstituteMs", "SerializeMs"} <= set(record)
+    assert record["RequestBytes"] == len(event["body"])
+    assert record["ResponseBytes"] == len(response["body"])
+    assert record["EntityTypes"] == {"FIELD": 1}
+
+    lambda_handler({**event, "path": "/nope/12345"}, {})
+    assert json.loads(capsys.readouterr().out.splitlines()[-1])["Path"] == "other"
+
+def test_startup_profile_logged_once(monkeypatch):
+    from anymouse import startup
+
+    monkeypatch.setattr(startup, "_PROFILER", startup.ImportProfiler())
+    event = {"httpMethod": "POST", "path": "/nope", "headers": {"X-API-Key": "test-api-key-123"}}
+    with patch("anymouse.lambda_handler.logger.info") as mock_log:
+        lambda_handler(event, {})
+        lambda_handler(event, {})
+    profiles = [call for call in mock_log.call_args_list if call.args[0].startswith("action=startup_profile")]
+    assert len(profiles) == 1
+    assert json.loads(profiles[0].args[1])["modules"] == 0
+
+def test_heavy_dependencies_are_imported_lazily():
+    # A fresh interpreter: this test process has long since imported them
+    code = (
+        "import sys, anymouse.lambda_handler, anymouse.deanonymize as d; "
+        "d.deanonymize_text('[name1]', {'[name1]': 'Alice'}); "
+        "print(sorted(m for m in ('boto3', 'botocore', 'pydantic', 'spacy') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,69 @@
+import json
+import time
+
+import pytest
+
+from anymouse import metrics
+from anymouse.anonymize import anonymize_payload, anonymize_text
+from anymouse.deanonymize import deanonymize_text
+from anymouse.metrics import count_entities, finish_request, stage, start_request
+
+
+@pytest.fixture(autouse=True)
+def warm(monkeypatch):
+    monkeypatch.setattr(metrics, "_COLD", False)
+
+
+def test_nothing_recorded_outside_a_request(capsys):
+    with stage("ner"):
+        count_entities({"PERSON": 1})
+    assert finish_request(None, {"Path": "/anonymize"}) is None
+    assert capsys.readouterr().out == ""
+
+
+def test_nested_stages_are_exclusive(capsys):
+    token = start_request()
+    with stage("ner"):
+        with stage("model_load"):
+            time.sleep(0.02)
+        time.sleep(0.01)
+    with stage("ner"):
+        pass
+    record = finish_request(token, {"Path": "/anonymize"}, response_bytes=10, properties={"StatusCode": 200})
+
+    assert record["ModelLoadMs"] >= 20
+    assert 10 <= record["NerMs"] < 20
+    assert record["TotalMs"] >= record["ModelLoadMs"] + record["NerMs"]
+    assert "AuthMs" not in record
+    assert json.loads(capsys.readouterr().out) == record
+
+    emf = record["_aws"]["CloudWatchMetrics"][0]
+    assert emf["Namespace"] == "Anymouse" and emf["Dimensions"] == [["Path"]]
+    names = {metric["Name"]: metric["Unit"] for metric in emf["Metrics"]}
+    assert names["NerMs"] == "Milliseconds" and names["ResponseBytes"] == "Bytes" and names["Entities"] == "Count"
+    assert record["Path"] == "/anonymize" and record["StatusCode"] == 200 and record["ColdStart"] == 0
+
+
+def test_entity_counts_and_cold_flag(monkeypatch):
+    monkeypatch.setattr(metrics, "_COLD", True)
+    token = start_request()
+    anonymize_text("Alice met Bob and Alice.", engine="regex")
+    anonymize_payload({"name": "Alice", "email": "a@example.com"}, {"fields": ["name", "email"]})
+    deanonymize_text("[name1]", {"[name1]": "Alice"})
+    record = finish_request(token, {"Path": "/anonymize"})
+
+    assert record["EntityTypes"] == {"PERSON": 2, "FIELD": 2}
+    assert record["Entities"] == 4
+    assert {"NerMs", "SubstituteMs", "SerializeMs"} <= set(record)
+    assert record["Cold"] is True and record["ColdStart"] == 1
+    assert finish_request(start_request(), {"Path": "/anonymize"})["Cold"] is False
+
+
+def test_disabled_by_env(monkeypatch, capsys):
+    monkeypatch.setenv("ANYMOUSE_METRICS", "0")
+    token = start_request()
+    assert token is None
+    with stage("ner"):
+        pass
+    assert finish_request(token, {"Path": "/anonymize"}) is None
+    assert capsys.readouterr().out == ""
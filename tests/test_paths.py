@@ -0,0 +1,37 @@
+from anymouse.paths import compile_fields
+
+
+def test_compile_fields_builds_trie():
+    plan = compile_fields(["patient.name", "patient.address.city", "doctor"])
+    # Each spelling is its own payload position: patient.name 2, patient.address.city 4, doctor 1
+    assert plan.targets == 7
+    assert set(plan.root.lookup) == {"patient", "patient.name", "patient.address", "patient.address.city", "doctor"}
+    patient = plan.root.lookup["patient"]
+    assert not patient.terminal
+    assert patient.lookup["name"].terminal
+    assert patient.lookup["address.city"] is plan.root.lookup["patient.address.city"]
+
+
+def test_compile_fields_is_cached():
+    assert compile_fields(["a", "b.c"]) is compile_fields(("a", "b.c"))
+    assert not compile_fields([])
+
+
+def test_list_and_wildcard_steps():
+    plan = compile_fields(["items[*].name", "items[0].id", "meta.*.owner", "grid[1][-1]"])
+    assert plan.targets is None  # Wildcards make the match count open-ended
+    items = plan.root.lookup["items"]
+    assert items.items.lookup["name"].terminal
+    # The [*] branch is merged into the explicit index, so one node covers both paths
+    first = items.indices[0]
+    assert first.lookup["name"].terminal and first.lookup["id"].terminal
+    meta = plan.root.lookup["meta"]
+    assert meta.any_key.lookup["owner"].terminal
+    assert meta.items is meta.any_key  # "*" also matches list elements
+    assert plan.root.lookup["grid"].indices[1].indices[-1].terminal
+
+
+def test_plain_brackets_without_steps_stay_keys():
+    plan = compile_fields(["a[x]", "b[]"])
+    assert set(plan.root.lookup) == {"a[x]", "b[]"}
+    assert plan.targets == 2
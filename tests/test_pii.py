@@ -0,0 +1,78 @@
+import pytest
+
+from anymouse import anonymize, anonymize_text, anonymize_texts, deanonymize_text
+from anymouse.pii import find_pii, mask_spans
+
+CONTACT = (
+    "seen on March 15, 2024 (MRN: 00123456).\n"
+    "phone: (555) 123-4567\n"
+    "email: patient@email.com\n"
+    "address: 123 Main Street, Anytown, State 12345"
+)
+
+
+@pytest.fixture
+def pii_on(monkeypatch):
+    monkeypatch.setenv("ANYMOUSE_PII_PATTERNS", "1")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("mail jane.doe@email.com now", [("jane.doe@email.com", "EMAIL")]),
+    ("call +44 20 7946 0958 or 555.123.4567", [("+44 20 7946 0958", "PHONE"), ("555.123.4567", "PHONE")]),
+    ("due 2024-03-15, 3/15/24 or 15 March 2024", [("2024-03-15", "DATE"), ("3/15/24", "DATE"), ("15 March 2024", "DATE")]),
+    ("lives at 42 Elm Ave, Springfield", [("42 Elm Ave, Springfield", "ADDRESS")]),
+    ("postal code M5V 2T6", [("M5V 2T6", "ADDRESS")]),
+    ("mrn: 00123456, ssn 123-45-6789, chart no. AB-99812", [("00123456", "ID"), ("123-45-6789", "ID"), ("AB-99812", "ID")]),
+    ("version 1.2.3 shipped to 42 users", []),
+])
+def test_find_pii(text, expected):
+    assert [(span_text, label) for _, _, span_text, label in find_pii(text)] == expected
+
+
+def test_mask_keeps_offsets():
+    spans = find_pii(CONTACT)
+    masked = mask_spans(CONTACT, spans)
+    assert len(masked) == len(CONTACT)
+    assert "patient@email.com" not in masked
+    assert masked.startswith("seen on ")
+
+
+def test_pre_pass_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("ANYMOUSE_PII_PATTERNS", raising=False)
+    result = anonymize_text("write to patient@email.com")
+    assert result["tokens"] == {}
+    assert result["fields"] == ["PERSON", "ORG", "GPE", "DATE"]
+
+
+def test_pre_pass_placeholders_round_trip(monkeypatch, pii_on):
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: None)
+    result = anonymize_text(CONTACT)
+    assert result["tokens"] == {
+        "[date1]": "March 15, 2024",
+        "[id1]": "00123456",
+        "[phone1]": "(555) 123-4567",
+        "[email1]": "patient@email.com",
+        "[addr1]": "123 Main Street, Anytown, State 12345",
+    }
+    assert result["fields"] == ["PERSON", "ORG", "GPE", "DATE", "EMAIL", "PHONE", "ADDRESS", "ID"]
+    assert deanonymize_text(result["message"], result["tokens"]) == CONTACT
+    assert list(anonymize_texts([CONTACT, "reply to a@b.org"])) == [result, anonymize_text("reply to a@b.org")]
+
+
+def test_pre_pass_masks_text_before_spacy(monkeypatch, pii_on):
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "PERSON", "pattern": "Jane"}])
+    seen = []
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: nlp)
+    monkeypatch.setattr(anonymize, "_doc_entities", lambda doc: seen.append(doc.text) or [
+        (ent.start_char, ent.end_char, ent.text, ent.label_) for ent in doc.ents
+    ])
+    result = anonymize_text("Jane wrote from jane@clinic.org")
+    assert result["message"] == "[name1] wrote from [email1]"
+    assert seen == ["Jane wrote from " + " " * len("jane@clinic.org")]
+
+    # Nothing left for the model once the PII is gone
+    seen.clear()
+    assert anonymize_text("reply to bob@clinic.org")["tokens"] == {"[email1]": "bob@clinic.org"}
+    assert seen == []
@@ -0,0 +1,94 @@
+import pytest
+
+from anymouse import anonymize, anonymize_text
+from anymouse.segment_cache import SegmentCache, configure_segment_cache, segment_cache_stats
+
+
+@pytest.fixture
+def segment_cache():
+    cache = configure_segment_cache(8)
+    yield cache
+    configure_segment_cache(0)
+
+
+def test_segment_cache_lru_and_counters():
+    cache = SegmentCache(max_entries=2)
+    keys = [cache.key(text) for text in ("one", "two", "three")]
+    assert cache.get(keys[0]) is None
+    cache.put(keys[0], ((0, 3, "PERSON"),))
+    cache.put(keys[1], ())
+    assert cache.get(keys[0]) == ((0, 3, "PERSON"),)
+    cache.put(keys[2], ())  # Evicts the least recently used entry ("two")
+    assert cache.get(keys[1]) is None
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["bytes"] > 0
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+
+def test_segment_cache_disabled_by_default():
+    assert segment_cache_stats() == {"enabled": False}
+
+
+def test_templated_text_only_runs_new_lines(monkeypatch, segment_cache):
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns(
+        [{"label": "PERSON", "pattern": name} for name in ("Alice", "Bob", "Carol")]
+    )
+    seen = []
+    original_pipe = nlp.pipe
+
+    def pipe(texts, **kwargs):
+        texts = list(texts)
+        seen.extend(texts)
+        return original_pipe(texts, **kwargs)
+
+    monkeypatch.setattr(nlp, "pipe", pipe)
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: nlp)
+    template = "Dear {name},\n\n  Your appointment with Bob is confirmed.\nRegards, Alice\n"
+
+    first = anonymize_text(template.format(name="Carol"))
+    assert first["message"] == "Dear [name1],\n\n  Your appointment with [name2] is confirmed.\nRegards, [name3]\n"
+    assert first["tokens"] == {"[name1]": "Carol", "[name2]": "Bob", "[name3]": "Alice"}
+
+    seen.clear()
+    second = anonymize_text(template.format(name="Alice"))
+    assert seen == ["Dear Alice,"]  # Only the line that changed reached spaCy
+    assert second["tokens"] == {"[name1]": "Alice", "[name2]": "Bob"}
+    stats = segment_cache_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+
+    # Only offsets and labels are cached, never text
+    for spans in segment_cache._entries.values():
+        assert all(isinstance(start, int) and isinstance(end, int) for start, end, _ in spans)
+
+
+def test_ner_cost_counts_only_lines_run_through_spacy(monkeypatch, segment_cache):
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: nlp)
+    recorded = []
+    monkeypatch.setattr(anonymize, "_record_ner_cost", lambda chars, elapsed_ms: recorded.append(chars))
+
+    anonymize_text("Header line\nBody for Alice")
+    anonymize_text("Header line\nBody for Bob")
+    assert recorded == [len("Header line") + len("Body for Alice"), len("Body for Bob")]
+
+
+def test_batches_gate_each_text_once(monkeypatch, segment_cache):
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "PERSON", "pattern": "Alice"}])
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: nlp)
+    monkeypatch.setitem(anonymize._PREFILTER_STATS, "checked", 0)
+    monkeypatch.setitem(anonymize._PREFILTER_STATS, "skipped", 0)
+
+    results = list(anonymize.anonymize_texts(["Alice called", "ok", "Alice called"]))
+    assert anonymize.prefilter_stats() == {"checked": 2, "skipped": 1}
+    assert results == [anonymize_text("Alice called"), anonymize_text("ok"), anonymize_text("Alice called")]
@@ -0,0 +1,103 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+from anymouse import serialization
+from anymouse.serialization import (
+    JSON,
+    MSGPACK,
+    UnsupportedMediaType,
+    accepts_gzip,
+    binary_response_ok,
+    compress_body,
+    decode_body,
+    decode_content,
+    dumps,
+    encode_body,
+    gunzip,
+    negotiate,
+)
+
+
+@pytest.mark.parametrize("engine", ["installed", "stdlib"])
+def test_dumps_round_trips(engine, monkeypatch):
+    if engine == "stdlib":
+        monkeypatch.setattr(serialization, "orjson", None)
+    data = {"message": '{"a": "caf\\u00e9"}', "tokens": {"[name1]": [1, 2.5, None]}, "big": 2 ** 70}
+    assert json.loads(dumps(data)) == data  # Integers beyond 64 bits fall back to the stdlib
+
+
+def test_decode_body():
+    assert decode_body('{"a": 1}') == {"a": 1}
+    encoded = base64.b64encode(b'{"a": 12345678901234567890123}').decode()
+    assert decode_body(encoded, "application/json; charset=utf-8", base64_encoded=True) == {"a": 12345678901234567890123}
+    with pytest.raises(ValueError):
+        decode_body("{not json")
+
+
+def test_msgpack_unavailable(monkeypatch):
+    monkeypatch.setattr(serialization, "msgpack", None)
+    assert negotiate("application/msgpack") == JSON
+    assert encode_body({"a": 1}, MSGPACK) == ('{"a": 1}' if serialization.orjson is None else '{"a":1}', False, JSON)
+    with pytest.raises(UnsupportedMediaType):
+        decode_body("gqFhAQ==", "application/msgpack", base64_encoded=True)
+
+
+def test_msgpack_negotiation_and_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    assert negotiate(None) == JSON
+    assert negotiate("application/msgpack") == MSGPACK
+    assert negotiate("application/json, application/msgpack;q=0.5") == JSON
+    assert negotiate("application/msgpack, */*;q=0.1") == MSGPACK
+    body, base64_encoded, content_type = encode_body({"a": [1, "b"]}, MSGPACK)
+    assert base64_encoded and content_type == MSGPACK
+    assert msgpack.unpackb(base64.b64decode(body)) == {"a": [1, "b"]}
+    assert decode_body(body, "application/x-msgpack", base64_encoded=True) == {"a": [1, "b"]}
+    assert encode_body({"a": 2 ** 70}, MSGPACK)[2] == JSON
+    with pytest.raises(ValueError):
+        decode_body(b"\xc1", MSGPACK)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("gzip", True),
+    ("br, gzip;q=0.5", True),
+    ("gzip;q=0, *", False),
+    ("*", True),
+    ("identity", False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("*/*", False),
+    ("application/json", False),
+    ("application/json, application/gzip", False),
+    ("application/gzip, application/json", True),
+    ("application/msgpack;q=0.9", True),
+])
+def test_binary_response_ok(header, expected):
+    assert binary_response_ok(header) is expected
+
+
+def test_gzip_bodies():
+    body = json.dumps({"message": "x" * 5000})
+    assert gzip.decompress(base64.b64decode(compress_body(body, False))).decode() == body
+    packed = base64.b64encode(b"\x81\xa1a\x01").decode()
+    assert gzip.decompress(base64.b64decode(compress_body(packed, True))) == b"\x81\xa1a\x01"
+
+    compressed = gzip.compress(body.encode())
+    assert decode_content(compressed, "gzip", limit=10_000) == body.encode()
+    assert decode_content(body, None, limit=10) == body
+    with pytest.raises(ValueError, match="exceeds"):
+        gunzip(compressed, limit=1000)
+    with pytest.raises(ValueError, match="Invalid gzip"):
+        gunzip(b"not gzip", limit=1000)
+    with pytest.raises(ValueError, match="truncated"):
+        gunzip(compressed[:20], limit=10_000)
+    with pytest.raises(UnsupportedMediaType):
+        decode_content(compressed, "br", limit=10_000)
@@ -0,0 +1,57 @@
+import sys
+import time
+
+import pytest
+
+from anymouse import startup
+
+
+@pytest.fixture
+def profiler():
+    startup.uninstall()
+    yield startup.install()
+    startup.uninstall()
+
+
+def test_profile_enabled(monkeypatch):
+    monkeypatch.delenv("ANYMOUSE_STARTUP_PROFILE", raising=False)
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    assert not startup.profile_enabled()
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "anymouse")
+    assert startup.profile_enabled()
+    monkeypatch.setenv("ANYMOUSE_STARTUP_PROFILE", "0")
+    assert not startup.profile_enabled()
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME")
+    monkeypatch.setenv("ANYMOUSE_STARTUP_PROFILE", "1")
+    assert startup.profile_enabled()
+
+
+def test_imports_are_timed_with_self_and_cumulative(profiler, tmp_path, monkeypatch):
+    package = tmp_path / "slowpkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("import time\ntime.sleep(0.01)\nfrom . import child\n")
+    (package / "child.py").write_text("import time\ntime.sleep(0.02)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slowpkg", raising=False)
+    monkeypatch.delitem(sys.modules, "slowpkg.child", raising=False)
+
+    import slowpkg  # noqa: F401
+    with startup.phase("warmup"):
+        time.sleep(0.005)
+    report = startup.finish()
+
+    assert profiler not in sys.meta_path and startup.finish() is None
+    timings = {entry["module"]: entry for entry in report["slowest"]}
+    assert timings["slowpkg.child"]["ms"] >= 20
+    assert timings["slowpkg"]["ms"] >= 30 and 10 <= timings["slowpkg"]["self_ms"] < 20
+    assert report["packages_ms"]["slowpkg"] >= 30
+    assert report["phases_ms"]["warmup"] >= 5
+    # The loader is restored once the module has run
+    assert "exec_module" not in vars(sys.modules["slowpkg"].__loader__)
+
+
+def test_phase_without_profiler():
+    startup.uninstall()
+    with startup.phase("warmup"):
+        pass
+    assert startup.finish() is None
@@ -0,0 +1,95 @@
+import io
+import json
+
+import pytest
+
+from anymouse.anonymize import anonymize_payload
+from anymouse.stream import anonymize_stream, iter_tokens, scan_members, supports_fields
+
+PAYLOAD = {
+    "patient": {"name": "Alice Smith", "note": "café \"quoted\"\n\U0001F600", "ids": [1, 2.5, -0.0, 1e-7]},
+    "patients": [{"name": "Bob", "tags": []}, {"name": "Carol", "tags": {}}],
+    "flags": {"active": True, "deleted": None},
+    "a.b": {"c": 1},
+    "big": 12345678901234567890,
+}
+
+
+def stream(source, fields, **kwargs):
+    sink = io.StringIO()
+    result = anonymize_stream(source, sink, {"fields": fields}, **kwargs)
+    return sink.getvalue(), result
+
+
+@pytest.mark.parametrize("fields", [
+    ["patient.name"],
+    ["patient"],
+    ["patients[*].name", "patient.ids[3]"],
+    ["*.name", "flags.deleted"],
+    ["patients[1]", "a.b.c", "missing"],
+    [],
+])
+def test_stream_matches_anonymize_payload(fields):
+    expected = anonymize_payload(PAYLOAD, {"fields": fields})
+    message, result = stream(json.dumps(PAYLOAD, indent=2), fields)
+    assert message == expected["message"]
+    assert result == {"tokens": expected["tokens"], "fields": fields}
+
+
+@pytest.mark.parametrize("payload", [
+    {"a": {"b": "x", "c": 1}, "a.b": "y"},
+    {"a.b": "y", "a": {"b": "x"}, "a.b.c": {"d": "z"}, "a.b.c.d": "w"},
+])
+def test_stream_matches_anonymize_payload_on_dotted_keys(payload):
+    fields = ["a.b", "a.b.c.d"]
+    expected = anonymize_payload(payload, {"fields": fields})
+    message, result = stream(json.dumps(payload), fields)
+    assert message == expected["message"]
+    assert result["tokens"] == expected["tokens"]
+    assert not any(f'"{value}"' in message for value in ("x", "y", "z", "w"))  # No value left in clear text
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 16])
+def test_chunked_sources(chunk_size):
+    fields = ["patients[*].name", "patient.note"]
+    expected = anonymize_payload(PAYLOAD, {"fields": fields})["message"]
+    raw = json.dumps(PAYLOAD, ensure_ascii=False).encode("utf-8")
+    # Multi-byte characters and numbers are split across chunk boundaries
+    pieces = [raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size)]
+    for source in (raw, io.BytesIO(raw), pieces, io.StringIO(raw.decode("utf-8"))):
+        assert stream(source, fields, chunk_size=chunk_size)[0] == expected
+
+
+def test_member_and_scan_members():
+    body = json.dumps({"config": {"fields": ["patient.name"]}, "payload": PAYLOAD, "extra": [1]})
+    members, skipped = scan_members(body, skip=("payload",))
+    assert members == {"config": {"fields": ["patient.name"]}, "extra": [1]}
+    assert skipped == {"payload": "object"}
+    message, result = stream(body, ["patient.name"], member="payload")
+    assert message == anonymize_payload(PAYLOAD, {"fields": ["patient.name"]})["message"]
+    assert result["tokens"] == {"[name1]": "Alice Smith"}
+
+    assert scan_members('{"payload": "text"}', skip=("payload",))[1] == {"payload": "string"}
+    assert scan_members('{"payload": 1, "payload": {}}', skip=("payload",))[1] == {"payload": None}
+    assert scan_members("[1, 2]")[0] is None
+    with pytest.raises(ValueError, match="Missing 'payload'"):
+        stream('{"config": {}}', [], member="payload")
+
+
+@pytest.mark.parametrize("bad", ['{"a": 1,}', '{"a" 1}', "[1 2]", '{"a": 1} x', '{"a": tru}', '"open', "", "01", "1."])
+def test_invalid_json(bad):
+    with pytest.raises(ValueError):
+        stream(bad, ["a"])
+
+
+def test_negative_indices_not_supported():
+    assert supports_fields(["items[*].name", "items[0]"])
+    assert not supports_fields(["items[-1]"])
+    with pytest.raises(ValueError, match="Negative list indices"):
+        stream('{"items": [1]}', ["items[-1]"])
+
+
+def test_iter_tokens_long_string():
+    text = "x" * 1000
+    tokens = list(iter_tokens(json.dumps({"k": text}), chunk_size=8))
+    assert [raw for _, raw in tokens] == ["{", '"k"', ":", json.dumps(text), "}"]
@@ -51,3 +51,276 @@ def test_multiple_entity_types():
         "[date1]": "Jan 1, 2024"
     }
     assert result["fields"] == ["PERSON", "ORG", "GPE", "DATE"]
+
+
+def test_anonymize_texts_matches_single_calls():
+    from anymouse import anonymize_texts
+    texts = [
+        "Alice met Bob at the park.",
+        "Hello world.",
+        "Alice met Bob at the park.",
+        "I visited London and saw Alice.",
+    ]
+    results = list(anonymize_texts(texts, batch_size=2))
+    assert results == [anonymize_text(text) for text in texts]
+
+
+def test_anonymize_texts_duplicates_are_independent():
+    from anymouse import anonymize_texts
+    first, second = anonymize_texts(["Alice met Bob.", "Alice met Bob."])
+    first["tokens"]["[extra1]"] = "x"
+    assert "[extra1]" not in second["tokens"]
+
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap, match", [
+    (0, 0, "chunk_size"),
+    (-5, 0, "chunk_size"),
+    (100, -1, "chunk_overlap"),
+    (100, 100, "chunk_overlap"),
+    (100, 150, "chunk_overlap"),
+])
+def test_anonymize_text_rejects_bad_chunking(chunk_size, chunk_overlap, match):
+    with pytest.raises(ValueError, match=match):
+        anonymize_text("Alice met Bob.", chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def test_anonymize_texts_rejects_bad_batch_size():
+    from anymouse import anonymize_texts
+    with pytest.raises(ValueError):
+        list(anonymize_texts(["Alice"], batch_size=0))
+
+
+def test_anonymize_texts_uses_nlp_pipe(monkeypatch):
+    spacy = pytest.importorskip("spacy")
+    from anymouse import anonymize, anonymize_texts
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "PERSON", "pattern": "Alice"}])
+    piped = []
+    original_pipe = nlp.pipe
+
+    def pipe(texts, **kwargs):
+        texts = list(texts)
+        piped.append(texts)
+        return original_pipe(texts, **kwargs)
+
+    monkeypatch.setattr(nlp, "pipe", pipe)
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: nlp)
+    results = list(anonymize_texts(["Alice left.", "Alice left.", "Nobody here."], batch_size=8))
+    assert piped == [["Alice left.", "Nobody here."]]
+    assert [r["message"] for r in results] == ["[name1] left.", "[name1] left.", "Nobody here."]
+
+
+def test_deanonymize_text_arbitrary_placeholders():
+    tokens = {"[mrn1]": "12345", "[staff_2]": "Dr. Who", "[name1]": "[name2]", "[name2]": "Bob"}
+    message = "MRN [mrn1] seen by [staff_2] for [name1]; [unknown1] stays."
+    # Replaced values are not rescanned, unknown placeholders are left alone
+    assert deanonymize_text(message, tokens) == "MRN 12345 seen by Dr. Who for [name2]; [unknown1] stays."
+
+
+def test_deanonymize_text_non_bracket_tokens_prefer_longest():
+    from anymouse import deanonymize
+    tokens = {"<<p1>>": "A", "<<p10>>": "B", "{{x}}": "C"}
+    assert deanonymize_text("<<p10>> <<p1>> {{x}} <<p2>>", tokens) == "B A C <<p2>>"
+    # The compiled matcher is reused for the same token keys
+    assert deanonymize._token_matcher(tokens) is deanonymize._token_matcher(dict(tokens))
+
+
+@pytest.mark.parametrize("profile, expected", [
+    ("ner", ["entity_ruler"]),
+    ("full", ["parser", "entity_ruler"]),
+])
+def test_model_path_and_pipeline_profile(monkeypatch, tmp_path, profile, expected):
+    spacy = pytest.importorskip("spacy")
+    from anymouse import anonymize
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer", name="parser")  # Stands in for a component the profile drops
+    nlp.to_disk(tmp_path / "model")
+
+    monkeypatch.setenv("SPACY_MODEL_PATH", str(tmp_path / "model"))
+    monkeypatch.setenv("ANYMOUSE_SPACY_PROFILE", profile)
+    monkeypatch.setattr(anonymize, "_NLP", None)
+    monkeypatch.setattr(anonymize, "_SPACY_AVAILABLE", None)
+    model = anonymize._get_nlp_model()
+    assert model is not None
+    assert model.pipe_names == expected
+
+
+def _ruler_model(spacy, names):
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "PERSON", "pattern": name} for name in names])
+    return nlp
+
+
+def test_chunked_anonymization_matches_whole_document(monkeypatch):
+    spacy = pytest.importorskip("spacy")
+    from anymouse import anonymize
+    nlp = _ruler_model(spacy, ["Alice", "Bob", "Carol Jones"])
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: nlp)
+    paragraphs = [f"Paragraph {i}: Alice wrote to Bob, copying Carol Jones about visit {i}." for i in range(40)]
+    text = "\n\n".join(paragraphs)
+
+    whole = anonymize_text(text)
+    chunked = anonymize_text(text, chunk_size=300, chunk_overlap=60)
+    assert chunked == whole
+    assert chunked["tokens"] == {"[name1]": "Alice", "[name2]": "Bob", "[name3]": "Carol Jones"}
+
+
+def test_chunking_kicks_in_above_max_length(monkeypatch):
+    spacy = pytest.importorskip("spacy")
+    from anymouse import anonymize
+    nlp = _ruler_model(spacy, ["Carol Jones"])
+    nlp.max_length = 500
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: nlp)
+    monkeypatch.setattr(anonymize, "DEFAULT_CHUNK_SIZE", 400)
+    # No paragraph breaks: windows fall back to word boundaries
+    text = " ".join(["filler"] * 300 + ["Carol Jones"] + ["filler"] * 300)
+    result = anonymize_text(text)
+    assert result["message"].count("[name1]") == 1
+    assert result["tokens"] == {"[name1]": "Carol Jones"}
+    assert len(result["message"]) == len(text) - len("Carol Jones") + len("[name1]")
+
+
+def test_anonymize_texts_parallel_matches_serial(monkeypatch):
+    from anymouse import anonymize, anonymize_texts
+    monkeypatch.setattr(anonymize, "PARALLEL_MIN_TEXTS", 10)
+    monkeypatch.setattr(anonymize, "_SPACY_AVAILABLE", None)
+    texts = [f"Note {i}: Alice met Bob in London." if i % 3 else "Hello world." for i in range(50)]
+    parallel = list(anonymize_texts(iter(texts), batch_size=4, n_process=2))
+    assert parallel == [anonymize_text(text) for text in texts]
+    with pytest.raises(ValueError):
+        list(anonymize_texts(texts, n_process=0))
+
+
+def test_anonymize_texts_small_inputs_stay_in_process(monkeypatch):
+    from anymouse import anonymize, anonymize_texts
+    monkeypatch.setattr(anonymize, "PARALLEL_MIN_TEXTS", 10)
+    monkeypatch.setattr(anonymize, "_anonymize_parallel", lambda *args: pytest.fail("pool should not start"))
+    texts = [f"Note {i} for Alice" for i in range(9)]
+    assert list(anonymize_texts(iter(texts), batch_size=4, n_process=2)) == [anonymize_text(text) for text in texts]
+
+    # Without spaCy, workers would only run the regex engine
+    monkeypatch.setattr(anonymize, "_SPACY_AVAILABLE", False)
+    texts *= 3
+    assert list(anonymize_texts(iter(texts), batch_size=4, n_process=2)) == [anonymize_text(text) for text in texts]
+
+
+# Texts with at least one PERSON/ORG/GPE/DATE entity: the pre-filter must let all of them through
+ENTITY_CORPUS = [
+    "Hello Dr. Smith, how are you?",
+    "Email from john smith at acme corp",
+    "dr. jones will call back",
+    "the invoice was paid yesterday",
+    "see you tomorrow or next week",
+    "we met two years ago",
+    "renewal due in march",
+    "delivered on 2024-03-15",
+    "shipped to paris last friday",
+    "quarterly review with the board",
+    "réunion avec Émile à Genève",
+    "встреча с Иваном",
+    "Appointment with Dr. Johnson",
+    "Hello Dr. Smith, I have a question about my prescription. Thank you, Jane Doe.",
+    "Alice met Bob in London.",
+    "call mr. brown on monday",
+]
+
+# Lowercase status strings and codes: nothing here can be a named entity or a date
+NO_ENTITY_CORPUS = [
+    "ok",
+    "status: pending",
+    "request accepted, processing",
+    "error: invalid_token",
+    "done",
+    "no changes detected",
+    "",
+    "   ",
+    "user_id=abc-def; action=retry",
+    "les données sont à jour",
+]
+
+
+def test_prefilter_passes_every_entity_text():
+    from anymouse.anonymize import _may_contain_entities
+    assert [text for text in ENTITY_CORPUS if not _may_contain_entities(text)] == []
+
+
+def test_prefilter_skips_texts_without_entities():
+    from anymouse.anonymize import _may_contain_entities
+    assert [text for text in NO_ENTITY_CORPUS if _may_contain_entities(text)] == []
+
+
+def test_prefilter_skips_model_and_counts(monkeypatch):
+    from anymouse import anonymize
+    monkeypatch.setitem(anonymize._PREFILTER_STATS, "checked", 0)
+    monkeypatch.setitem(anonymize._PREFILTER_STATS, "skipped", 0)
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: pytest.fail("model should not be loaded"))
+
+    result = anonymize_text("status: pending")
+    assert result == {"message": "status: pending", "tokens": {}, "fields": ["PERSON", "ORG", "GPE", "DATE"]}
+    assert list(anonymize.anonymize_texts(["ok", "done", "ok"])) == [anonymize_text("ok"), anonymize_text("done"), anonymize_text("ok")]
+    assert anonymize.prefilter_stats() == {"checked": 6, "skipped": 6}
+
+
+def test_prefilter_has_no_recall_loss(monkeypatch):
+    from anymouse import anonymize
+    gated = [anonymize_text(text) for text in ENTITY_CORPUS + NO_ENTITY_CORPUS]
+    monkeypatch.setenv("ANYMOUSE_PREFILTER", "0")
+    assert [anonymize_text(text) for text in ENTITY_CORPUS + NO_ENTITY_CORPUS] == gated
+
+
+def test_regex_engine_reports_engine():
+    result = anonymize_text("note for Jane Smith", engine="regex")
+    assert result["engine"] == "regex"
+    assert result["tokens"] == {"[name1]": "Jane Smith"}
+    assert "engine" not in anonymize_text("note for Jane Smith")
+    with pytest.raises(ValueError):
+        anonymize_text("text", engine="bert")
+
+
+def test_cascade_runs_spacy_only_on_uncleared_lines(monkeypatch):
+    spacy = pytest.importorskip("spacy")
+    from anymouse import anonymize
+    nlp = _ruler_model(spacy, ["Alice"])
+    seen = []
+    pipe = nlp.pipe
+    monkeypatch.setattr(nlp, "pipe", lambda texts, **kwargs: pipe(seen.extend(texts) or seen[-len(texts):], **kwargs))
+    monkeypatch.setattr(anonymize, "_get_nlp_model", lambda: nlp)
+    monkeypatch.setattr(anonymize, "_SPACY_AVAILABLE", True)
+    text = "status: ok\nAlice signed off\nretrying upload\nstatus: ok"
+    result = anonymize_text(text, engine="cascade")
+    assert result["engine"] == "cascade"
+    assert result["message"] == "status: ok\n[name1] signed off\nretrying upload\nstatus: ok"
+    assert seen == ["Alice signed off"]
+
+
+def test_latency_budget_degrades_to_regex(monkeypatch):
+    spacy = pytest.importorskip("spacy")
+    from anymouse import anonymize
+    nlp = _ruler_model(spacy, ["Alice"])
+    loads = []
+
+    def load():
+        loads.append(nlp)
+        anonymize._SPACY_AVAILABLE = True
+        return nlp
+
+    monkeypatch.setattr(anonymize, "_get_nlp_model", load)
+    monkeypatch.setattr(anonymize, "_NER_COST", {"ms_per_char": 0.01, "samples": 0})
+    monkeypatch.setattr(anonymize, "_BACKGROUND_LOAD", None)
+    text = "Alice met Bob Stone. " * 10  # 210 chars, about 2 ms predicted
+
+    # Model not loaded yet: a budgeted request never waits for the load, it starts one in the background
+    monkeypatch.setattr(anonymize, "_SPACY_AVAILABLE", None)
+    assert anonymize_text(text, latency_budget_ms=100)["engine"] == "regex"
+    anonymize._BACKGROUND_LOAD.join(timeout=5)
+    assert loads == [nlp]
+    assert anonymize._SPACY_AVAILABLE is True
+
+    within = anonymize_text(text, engine="spacy", latency_budget_ms=100)
+    assert within["engine"] == "spacy"
+    assert within["tokens"] == {"[name1]": "Alice"}
+    assert anonymize._NER_COST["samples"] == 1
+
+    over = anonymize_text(text, engine="spacy", latency_budget_ms=0.001)
+    assert over["engine"] == "regex"
+    assert over["tokens"] == {"[name1]": "Alice", "[name2]": "Bob Stone"}